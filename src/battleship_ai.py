@@ -1,19 +1,52 @@
-"""Simple, rule-based AIs to that play the game of battleship."""
-from typing import Tuple, List
-import random
-import PyQt5
-import numpy as np
+"""
+Simple, rule-based AIs to that play the game of battleship.
+
+AIs only depend on NumPy, so that headless simulations never pay for importing PyQt.
+The adapter from GUI boards to arrays lives in battleship_qt.
+"""
 
+from typing import Iterator, NamedTuple, Tuple, List
+import threading
+import time
+import numpy as np
 
-random.seed(1)
-np.random.seed(1)
+from battleship_engine import CellIndex
 
 # TODO:
 #   - Implement AIs as classes
-#   - Explore potential bias of hard AI not to find at edges
 
 
-def fool_AI(enemy_array: np.array, board_size: int) -> Tuple[int]:
+class HardParams(NamedTuple):
+    """
+    Tunable parameters of the hard AI, see find_optimal_spaced_tile. Defaults are the
+    original heuristics, and battleship_sweep searches better ones.
+    """
+
+    space_divisor: int = 2  # Primary condition: spacing of biggest boat // divisor
+    border_relax: int = 1  # Border condition: spacing of biggest boat - relax
+    edge_bias: float = 0.0  # Probability of scanning border tiles first
+
+    def check(self):
+        """
+        Checks that the parameters are valid.
+
+        Raises:
+            ValueError: if space_divisor is below 1 or edge_bias is not a probability.
+        """
+        if self.space_divisor < 1:
+            raise ValueError(
+                f"space_divisor must be at least 1, got {self.space_divisor}"
+            )
+        if not 0.0 <= self.edge_bias <= 1.0:
+            raise ValueError(f"edge_bias must be in [0, 1], got {self.edge_bias}")
+
+
+def fool_AI(
+    enemy_array: np.array,
+    board_size: int,
+    rng: np.random.Generator = None,
+    index: CellIndex = None,
+) -> Tuple[int]:
     """
     Fool AI that shoots at random at unexplored tiles.
 
@@ -24,18 +57,30 @@ def fool_AI(enemy_array: np.array, board_size: int) -> Tuple[int]:
             'h' are explored hit tiles
             's' are explored sunk tiles
         board_size: size of the board, assumed to be square.
+        rng: random generator of the AI. If None, a generator seeded from OS entropy.
+        index: unexplored tiles of the enemy board, kept up to date by the caller
+            after every shot. If None, it is built from enemy_array.
 
     Returns:
         2D coordinates of recommended tile to fire at.
 
+    Raises:
+        ValueError: if there are no unexplored tiles left.
     """
-    while True:  # Find tile via brute force
-        target = (random.randint(0, board_size - 1), random.randint(0, board_size - 1))
-        if enemy_array[target] == "x":
-            return target
-
-
-def standard_AI(enemy_array: np.array, board_size: int) -> Tuple[int]:
+    if rng is None:
+        rng = np.random.default_rng()
+    if index is None:
+        index = CellIndex.from_mask(enemy_array == "x")
+    return index.sample(rng)
+
+
+def standard_AI(
+    enemy_array: np.array,
+    board_size: int,
+    rng: np.random.Generator = None,
+    clusters: "HitClusters" = None,
+    index: CellIndex = None,
+) -> Tuple[int]:
     """
     AI that follows the lead on hit boats until they are sunk. If no hit boats it fires
     randomly.
@@ -47,19 +92,32 @@ def standard_AI(enemy_array: np.array, board_size: int) -> Tuple[int]:
             'h' are explored hit tiles
             's' are explored sunk tiles
         board_size: size of the board, assumed to be square.
+        rng: random generator of the AI. If None, a generator seeded from OS entropy.
+        clusters: hit tiles of the enemy board, kept up to date by the caller after
+            every shot. If None, they are built from enemy_array.
+        index: unexplored tiles of the enemy board, see fool_AI.
 
     Returns:
         2D coordinates of recommended tile to fire at.
 
     """
-    hit = find_hit_squares(enemy_array)
-    if hit is not None:
-        return infer_next_hit(enemy_array, hit, board_size)
-    else:
-        return fool_AI(enemy_array, board_size)
-
-
-def hard_AI(enemy_array, board_size, max_size):
+    if clusters is None:
+        clusters = HitClusters.from_array(enemy_array)
+    target = infer_next_hit(enemy_array, clusters, board_size)
+    if target is not None:
+        return target
+    return fool_AI(enemy_array, board_size, rng, index)
+
+
+def hard_AI(
+    enemy_array,
+    board_size,
+    max_size,
+    rng=None,
+    clusters=None,
+    index=None,
+    params=None,
+):
     """
     AI that follows the lead on hit boats until they are sunk. If no hit boats it
     fires optimizing spacing to already-shot tiles.
@@ -72,20 +130,29 @@ def hard_AI(enemy_array, board_size, max_size):
             's' are explored sunk tiles
         board_size: size of the board, assumed to be square.
         max_size: size of biggest boat not sunk in enemy array.
+        rng: random generator of the AI. If None, a generator seeded from OS entropy.
+        clusters: hit tiles of the enemy board, kept up to date by the caller after
+            every shot. If None, they are built from enemy_array.
+        index: unexplored tiles of the enemy board, see fool_AI.
+        params: heuristics of the AI, see HardParams. If None, the defaults.
 
     Returns:
         2D coordinates of recommended tile to fire at.
 
     """
-    hit = find_hit_squares(enemy_array)
-    if hit is not None:
-        return infer_next_hit(enemy_array, hit, board_size)
-
-    else:
-        return find_optimal_spaced_tile(enemy_array, board_size, max_size)
-
-
-def find_optimal_spaced_tile(enemy_array, board_size, max_size):
+    if clusters is None:
+        clusters = HitClusters.from_array(enemy_array)
+    target = infer_next_hit(enemy_array, clusters, board_size)
+    if target is not None:
+        return target
+    return find_optimal_spaced_tile(
+        enemy_array, board_size, max_size, rng, index, params
+    )
+
+
+def find_optimal_spaced_tile(
+    enemy_array, board_size, max_size, rng=None, index=None, params=None
+):
     """
     Finds potential tile to fire at in the absence of hit squares. It tries to find
     maximum spacing between to tiles to find the biggest alive boat. It also has some
@@ -95,19 +162,59 @@ def find_optimal_spaced_tile(enemy_array, board_size, max_size):
         enemy_array: a numpy array representing a board.
         board_size: size of the board, assumed to be square.
         max_size: size of biggest boat not sunk in enemy array.
+        rng: random generator of the AI. If None, a generator seeded from OS entropy.
+        index: unexplored tiles of the enemy board, see fool_AI.
+        params: heuristics of the AI, see HardParams. If None, the defaults.
 
     Returns:
         2D coordinates of recommended tile to fire at.
     """
-    target = None
+    if rng is None:
+        rng = np.random.default_rng()
+    if params is None:
+        params = HardParams()
+
+    # With edge bias, a first scan only looks at tiles on the border. No random draw
+    # without it, so that games of the default AI are unchanged
+    edges_first = params.edge_bias > 0 and rng.random() < params.edge_bias
+    for edges_only in (True, False) if edges_first else (False,):
+        target = scan_spaced_tile(
+            enemy_array, board_size, max_size, rng, params, edges_only
+        )
+        if target is not None:
+            return target
+
+    # No spacing condition can be met, e.g. if max_size is 0
+    return fool_AI(enemy_array, board_size, rng, index)
+
+
+def scan_spaced_tile(
+    enemy_array: np.array,
+    board_size: int,
+    max_size: int,
+    rng: np.random.Generator,
+    params: HardParams,
+    edges_only: bool = False,
+) -> Tuple[int]:
+    """
+    Scans unexplored tiles in random order for the spacing conditions of
+    find_optimal_spaced_tile, only tiles on the border if edges_only.
+
+    Returns:
+        2D coordinates of the first tile meeting a condition, None if none does.
+    """
+    border = (0, board_size - 1)
+    relaxed = max_size - params.border_relax
 
     # Optimize spacing to find biggest boat not sunk, decrease if not possible
     for space in range(max_size, 0, -1):
-        for i in np.random.permutation(board_size):
-            for j in np.random.permutation(board_size):
+        for i in rng.permutation(board_size):
+            for j in rng.permutation(board_size):
 
                 if enemy_array[(i, j)] != "x":
                     continue
+                if edges_only and i not in border and j not in border:
+                    continue
 
                 # Get spacing to unexplored tile in all directions
                 up = get_spacing((i, j), np.array([-1, 0]), enemy_array, board_size)
@@ -115,20 +222,135 @@ def find_optimal_spaced_tile(enemy_array, board_size, max_size):
                 right = get_spacing((i, j), np.array([0, 1]), enemy_array, board_size)
                 left = get_spacing((i, j), np.array([0, -1]), enemy_array, board_size)
 
-                # Primary condition, biggest boat size // 2 unexplored in all directions
-                if all(x >= space // 2 for x in [up, down, right, left]):
+                # Primary condition, biggest boat size // divisor unexplored in all
+                # directions
+                threshold = space // params.space_divisor
+                if all(x >= threshold for x in [up, down, right, left]):
                     return i, j
 
                 # Secondary condition, relax first condition if close to a border
-                if i in (0, board_size - 1):  # Top or bottom row
-                    if right >= max_size - 1 and left >= max_size - 1:
+                if i in border:  # Top or bottom row
+                    if right >= relaxed and left >= relaxed:
                         return (i, j)
 
-                if j in (0, board_size - 1):  # Left- or right-most column
-                    if up >= max_size - 1 and down >= max_size - 1:
+                if j in border:  # Left- or right-most column
+                    if up >= relaxed and down >= relaxed:
                         return (i, j)
-        if target:
-            return target
+    return None
+
+
+def parity_AI(
+    enemy_array: np.array,
+    board_size: int,
+    tracker: "FleetTracker",
+    rng: np.random.Generator = None,
+    clusters: "HitClusters" = None,
+) -> Tuple[int]:
+    """
+    AI that follows the lead on hit boats until they are sunk. If no hit boats it
+    hunts on a lattice of tiles spaced by the smallest boat not sunk, which every
+    boat left must cross, at the tile most boat positions go through.
+
+    Args:
+        enemy_array: a numpy array representing a board, where:
+            'x' are unexplored tiles
+            'w' are explored water tiles
+            'h' are explored hit tiles
+            's' are explored sunk tiles
+        board_size: size of the board, assumed to be square.
+        tracker: boats of the enemy not sunk, see FleetTracker.
+        rng: random generator of the AI, used to break ties. If None, a generator
+            seeded from OS entropy.
+        clusters: hit tiles of the enemy board, kept up to date by the caller after
+            every shot. If None, they are built from enemy_array.
+
+    Returns:
+        2D coordinates of recommended tile to fire at.
+    """
+    if clusters is None:
+        clusters = HitClusters.from_array(enemy_array)
+    target = infer_next_hit(enemy_array, clusters, board_size)
+    if target is not None:
+        return target
+    if rng is None:
+        rng = np.random.default_rng()
+
+    unexplored = enemy_array == "x"
+    candidates = unexplored & get_parity_mask(unexplored, tracker.min_size())
+    scores = get_position_counts(unexplored, tracker.sizes())
+    scores = np.where(candidates, scores + rng.random(scores.shape), -1.0)
+    return top_k_tiles(scores, 1)[0]
+
+
+def get_parity_mask(unexplored: np.array, spacing: int) -> np.array:
+    """
+    Returns the lattice of tiles (i + j) % spacing == offset, which any boat of at
+    least spacing tiles crosses. Of all offsets, the one with the fewest unexplored
+    tiles is kept: the lattice already fired at the most, often the one of previous
+    turns.
+    """
+    rows, cols = np.indices(unexplored.shape)
+    classes = (rows + cols) % max(spacing, 1)
+    counts = np.bincount(classes[unexplored], minlength=max(spacing, 1))
+    counts[counts == 0] = unexplored.size  # Lattices fully explored
+    return classes == np.argmin(counts)
+
+
+def get_position_counts(unexplored: np.array, sizes: List[int]) -> np.array:
+    """
+    Counts, for every tile, the positions of boats of the given sizes that go
+    through it and only cover unexplored tiles, from the spacing grids.
+    """
+    up, down, left, right = get_spacing_grids(unexplored)
+    counts = np.zeros(unexplored.shape)
+    for size in sizes:
+        for before, after in ((up, down), (left, right)):
+            # Positions start from size - 1 tiles before the tile to the tile itself
+            n = np.minimum(before, size - 1) + np.minimum(after, size - 1) - size + 2
+            counts += np.maximum(n, 0)
+    return counts * unexplored
+
+
+class FleetTracker:
+    """
+    What an AI knows of the boats of the enemy: the whole fleet at the start of the
+    game, then the boats not sunk yet, as sunk boats are observed.
+    """
+
+    def __init__(self, boats: dict):
+        """
+        Instantiates the tracker of a full fleet.
+
+        Args:
+            boats: dictionary where keys are boat size and values # of boats.
+        """
+        self.alive = dict(boats)
+
+    @classmethod
+    def from_sizes(cls, sizes: List[int]) -> "FleetTracker":
+        """Instantiates the tracker of a fleet given as the size of every boat."""
+        tracker = cls({})
+        for size in sizes:
+            tracker.alive[int(size)] = tracker.alive.get(int(size), 0) + 1
+        return tracker
+
+    def sink(self, size: int):
+        """Removes a boat of the given size, observed as sunk."""
+        self.alive[size] -= 1
+        if self.alive[size] == 0:
+            del self.alive[size]
+
+    def sizes(self) -> List[int]:
+        """Returns the sizes of boats not sunk, one per boat."""
+        return [size for size, n_boats in self.alive.items() for _ in range(n_boats)]
+
+    def max_size(self) -> int:
+        """Returns the size of the biggest boat not sunk, 0 if all are sunk."""
+        return max(self.alive, default=0)
+
+    def min_size(self) -> int:
+        """Returns the size of the smallest boat not sunk, 0 if all are sunk."""
+        return min(self.alive, default=0)
 
 
 def get_spacing(
@@ -143,75 +365,277 @@ def get_spacing(
     return x_count
 
 
-def find_hit_squares(array: np.array) -> np.array:
-    """Returns array of size equal to board size, marking hit squares."""
-    if np.argwhere(array == "h").size == 0:
-        return None
-    return np.argwhere(array == "h")
+class AnytimeAI:
+    """
+    AI whose choice of target is refined step by step, so that it can be stopped at a
+    deadline or cancelled at any time and still return the best target found so far.
 
+    The first step already yields a valid target (a random unexplored tile), so the
+    AI always has an answer. Later steps follow the lead on hit boats and, for the
+    hard AI, scan unexplored tiles one at a time for the best spacing, as in
+    find_optimal_spaced_tile.
+    """
 
-def infer_next_hit(enemy_array: np.array, hit: bool, board_size: int) -> Tuple[int]:
+    AI_MODES = ("fool", "standard", "hard")
+
+    def __init__(
+        self,
+        AI_mode: str,
+        enemy_array: np.array,
+        board_size: int,
+        max_size: int = 0,
+        rng: np.random.Generator = None,
+        clusters: "HitClusters" = None,
+        index: CellIndex = None,
+    ):
+        """
+        Instantiates the search of a single target. Arguments are those of fool_AI,
+        standard_AI and hard_AI.
+
+        Raises:
+            ValueError: if AI_mode is not one of AI_MODES.
+        """
+        if AI_mode not in self.AI_MODES:
+            raise ValueError(
+                f"Unknown AI mode {AI_mode}, expected one of {self.AI_MODES}"
+            )
+        self.AI_mode = AI_mode
+        self.enemy_array = enemy_array
+        self.board_size = board_size
+        self.max_size = max_size
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.clusters = clusters
+        self.index = index
+        self.best = None  # Best target found so far
+        self.steps = 0
+        self.is_done = False
+        self.cancelled = threading.Event()
+        self.search = self.refine()
+
+    def refine(self) -> Iterator[Tuple[int]]:
+        """Generator of better and better targets, one unit of work per step."""
+        yield fool_AI(self.enemy_array, self.board_size, self.rng, self.index)
+        if self.AI_mode == "fool":
+            return
+
+        if self.clusters is None:
+            self.clusters = HitClusters.from_array(self.enemy_array)
+        target = infer_next_hit(self.enemy_array, self.clusters, self.board_size)
+        if target is not None:
+            yield target
+            return
+        if self.AI_mode == "standard":
+            return
+
+        # Levels of find_optimal_spaced_tile: the biggest boat size (space) for which
+        # a tile meets the primary condition, or max_size if it meets the secondary one
+        best_level = 0
+        directions = [(-1, 0), (1, 0), (0, 1), (0, -1)]
+        for i in self.rng.permutation(self.board_size):
+            for j in self.rng.permutation(self.board_size):
+                if self.enemy_array[(i, j)] != "x":
+                    continue
+                up, down, right, left = (
+                    get_spacing((i, j), np.array(d), self.enemy_array, self.board_size)
+                    for d in directions
+                )
+                level = min(self.max_size, 2 * min(up, down, right, left) + 1)
+                if (
+                    i in (0, self.board_size - 1)
+                    and min(right, left) >= self.max_size - 1
+                ):
+                    level = self.max_size
+                if j in (0, self.board_size - 1) and min(up, down) >= self.max_size - 1:
+                    level = self.max_size
+
+                if level > best_level:
+                    best_level = level
+                    yield int(i), int(j)
+                    if level >= self.max_size:  # Cannot be improved
+                        return
+                else:
+                    yield None  # Step without improvement
+
+    def step(self) -> bool:
+        """Does one unit of work. Returns False once the search is over."""
+        if self.is_done or self.cancelled.is_set():
+            return False
+        try:
+            target = next(self.search)
+        except StopIteration:
+            self.is_done = True
+            return False
+        if target is not None:
+            self.best = target
+        self.steps += 1
+        return True
+
+    def choose(self, deadline: float = None) -> Tuple[int]:
+        """
+        Refines the target until the search is over, the deadline is hit or the
+        search is cancelled, whichever comes first. The first step is always done.
+
+        Args:
+            deadline: time.perf_counter() value at which to stop. None for no deadline.
+
+        Returns:
+            2D coordinates of the best tile to fire at found so far.
+        """
+        if self.best is None:  # Always valid, even if cancelled
+            self.best = next(self.search)
+            self.steps += 1
+        while deadline is None or time.perf_counter() < deadline:
+            if not self.step():
+                break
+        return self.best
+
+    def cancel(self):
+        """Stops the search, e.g. from another thread. choose returns at once."""
+        self.cancelled.set()
+
+
+class HitClusters:
     """
-    Infers positioning of a boat (vertical/horizontal), and fires at an adjacent
-    tile where the gap to an adjacent, unexplored tile is the biggest.
+    Hit tiles of boats not sunk yet, grouped into clusters of adjacent tiles with a
+    union-find structure. It is updated after every shot instead of being inferred
+    from the whole board, and each cluster keeps its own tiles and bounding box, from
+    which the orientation of its boat is inferred.
     """
-    targets = {}
-    for delta in get_deltas_to_targets(hit):
-        target, unexplored_gap = get_unexplored_gap(enemy_array, hit, delta, board_size)
-        targets[unexplored_gap] = target
-    return targets[max(targets.keys())]
 
+    def __init__(self):
+        """Instantiates an empty set of clusters."""
+        self.parent = {}  # Tile to parent tile, roots are their own parent
+        self.tiles = {}  # Root to tiles of its cluster
+        self.bbox = {}  # Root to (min row, min column, max row, max column)
+
+    @classmethod
+    def from_array(cls, enemy_array: np.array) -> "HitClusters":
+        """Builds clusters from all hit tiles of a board."""
+        clusters = cls()
+        for x, y in np.argwhere(enemy_array == "h"):
+            clusters.add_hit((int(x), int(y)))
+        return clusters
+
+    def find(self, tile: Tuple[int]) -> Tuple[int]:
+        """Returns the root of the cluster of a tile, compressing the path to it."""
+        root = tile
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[tile] != root:
+            self.parent[tile], tile = root, self.parent[tile]
+        return root
+
+    def add_hit(self, tile: Tuple[int]):
+        """Adds a hit tile, merging it with the clusters of adjacent hit tiles."""
+        if tile in self.parent:
+            return
+        x, y = tile
+        self.parent[tile] = tile
+        self.tiles[tile] = [tile]
+        self.bbox[tile] = (x, y, x, y)
+        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+            if (x + dx, y + dy) in self.parent:
+                self.union(tile, (x + dx, y + dy))
+
+    def union(self, tile_a: Tuple[int], tile_b: Tuple[int]):
+        """Merges the clusters of two tiles, the smaller one into the bigger one."""
+        root_a, root_b = self.find(tile_a), self.find(tile_b)
+        if root_a == root_b:
+            return
+        if len(self.tiles[root_a]) < len(self.tiles[root_b]):
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.tiles[root_a].extend(self.tiles.pop(root_b))
+        box_a, box_b = self.bbox[root_a], self.bbox.pop(root_b)
+        self.bbox[root_a] = (
+            min(box_a[0], box_b[0]),
+            min(box_a[1], box_b[1]),
+            max(box_a[2], box_b[2]),
+            max(box_a[3], box_b[3]),
+        )
+
+    def remove_sunk(self, tiles: List[Tuple[int]]):
+        """
+        Removes the tiles of a sunk boat. Clusters they belonged to are built again
+        from their remaining tiles, which only happens when boats touch each other.
+        """
+        sunk = {tile for tile in tiles if tile in self.parent}
+        remaining = []
+        for root in {self.find(tile) for tile in sunk}:
+            del self.bbox[root]
+            for tile in self.tiles.pop(root):
+                del self.parent[tile]
+                if tile not in sunk:
+                    remaining.append(tile)
+        for tile in remaining:
+            self.add_hit(tile)
+
+    def get_roots(self) -> List[Tuple[int]]:
+        """Returns the root of every cluster, biggest cluster first."""
+        return sorted(self.tiles, key=lambda root: -len(self.tiles[root]))
+
+
+def infer_next_hit(
+    enemy_array: np.array, clusters: HitClusters, board_size: int
+) -> Tuple[int]:
+    """
+    Follows the lead of hit boats, one cluster of hit tiles at a time, biggest first.
 
-def get_deltas_to_targets(hit: np.array) -> List[Tuple[int]]:
+    Returns:
+        2D coordinates of recommended tile to fire at, None if no cluster has an
+        unexplored tile to follow.
     """
-    Returns a list of potential targets to fire at. If a single tile is hit, it returns
-    all adjacent tiles. If more than one tile is hit, it infers whether the boat is
-    placed horizontally or vertically.
+    for root in clusters.get_roots():
+        target = infer_cluster_target(enemy_array, clusters, root, board_size)
+        if target is not None:
+            return target
+    return None
 
-    Args:
-        hit: array of size equal to board size, marking hit squares.
 
-    Returns:
-        Potential targets to fire at.
+def infer_cluster_target(
+    enemy_array: np.array, clusters: HitClusters, root: Tuple[int], board_size: int
+) -> Tuple[int]:
+    """
+    Infers positioning of the boat of a cluster (vertical/horizontal) from its
+    bounding box, and fires at the end of the cluster where the gap to an adjacent,
+    unexplored tile is the biggest. Work is proportional to the size of the cluster.
     """
-    if len(hit) == 1:
-        return [(1, 0), (-1, 0), (0, 1), (0, -1)]
-    else:
-        if hit[0][0] == hit[1][0]:  # Boat in vertical position
-            return [(0, 1), (0, -1)]
-        else:  # Boat in horizontal position
-            return [(1, 0), (-1, 0)]
+    top, left, bottom, right = clusters.bbox[root]
+    deltas = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+    if top == bottom and left == right:  # Single tile, any direction
+        ends = [(root, delta) for delta in deltas]
+    elif top == bottom:  # Tiles in a row
+        ends = [((top, right), (0, 1)), ((top, left), (0, -1))]
+    elif left == right:  # Tiles in a column
+        ends = [((bottom, left), (1, 0)), ((top, left), (-1, 0))]
+    else:  # Boats touching each other, try around every tile
+        ends = [(tile, delta) for tile in clusters.tiles[root] for delta in deltas]
+
+    best_target, best_gap = None, 0
+    for end, delta in ends:
+        target, unexplored_gap = get_unexplored_gap(enemy_array, end, delta, board_size)
+        if unexplored_gap > best_gap:
+            best_target, best_gap = target, unexplored_gap
+    return best_target
 
 
 def get_unexplored_gap(
-    enemy_array: np.array, hit: np.array, delta: Tuple[int], board_size: int
+    enemy_array: np.array, end: Tuple[int], delta: Tuple[int], board_size: int
 ) -> Tuple[Tuple[int], int]:
     """
-    Returns potentially coordinates to fire at, at its associated unexplored gap.
-    Unexplored gap is an int counting the number of tiles of the potential target to
-    the next unexplored tile. This is something worth maximizing.
+    Returns potentially coordinates to fire at, next to the end of a cluster of hit
+    tiles, and its associated unexplored gap. Unexplored gap is an int counting the
+    number of unexplored tiles in a row from the potential target. This is something
+    worth maximizing.
     """
+    target = (end[0] + delta[0], end[1] + delta[1])
+    curs = target
     unexplored_gap = 0
-    first_blank = True
-    target = None
-    curs = hit[0].copy()  # Put a cursor arbitrarily on first hit square
-
-    while is_on_board(curs, board_size):  # Ensure staying within board boundaries
-        # Update target based on first position of curs that is a potential blank
-        tile = enemy_array[curs[0]][curs[1]]
-
-        if enemy_array[curs[0]][curs[1]] == "x":  # Unexplored tile
-            if first_blank:
-                target = curs.copy()
-                first_blank = False
-            unexplored_gap += 1
-
-        elif tile in ("w", "s"):  # Already explored, either water or sunk
-            return target, unexplored_gap
-
-        curs[0] += delta[0]
-        curs[1] += delta[1]
-
+    while is_on_board(curs, board_size) and enemy_array[curs] == "x":
+        unexplored_gap += 1
+        curs = (curs[0] + delta[0], curs[1] + delta[1])
+    if unexplored_gap == 0:
+        return None, 0
     return target, unexplored_gap
 
 
@@ -220,31 +644,229 @@ def is_on_board(coord: Tuple[int], board_size: int) -> bool:
     return coord[0] in range(0, board_size) and coord[1] in range(0, board_size)
 
 
-def board_to_array(board: PyQt5.QtWidgets.QGridLayout, board_size: int) -> np.array:
+def area_AI(
+    enemy_array: np.array,
+    board_size: int,
+    shape: Tuple[int],
+    rng: np.random.Generator = None,
+) -> Tuple[Tuple[int], float]:
     """
-    Transforms a GUI board into a numpy array.
+    AI for area shots (superpowers). Scores every possible center of the area at once
+    and picks the best one. Unexplored tiles next to hit tiles weigh more, so that
+    damaged boats are finished first.
 
     Args:
-        board: pyqt grid layout representing the GUI battleship board.
-        board_size: size of the board, assumed to be square.
-
-    Returns:
-        Array equivalent to the GUI board, where:
+        enemy_array: a numpy array representing a board, where:
             'x' are unexplored tiles
             'w' are explored water tiles
             'h' are explored hit tiles
             's' are explored sunk tiles
+        board_size: size of the board, assumed to be square.
+        shape: number of rows and columns covered by the area, centered on target.
+        rng: random generator of the AI, used to break ties. If None, a generator
+            seeded from OS entropy.
+
+    Returns:
+        2D coordinates of recommended tile to fire at, and the number of unexplored
+        tiles the area would cover.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    unexplored = enemy_array == "x"
+    near_hit = np.zeros_like(unexplored)
+    hit = enemy_array == "h"
+    near_hit[1:, :] |= hit[:-1, :]
+    near_hit[:-1, :] |= hit[1:, :]
+    near_hit[:, 1:] |= hit[:, :-1]
+    near_hit[:, :-1] |= hit[:, 1:]
+    weights = unexplored + 4.0 * (near_hit & unexplored)
+
+    scores = get_area_sums(weights, shape)
+    scores += 0.1 * rng.random(scores.shape)  # Break ties at random
+    target = np.unravel_index(np.argmax(scores), scores.shape)
+    coverage = get_area_sums(unexplored.astype(float), shape)[target]
+    return (int(target[0]), int(target[1])), float(coverage)
+
+
+def get_area_sums(weights: np.array, shape: Tuple[int]) -> np.array:
+    """
+    Sums weights over an area of given shape centered on every tile of the board,
+    clipped to the board, using an integral image.
+    """
+    height, width = shape
+    top, left = height // 2, width // 2
+    padded = np.pad(
+        weights, ((top + 1, height - top - 1), (left + 1, width - left - 1))
+    )
+    integral = padded.cumsum(axis=0).cumsum(axis=1)
+    n_rows, n_cols = weights.shape
+    return (
+        integral[height : height + n_rows, width : width + n_cols]
+        - integral[:n_rows, width : width + n_cols]
+        - integral[height : height + n_rows, :n_cols]
+        + integral[:n_rows, :n_cols]
+    )
+
+
+def fool_salvo_AI(
+    enemy_array: np.array, board_size: int, k: int, rng: np.random.Generator = None
+) -> List[Tuple[int]]:
+    """Salvo version of fool_AI, fires k shots at random unexplored tiles."""
+    if rng is None:
+        rng = np.random.default_rng()
+    scores = np.where(enemy_array == "x", rng.random(enemy_array.shape), -1.0)
+    return top_k_tiles(scores, k)
+
+
+def standard_salvo_AI(
+    enemy_array: np.array, board_size: int, k: int, rng: np.random.Generator = None
+) -> List[Tuple[int]]:
+    """
+    Salvo version of standard_AI. Tiles that follow the lead on hit boats come first,
+    random unexplored tiles complete the salvo.
+
+    Args:
+        enemy_array: a numpy array representing a board, see standard_AI.
+        board_size: size of the board, assumed to be square.
+        k: number of shots in the salvo.
+        rng: random generator of the AI. If None, a generator seeded from OS entropy.
+
+    Returns:
+        2D coordinates of up to k distinct tiles to fire at, best first.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    scores = get_lead_scores(enemy_array) + rng.random(enemy_array.shape)
+    scores[enemy_array != "x"] = -1.0
+    return top_k_tiles(scores, k)
+
+
+def hard_salvo_AI(
+    enemy_array: np.array,
+    board_size: int,
+    k: int,
+    max_size: int,
+    rng: np.random.Generator = None,
+) -> List[Tuple[int]]:
+    """
+    Salvo version of hard_AI. Tiles that follow the lead on hit boats come first,
+    tiles with the biggest spacing to explored tiles complete the salvo.
+
+    Args:
+        enemy_array: a numpy array representing a board, see hard_AI.
+        board_size: size of the board, assumed to be square.
+        k: number of shots in the salvo.
+        max_size: size of biggest boat not sunk in enemy array.
+        rng: random generator of the AI. If None, a generator seeded from OS entropy.
+
+    Returns:
+        2D coordinates of up to k distinct tiles to fire at, best first.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    up, down, left, right = get_spacing_grids(enemy_array == "x")
+
+    # Spacing in all directions, relaxed to the row or column on the borders as in
+    # find_optimal_spaced_tile, and capped by the size of the biggest boat
+    spacing = np.minimum(np.minimum(up, down), np.minimum(left, right))
+    border = np.zeros(enemy_array.shape, dtype=bool)
+    border[[0, -1], :] = True
+    spacing[border] = np.maximum(spacing, np.minimum(left, right))[border]
+    border[:] = False
+    border[:, [0, -1]] = True
+    spacing[border] = np.maximum(spacing, np.minimum(up, down))[border]
+    spacing = np.minimum(spacing, max_size - 1) / max(max_size, 1)
+
+    scores = get_lead_scores(enemy_array) + spacing + 0.5 * rng.random(spacing.shape)
+    scores[enemy_array != "x"] = -1.0
+    return top_k_tiles(scores, k)
+
+
+def parity_salvo_AI(
+    enemy_array: np.array,
+    board_size: int,
+    k: int,
+    tracker: FleetTracker,
+    rng: np.random.Generator = None,
+) -> List[Tuple[int]]:
+    """
+    Salvo version of parity_AI. Tiles that follow the lead on hit boats come first,
+    tiles of the lattice most boat positions go through complete the salvo.
+
+    Args:
+        enemy_array: a numpy array representing a board, see parity_AI.
+        board_size: size of the board, assumed to be square.
+        k: number of shots in the salvo.
+        tracker: boats of the enemy not sunk, see FleetTracker.
+        rng: random generator of the AI. If None, a generator seeded from OS entropy.
+
+    Returns:
+        2D coordinates of up to k distinct tiles to fire at, best first.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    unexplored = enemy_array == "x"
+    counts = get_position_counts(unexplored, tracker.sizes())
+    lattice = get_parity_mask(unexplored, tracker.min_size())
+    hunt = lattice * counts / max(counts.max(), 1)
+
+    scores = get_lead_scores(enemy_array) + hunt + 0.1 * rng.random(hunt.shape)
+    scores[~unexplored] = -1.0
+    return top_k_tiles(scores, k)
+
+
+def get_lead_scores(enemy_array: np.array) -> np.array:
+    """
+    Scores unexplored tiles that follow the lead on hit boats: 2 if adjacent to a hit
+    tile, 4 if also in line with two hit tiles (orientation of the boat known).
+    """
+    hit = enemy_array == "h"
+    padded = np.pad(hit, 2)
+    n_rows, n_cols = hit.shape
+
+    def shifted(dx, dy):
+        return padded[2 + dx : 2 + dx + n_rows, 2 + dy : 2 + dy + n_cols]
+
+    adjacent = shifted(1, 0) | shifted(-1, 0) | shifted(0, 1) | shifted(0, -1)
+    in_line = (
+        (shifted(1, 0) & shifted(2, 0))
+        | (shifted(-1, 0) & shifted(-2, 0))
+        | (shifted(0, 1) & shifted(0, 2))
+        | (shifted(0, -1) & shifted(0, -2))
+    )
+    return 2.0 * adjacent + 2.0 * in_line
+
+
+def get_spacing_grids(unexplored: np.array) -> Tuple[np.array]:
+    """
+    Computes, for every tile, the number of consecutive unexplored tiles up, down,
+    left and right of it. Vectorized equivalent of get_spacing for all tiles.
+    """
+    n_rows, n_cols = unexplored.shape
+    up = np.zeros(unexplored.shape, dtype=int)
+    down = np.zeros(unexplored.shape, dtype=int)
+    left = np.zeros(unexplored.shape, dtype=int)
+    right = np.zeros(unexplored.shape, dtype=int)
+    for i in range(1, n_rows):
+        up[i] = np.where(unexplored[i - 1], up[i - 1] + 1, 0)
+        down[-i - 1] = np.where(unexplored[-i], down[-i] + 1, 0)
+    for j in range(1, n_cols):
+        left[:, j] = np.where(unexplored[:, j - 1], left[:, j - 1] + 1, 0)
+        right[:, -j - 1] = np.where(unexplored[:, -j], right[:, -j] + 1, 0)
+    return up, down, left, right
+
+
+def top_k_tiles(scores: np.array, k: int) -> List[Tuple[int]]:
+    """
+    Selects the k tiles with the highest score in a single partial sort, ignoring
+    tiles with a negative score.
     """
-    array = np.empty((board_size, board_size), dtype="str")
-    for i in range(board_size):
-        for j in range(board_size):
-            sq = board.itemAtPosition(i, j).widget()
-            if not sq.is_hit:
-                array[i, j] = "x"
-            elif not sq.has_boat:
-                array[i, j] = "w"
-            elif not sq.is_sunk:
-                array[i, j] = "h"
-            else:
-                array[i, j] = "s"
-    return array
+    flat = scores.ravel()
+    k = min(k, int((flat >= 0).sum()))
+    if k == 0:
+        return []
+    best = np.argpartition(-flat, k - 1)[:k]
+    best = best[np.argsort(-flat[best])]
+    rows, cols = np.unravel_index(best, scores.shape)
+    return [(int(i), int(j)) for i, j in zip(rows, cols)]
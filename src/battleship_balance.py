@@ -0,0 +1,137 @@
+"""
+Calibration of superpowers for a balanced game.
+
+Sweeps superpower parameters (kind, size, charges) and, for each setting, simulates
+thousands of games between a player with the superpower and a player without it. The
+setting is balanced when the player with the superpower wins as often as targeted,
+e.g. a standard AI with a nuke winning half of its games against a hard AI.
+
+Players take turns to fire first, to cancel out the first-mover advantage.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+import itertools
+import numpy as np
+
+import battleship_sim
+from battleship_superpowers import Superpower
+
+
+def evaluate_power(
+    pool: ProcessPoolExecutor,
+    power: Superpower,
+    AI_modes: Tuple[str],
+    board_size: int,
+    boats: Dict,
+    seed: int,
+    n_games: int,
+    chunk_size: int = 50,
+) -> Dict:
+    """
+    Simulates games between a player with a superpower and a player without it.
+
+    Args:
+        pool: process pool running the games.
+        power: superpower of the first player in AI_modes.
+        AI_modes: AI mode of the player with the superpower, and of the other player.
+        board_size: size of the board, assumed to be square.
+        boats: dictionary where keys are boat size and values # of boats.
+        seed: master seed, the same for all settings so they face the same boards.
+        n_games: number of games to simulate.
+        chunk_size: number of games sent to a worker at once.
+
+    Returns:
+        Win rate and average number of shots of the player with the superpower.
+    """
+    futures = []
+    for start in range(0, n_games, chunk_size):
+        indices = range(start, min(start + chunk_size, n_games))
+        # Even games: player with superpower fires first. Odd games: it fires second
+        tasks = [
+            (0, AI_modes, [i for i in indices if i % 2 == 0], (power, None)),
+            (1, AI_modes[::-1], [i for i in indices if i % 2 == 1], (None, power)),
+        ]
+        for player, modes, game_indices, powers in tasks:
+            future = pool.submit(
+                battleship_sim.play_games,
+                modes,
+                board_size,
+                boats,
+                seed,
+                game_indices,
+                powers,
+            )
+            futures.append((player, future))
+
+    wins, shots = [], []
+    for player, future in futures:
+        for result in future.result():
+            wins.append(result["winner"] == player)
+            shots.append(result["shots"][player])
+    return {"win_rate": float(np.mean(wins)), "shots": float(np.mean(shots))}
+
+
+def sweep_powers(
+    kinds: List[str],
+    sizes: List[int],
+    charges: List[int],
+    AI_modes: Tuple[str],
+    board_size: int,
+    boats: Dict,
+    seed: int,
+    n_games: int,
+    target_win_rate: float = 0.5,
+    max_workers: int = None,
+) -> List[Dict]:
+    """
+    Evaluates every combination of superpower parameters, see evaluate_power.
+
+    Returns:
+        One result per setting, most balanced first.
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for kind, size, n_charges in itertools.product(kinds, sizes, charges):
+            power = Superpower(kind, size, n_charges)
+            result = evaluate_power(
+                pool, power, AI_modes, board_size, boats, seed, n_games
+            )
+            result["power"] = power
+            result["gap"] = abs(result["win_rate"] - target_win_rate)
+            results.append(result)
+    return sorted(results, key=lambda result: result["gap"])
+
+
+if __name__ == "__main__":
+    boats = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
+    board_size = 10
+    AI_modes = ("standard", "hard")  # With superpower, without superpower
+    seed = 1
+    n_games = 2000  # Per setting
+    target_win_rate = 0.5
+
+    kinds = ["nuke", "burst_h", "burst_v"]
+    sizes = [2, 3, 4, 5]
+    charges = [1, 2, 3]
+
+    results = sweep_powers(
+        kinds,
+        sizes,
+        charges,
+        AI_modes,
+        board_size,
+        boats,
+        seed,
+        n_games,
+        target_win_rate,
+    )
+
+    print(f"{AI_modes[0]} AI with superpower vs {AI_modes[1]} AI, {n_games} games")
+    print(f"{'kind':<10}{'size':>6}{'charges':>9}{'win rate':>10}{'shots':>8}")
+    for result in results:
+        power = result["power"]
+        print(
+            f"{power.kind:<10}{power.size:>6}{power.charges:>9}"
+            f"{result['win_rate']:>10.3f}{result['shots']:>8.1f}"
+        )
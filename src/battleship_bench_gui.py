@@ -0,0 +1,230 @@
+"""
+Benchmark of the cost of the GUI of battleship_ui per move, in AI vs AI games.
+
+Games run in the real window and game thread of battleship_ui, with delay_AI = 0, so
+that the GUI is the bottleneck. Measured per move (shot fired):
+    - paint: Square.paintEvent calls and time, 2 * board_size ** 2 squares in all.
+    - turn switch: time in reverse_turns, which walks every square of both boards.
+    - board_to_array: time reading a board into an array, once per AI turn.
+    - event loop latency: lag of a 1 ms timer of the GUI thread, i.e. how long a
+      click or a repaint would wait.
+
+Qt runs on its offscreen platform unless QT_QPA_PLATFORM says otherwise, so the
+benchmark runs on machines without a display, e.g. before a release.
+"""
+
+# pylint: disable=no-name-in-module
+# pylint: disable=wrong-import-position
+from typing import Callable, Dict, List, Tuple
+import contextlib
+import functools
+import os
+import threading
+import time
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QEventLoop, Qt, QTimer
+
+import battleship_qt
+import battleship_ui
+
+
+class CallProbe:
+    """Number of calls and time spent in a function, from any thread."""
+
+    def __init__(self):
+        """Instantiates a probe without calls."""
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.time = 0.0
+
+    def wrap(self, function: Callable) -> Callable:
+        """Returns function, timed by the probe."""
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self.lock:
+                    self.calls += 1
+                    self.time += elapsed
+
+        return timed
+
+
+@contextlib.contextmanager
+def instrument(owner, name: str, probe: CallProbe):
+    """Times calls to the attribute name of owner (class or module) while active."""
+    function = getattr(owner, name)
+    setattr(owner, name, probe.wrap(function))
+    try:
+        yield probe
+    finally:
+        setattr(owner, name, function)
+
+
+class LatencyProbe:
+    """Lag of a periodic timer of the GUI thread behind its schedule."""
+
+    def __init__(self, interval_ms: int = 1):
+        """Instantiates the probe, to be started with start()."""
+        self.interval = interval_ms / 1000
+        self.lags = []
+        self.last = None
+        self.timer = QTimer()
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.tick)
+
+    def start(self):
+        """Starts measuring."""
+        self.last = time.perf_counter()
+        self.timer.start()
+
+    def stop(self):
+        """Stops measuring."""
+        self.timer.stop()
+
+    def tick(self):
+        """Records the lag of a timeout behind the previous one plus the interval."""
+        now = time.perf_counter()
+        self.lags.append(max(now - self.last - self.interval, 0.0))
+        self.last = now
+
+
+def play_game(
+    board_size: int,
+    boats: Dict,
+    AI_modes: Tuple[str],
+    seed: int,
+    timeout: float = 600.0,
+) -> Dict:
+    """
+    Plays an AI vs AI game in the GUI of battleship_ui and measures its cost.
+
+    Args:
+        board_size: size of the board, assumed to be square.
+        boats: dictionary where keys are boat size and values # of boats.
+        AI_modes: AI mode of each player.
+        seed: seed of the game.
+        timeout: seconds after which the game is cancelled.
+
+    Returns:
+        Dictionary with the number of moves, the duration of the game in seconds, a
+        CallProbe for each of paint, turn_switch and board_to_array, and the event
+        loop lags in seconds.
+
+    Raises:
+        TimeoutError: if the game is not over within timeout.
+    """
+    battleship_ui.board_size = board_size
+    battleship_ui.boats_dict = boats
+    battleship_ui.delay_AI = 0
+    battleship_ui.salvo = None
+    players = [
+        battleship_ui.Player(
+            name=f"AI {AI_mode} {i + 1}", nature="AI", AI_mode=AI_mode, to_play=i == 0
+        )
+        for i, AI_mode in enumerate(AI_modes)
+    ]
+    players[0].add_other_player(players[1])
+    players[1].add_other_player(players[0])
+    battleship_ui.players = players
+
+    moves = []
+    count_move = battleship_ui.events.subscribe(
+        "fire", lambda *args: moves.append(args)
+    )
+    latency = LatencyProbe()
+    with contextlib.ExitStack() as stack:
+        stack.callback(battleship_ui.events.unsubscribe, "fire", count_move)
+        paint = stack.enter_context(
+            instrument(battleship_ui.Square, "paintEvent", CallProbe())
+        )
+        turn_switch = stack.enter_context(
+            instrument(battleship_ui, "reverse_turns", CallProbe())
+        )
+        to_array = stack.enter_context(
+            instrument(battleship_qt, "board_to_array", CallProbe())
+        )
+
+        start = time.perf_counter()
+        window = battleship_ui.MainWindow(board_size, boats, players, seed)
+        latency.start()
+        loop = QEventLoop()
+
+        def check_over():
+            if window.runthread.isFinished() or time.perf_counter() - start > timeout:
+                loop.quit()
+
+        poll = QTimer()
+        poll.timeout.connect(check_over)
+        poll.start(10)
+        loop.exec_()
+        poll.stop()
+        QApplication.processEvents()  # Last repaints
+        duration = time.perf_counter() - start
+        latency.stop()
+
+        is_over = window.runthread.isFinished()
+        window.close()
+        window.runthread.wait()
+        window.deleteLater()
+        QApplication.processEvents()
+    if not is_over:
+        raise TimeoutError(f"Game on a board of {board_size} not over in {timeout} s")
+    return {
+        "moves": len(moves),
+        "duration": duration,
+        "paint": paint,
+        "turn_switch": turn_switch,
+        "board_to_array": to_array,
+        "lags": latency.lags,
+    }
+
+
+def run_benchmark(
+    board_sizes: List[int], boats: Dict, AI_modes: Tuple[str], seed: int, repeats: int
+):
+    """Prints the cost of the GUI per move for each board size, over repeats games."""
+    print(
+        f"{'size':>5}{'moves':>7}{'ms/move':>9}{'paints/move':>13}"
+        f"{'paint ms/move':>15}{'switch ms/move':>16}{'to_array ms':>13}"
+        f"{'lag ms':>8}{'max lag ms':>12}"
+    )
+    for board_size in board_sizes:
+        results = [
+            play_game(board_size, boats, AI_modes, seed + i) for i in range(repeats)
+        ]
+        moves = sum(result["moves"] for result in results)
+        duration = sum(result["duration"] for result in results)
+        paint_calls = sum(result["paint"].calls for result in results)
+        paint_time = sum(result["paint"].time for result in results)
+        switch_time = sum(result["turn_switch"].time for result in results)
+        to_array_calls = sum(result["board_to_array"].calls for result in results)
+        to_array_time = sum(result["board_to_array"].time for result in results)
+        lags = np.concatenate([result["lags"] for result in results])
+        print(
+            f"{board_size:>5}{moves / repeats:>7.0f}{duration / moves * 1000:>9.2f}"
+            f"{paint_calls / moves:>13.1f}{paint_time / moves * 1000:>15.3f}"
+            f"{switch_time / moves * 1000:>16.3f}"
+            f"{to_array_time / max(to_array_calls, 1) * 1000:>13.3f}"
+            f"{lags.mean() * 1000:>8.2f}{lags.max() * 1000:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    boats = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
+    board_sizes = [10, 15, 20]
+    AI_modes = ("parity", "parity")  # Fast AIs, so that the GUI dominates
+    seed = 1
+    repeats = 3  # Games per board size
+
+    app = QApplication([])
+    run_benchmark(board_sizes, boats, AI_modes, seed, repeats)
@@ -0,0 +1,92 @@
+"""
+Benchmark of the startup cost of battleship modules, as paid by every fresh worker
+process: import time and resident memory.
+
+Each import is measured in a new interpreter, so that modules already loaded by a
+previous measurement do not hide their cost.
+"""
+
+from typing import Dict, List
+import json
+import statistics
+import subprocess
+import sys
+
+# Runs in a fresh interpreter, prints import time (s) and max RSS (KB) as JSON
+PROBE = """
+import json, sys, time
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+def max_rss_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # Bytes on macOS
+
+rss_before = max_rss_kb()
+start = time.perf_counter()
+if {module!r}:
+    __import__({module!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"time": elapsed, "rss": max_rss_kb(), "rss_before": rss_before}}))
+"""
+
+
+def measure_import(module: str, repeats: int) -> Dict:
+    """
+    Measures the import of a module in fresh interpreters.
+
+    Args:
+        module: name of the module to import, empty string for a bare interpreter.
+        repeats: number of interpreters to launch.
+
+    Returns:
+        Median import time in seconds, and median max RSS in KB after the import.
+    """
+    times, rss = [], []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        result = json.loads(out.stdout)
+        times.append(result["time"])
+        rss.append(result["rss"])
+
+    rss = None if None in rss else statistics.median(rss)
+    return {"time": statistics.median(times), "rss": rss}
+
+
+def run_benchmark(modules: List[str], repeats: int):
+    """Prints import time and RSS of each module, relative to a bare interpreter."""
+    bare = measure_import("", repeats)
+    print(f"{'module':<24}{'import (ms)':>14}{'max RSS (MB)':>16}{'+RSS (MB)':>12}")
+    for module in modules:
+        result = measure_import(module, repeats)
+        if result["rss"] is None:
+            rss, extra = "n/a", "n/a"
+        else:
+            rss = f"{result['rss'] / 1024:.1f}"
+            extra = f"{(result['rss'] - bare['rss']) / 1024:.1f}"
+        print(f"{module:<24}{result['time'] * 1000:>14.1f}{rss:>16}{extra:>12}")
+
+
+if __name__ == "__main__":
+    repeats = 5  # Fresh interpreters per module, the median is reported
+
+    modules = [
+        "numpy",
+        "battleship_ai",
+        "battleship_engine",
+        "battleship_env",
+        "battleship_cli",
+        "PyQt5.QtWidgets",
+        "battleship_ui",
+    ]
+
+    run_benchmark(modules, repeats)
@@ -0,0 +1,181 @@
+"""
+Caching of AI decisions on recurring board states.
+
+In bulk simulations the same observed board states come up again and again, e.g. the
+empty board at the start of every game. States are identified by a Zobrist hash: the
+xor of a random 64-bit key per (tile, state of the tile), updated in O(1) per tile
+that changes. A bounded LRU cache then maps (AI mode, hash, remaining fleet) to the
+target chosen by the AI, so that recurring states are not computed again.
+
+Zobrist keys are drawn from a fixed seed, so hashes are the same in every process and
+caches built by different workers can be shared and merged.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Tuple
+import numpy as np
+
+from battleship_engine import SYMBOLS, UNEXPLORED
+
+ZOBRIST_SEED = 20191111  # Fixed, so that hashes agree across processes
+N_STATES = 4  # UNEXPLORED, WATER, HIT and SUNK, see battleship_engine
+
+
+def zobrist_keys(board_size: int) -> np.array:
+    """Returns the random key of every (row, column, state), the same every time."""
+    rng = np.random.default_rng(ZOBRIST_SEED)
+    return rng.integers(
+        0, 2**64, size=(board_size, board_size, N_STATES), dtype=np.uint64
+    )
+
+
+class ZobristHash:
+    """Hash of what the enemy knows about a board, updated tile by tile."""
+
+    def __init__(self, board_size: int):
+        """Instantiates the hash of a fully unexplored board."""
+        self.keys = zobrist_keys(board_size)
+        self.states = np.full((board_size, board_size), UNEXPLORED, dtype=np.int8)
+        self.value = int(np.bitwise_xor.reduce(self.keys[:, :, UNEXPLORED], axis=None))
+
+    @classmethod
+    def from_array(cls, enemy_array: np.array) -> "ZobristHash":
+        """Builds the hash of a board given as an array understood by battleship_ai."""
+        zobrist = cls(len(enemy_array))
+        for state, symbol in enumerate(SYMBOLS):
+            for x, y in np.argwhere(enemy_array == symbol):
+                zobrist.set((int(x), int(y)), state)
+        return zobrist
+
+    def set(self, coord: Tuple[int], state: int):
+        """Updates the hash after a tile changed to a new state, in O(1)."""
+        x, y = coord
+        old = self.states[x, y]
+        if old == state:
+            return
+        self.value ^= int(self.keys[x, y, old]) ^ int(self.keys[x, y, state])
+        self.states[x, y] = state
+
+
+class DecisionCache:
+    """
+    Bounded LRU cache of AI decisions, keyed by (AI mode, state hash, remaining
+    fleet). Hits and misses are counted.
+
+    To share a cache across worker processes, pass it as the read-only shared cache
+    of each worker's own cache: workers never write to it, and the new decisions of
+    every worker can be merged back into a single cache afterwards. Passed to a
+    process pool, the shared cache is pickled, so every worker reads its own copy.
+
+    Only deterministic decisions should be cached: a random decision cached once
+    would be replayed in every later game reaching the same state, see
+    battleship_sim.play_game.
+    """
+
+    def __init__(self, max_size: int = 100000, shared: "DecisionCache" = None):
+        """
+        Instantiates an empty cache.
+
+        Args:
+            max_size: max. number of decisions kept, least recently used are evicted.
+            shared: cache looked up on misses, never written to.
+        """
+        self.max_size = max_size
+        self.shared = shared
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(AI_mode: str, state_hash: int, fleet: np.array) -> Tuple:
+        """Returns the key of a decision, fleet being the sizes of boats not sunk."""
+        return AI_mode, state_hash, tuple(sorted(int(size) for size in fleet))
+
+    def get(self, key: Tuple) -> Tuple[int]:
+        """Returns the cached target for a key, None if not cached."""
+        target = self.entries.get(key)
+        if target is not None:
+            self.entries.move_to_end(key)
+        elif self.shared is not None:
+            target = self.shared.entries.get(key)
+
+        if target is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return target
+
+    def put(self, key: Tuple, target: Tuple[int]):
+        """Caches a target, evicting the least recently used one if full."""
+        self.entries[key] = target
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def merge(self, other: "DecisionCache"):
+        """Adds the decisions and counters of another cache, e.g. of a worker."""
+        for key, target in other.entries.items():
+            self.put(key, target)
+        self.hits += other.hits
+        self.misses += other.misses
+
+    def stats(self) -> Dict:
+        """Returns hits, misses, hit rate and number of decisions cached."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.entries),
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ProcessPoolExecutor
+    import time
+    import battleship_sim
+
+    boats = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
+    board_size = 10
+    AI_modes = ("learned", "learned")  # Deterministic, so all decisions are cached
+    seed = 1
+    n_games = 1000
+    n_workers = 4
+
+    start = time.perf_counter()
+    battleship_sim.play_games(AI_modes, board_size, boats, seed, range(n_games))
+    print(f"No cache: {n_games / (time.perf_counter() - start):.0f} games per second")
+
+    # Warm up a cache in a single process, then share it read-only with workers
+    warm = DecisionCache()
+    start = time.perf_counter()
+    battleship_sim.play_games(
+        AI_modes, board_size, boats, seed, range(n_games), cache=warm
+    )
+    print(f"Cold cache: {n_games / (time.perf_counter() - start):.0f} games per second")
+    print(f"Cold cache: {warm.stats()}")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(n_workers) as pool:
+        futures = [
+            pool.submit(
+                battleship_sim.play_games_cached,
+                AI_modes,
+                board_size,
+                boats,
+                seed,
+                range(worker, n_games, n_workers),
+                warm,
+            )
+            for worker in range(n_workers)
+        ]
+        for future in futures:
+            warm.merge(future.result()[1])
+    elapsed = time.perf_counter() - start
+    print(
+        f"Shared cache, {n_workers} workers: {n_games / elapsed:.0f} games per second"
+    )
+    print(f"Shared cache: {warm.stats()}")
@@ -7,7 +7,6 @@ Created on Mon Nov 11 13:47:48 2019
 @author: Ignacio Paricio
 """
 
-
 # TODO:
 # Implementation:
 #   1 - Come up with better parallel runner
@@ -24,25 +23,43 @@ Created on Mon Nov 11 13:47:48 2019
 #   2 - Stats on AI battles
 #   3 - Calibrating superpowers for a balanced game
 
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, TextIO, Tuple
+import collections
+import itertools
+import time
 import unicodedata
-import random
+import numpy as np
+
+import battleship_events
+import battleship_layouts
+import battleship_rng
+import battleship_snapshot
+from battleship_engine import CellIndex
 
 
 class BattleshipBoard:
     """Implements a Battleship Board."""
 
-    def __init__(self, board_width: int, board_height: int, boats: Dict):
+    def __init__(
+        self,
+        board_width: int,
+        board_height: int,
+        boats: Dict,
+        rng: np.random.Generator = None,
+    ):
         """
         Instantiates the battleship board.
         Args:
             board_width: number of horizontal tiles.
             board_height: number of vertical tiles.
             boats: dictionary where keys are boat size and values # of boats.
+            rng: random generator used to place boats. If None, a generator seeded
+                from OS entropy.
         """
         self.board_width = board_width
         self.board_height = board_height
         self.boats = boats
+        self.rng = rng if rng is not None else np.random.default_rng()
         self.board_spacing = 3
 
         # Define symbols for own and enemy boards when using CLI
@@ -68,6 +85,13 @@ class BattleshipBoard:
                 row.append(Square(i, j))
             self.squares.append(row)
 
+        # Coordinates of each boat placed on the board
+        self.boat_coords = []
+
+        # Squares not hit yet, and squares where a boat could still start
+        self.unexplored = CellIndex(board_height, board_width)
+        self.free = CellIndex(board_height, board_width)
+
     def print_as_enemy(self):
         """Prints an enemy board in CLI."""
         print(self.printer(self.symbols_enemy))
@@ -98,66 +122,166 @@ class BattleshipBoard:
         """Returns a square given its coordinates."""
         return self.squares[row][col]
 
-    def set_board(self, random_board: bool = True):
+    def set_board(self, random_board: bool = True, max_attempts: int = 100):
         """
         Places all boats on the board, either randomly or following user input.
 
+        Boats are placed randomly one after the other, which can end in a dead end
+        where a boat fits nowhere although the fleet fits on the board. The whole
+        fleet is then placed again, up to max_attempts times, after which a layout
+        found by battleship_layouts.find_layout is used (square boards only).
+
         Args:
-            random: if True, board is set randomly
+            random_board: if True, board is set randomly.
+            max_attempts: number of times the fleet is placed randomly again after
+                a dead end.
+
+        Raises:
+            ValueError: if boats cannot fit on the board, checked before placing
+                boats randomly.
         """
-        for boat_size, n_boats in self.boats.items():
-            for _ in range(n_boats):
-                if random_board:
+        is_square = self.board_width == self.board_height
+        if random_board and is_square:
+            if not battleship_layouts.is_feasible(self.board_width, self.boats):
+                raise ValueError(f"Boats {self.boats} do not fit on the board")
+        if random_board:
+            for _ in range(max_attempts):
+                if all(
                     self.place_boat_randomly(boat_size)
-                else:
+                    for boat_size, n_boats in self.boats.items()
+                    for _ in range(n_boats)
+                ):
+                    break
+                self.clear_boats()
+            else:
+                if not is_square:
+                    raise ValueError(
+                        f"Could not place boats {self.boats} after {max_attempts} "
+                        "attempts"
+                    )
+                self.place_layout(
+                    battleship_layouts.find_layout(self.board_width, self.boats)
+                )
+        else:
+            for boat_size, n_boats in self.boats.items():
+                for _ in range(n_boats):
                     self.place_boat(boat_size)
         print(self)
 
+    def clear_boats(self):
+        """Removes all boats from the board."""
+        for coords in self.boat_coords:
+            for coord in coords:
+                self.get_square(*coord).has_boat = False
+        self.boat_coords = []
+        self.free = CellIndex(self.board_height, self.board_width)
+
+    def place_layout(self, boat_ids: np.array):
+        """
+        Places the boats of a layout (see battleship_engine), turned by a random
+        symmetry of the square board so that the same layout is not always used.
+        """
+        boat_ids = np.rot90(boat_ids, self.rng.integers(0, 4))
+        if self.rng.integers(0, 2):
+            boat_ids = boat_ids.T
+        for boat_id in range(int(boat_ids.max()) + 1):
+            coords = [(int(x), int(y)) for x, y in np.argwhere(boat_ids == boat_id)]
+            self.boat_to_squares(coords)
+            for coord in coords:
+                self.free.remove(coord)
+
     def place_boat(self, boat_size: int):
         """
         Takes input from user to place boat, checks validity of location and,
-        if valid, places the boat in the desired coordinates.
+        if valid, places the boat in the desired coordinates. Asks again until the
+        input is valid.
 
         Args:
             boat_size: length of the boat to be placed.
         """
+        while True:
+            # Get user input
+            print(f"Placing boat of size {boat_size}")
+            orientation = input("V to place boat vertically, H horizontally\n")
+            try:
+                orientation = parse_orientation(orientation)
+                top_left = parse_coordinates(
+                    input("Top-left coordinates of boat as x, y\n")
+                )
+            except ValueError as e:
+                print(f"{e}, please try again")
+                continue
 
-        # Get user input
-        print(f"Placing boat of size {boat_size}")
-        orientation = input("V to place boat vertically, H horizontally\n")
-        top_left = input("Top-left coordinates of boat as x, y\n").split(",")
-        top_left = tuple([int(x) for x in top_left])
-
-        # Transform user input into potential boat coordinates
-        coords = self.get_coordinates(boat_size, top_left, orientation)
+            # Transform user input into potential boat coordinates
+            coords = self.get_coordinates(boat_size, top_left, orientation)
 
-        if self.is_valid_position(coords):
-            self.boat_to_squares(coords)
-        else:
+            if self.is_valid_position(coords):
+                self.boat_to_squares(coords)
+                break
             print("Boat doesn't fit in indicated location!")
             print(f"Indicated boat coordinates were {coords}")
             print("Please try using different coordinates")
-            self.place_boat(boat_size)
         print(self)
 
-    def place_boat_randomly(self, boat_size: int, smart: bool = True):
+    def place_boats_from(self, placements: List[Tuple]):
+        """
+        Places all boats at given positions, e.g. read from a MoveScript. Every
+        placement is checked before the error is raised, so that all bad ones are
+        reported at once, and before any boat is placed, so that the board is left
+        as it was on error.
+
+        Args:
+            placements: (boat size, orientation, top-left coordinates, line number)
+                of every boat.
+
+        Raises:
+            ValueError: if a boat does not fit, or if the boats placed are not the
+                boats of the game.
+        """
+        errors = []
+        boats = []
+        taken = set()  # Tiles of the boats checked so far
+        for boat_size, orientation, top_left, line_no in placements:
+            coords = self.get_coordinates(boat_size, top_left, orientation)
+            if self.is_valid_position(coords) and taken.isdisjoint(coords):
+                boats.append(coords)
+                taken.update(coords)
+            else:
+                errors.append(f"line {line_no}: boat doesn't fit at {coords}")
+
+        placed = collections.Counter(size for size, _, _, _ in placements)
+        if placed != collections.Counter(self.boats):
+            errors.append(f"boats placed {dict(placed)}, expected {self.boats}")
+        if errors:
+            raise ValueError("Invalid placements:\n" + "\n".join(errors))
+        for coords in boats:
+            self.boat_to_squares(coords)
+        print(self)
+
+    def place_boat_randomly(self, boat_size: int, smart: bool = True) -> bool:
         """
         Places boat randomly by brute force.
 
         Args:
             boat_size: length of the boat to be placed.
             smart: if True, boats will not be placed adjacent to one another.
+
+        Returns:
+            Whether the boat was placed. False if it fits nowhere on the board, once
+            every free square was tried as its top-left square.
         """
         is_valid = False
         toggle_or = {"H": "V", "V": "H"}
+        tried = set()  # Top-left squares where the boat fits in no orientation
 
-        # Brute force method to place boats randomly in valid position
+        # Brute force method to place boats randomly in valid position, starting
+        # only from free squares
         while not is_valid:
-            x = random.randint(0, self.board_height)
-            y = random.randint(0, self.board_width)
-            top_left = (x, y)
+            if len(tried) >= len(self.free):
+                return False
+            top_left = self.free.sample(self.rng)
             ors = ["V", "H"]
-            orientation = random.choice(ors)
+            orientation = ors[self.rng.integers(0, len(ors))]
 
             coords = self.get_coordinates(boat_size, top_left, orientation)
             is_valid = self.is_valid_position(coords)
@@ -175,8 +299,20 @@ class BattleshipBoard:
                 # If smart, no adjacent boats as additional condition
                 if smart:
                     is_valid = is_valid and not self.has_adjacent_boat(coords)
+            if not is_valid:
+                tried.add(top_left)
 
         self.boat_to_squares(coords)
+        for x, y in coords:  # Squares taken, or next to a boat if smart
+            self.free.remove((x, y))
+            if smart:
+                for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+                    if (
+                        0 <= x + dx < self.board_height
+                        and 0 <= y + dy < self.board_width
+                    ):
+                        self.free.remove((x + dx, y + dy))
+        return True
 
     def has_adjacent_boat(self, coords: List[Tuple[int]]) -> bool:
         """
@@ -239,6 +375,8 @@ class BattleshipBoard:
         Returns:
             Whether coordinates are valid.
         """
+        if any(x < 0 or y < 0 for x, y in coords):  # Negative indices would wrap
+            return False
         try:
             squares = [self.get_square(*coord) for coord in coords]
             for sq in squares:
@@ -258,6 +396,7 @@ class BattleshipBoard:
         for coord in coords:
             sq = self.get_square(*coord)
             sq.place_boat()
+        self.boat_coords.append(coords)
 
     def fire(self, x: int, y: int) -> bool:
         """
@@ -280,11 +419,67 @@ class BattleshipBoard:
 
         if not sq.is_hit:
             sq.hit_square()
+            self.unexplored.remove((x, y))
             return sq.has_boat
 
         else:
             print("You already hit that square!")
 
+    def fire_salvo(self, targets: List[Tuple[int]]) -> List[bool]:
+        """
+        Hits several squares in a single call, as done in salvo mode.
+
+        Args:
+            targets: coordinates of each square to hit.
+
+        Returns:
+            For each target, True if it hit a boat, False if it missed.
+        """
+        return [bool(self.fire(*target)) for target in targets]
+
+    def to_arrays(self) -> Tuple[np.array]:
+        """Returns the id of the boat on each square (-1 for water), and hit squares."""
+        boat_ids = np.full((self.board_height, self.board_width), -1, dtype=np.int8)
+        for boat_id, coords in enumerate(self.boat_coords):
+            boat_ids[tuple(np.array(coords).T)] = boat_id
+        shots = np.array([[sq.is_hit for sq in row] for row in self.squares])
+        return boat_ids, shots
+
+    def load_arrays(
+        self, boat_ids: np.array, shots: np.array, unexplored: CellIndex = None
+    ):
+        """
+        Sets boats and hit squares from arrays, as returned by to_arrays, and the
+        index of squares not hit yet (rebuilt from shots if None).
+        """
+        self.boat_coords = [
+            [(int(x), int(y)) for x, y in np.argwhere(boat_ids == boat_id)]
+            for boat_id in range(int(boat_ids.max()) + 1)
+        ]
+        for row in self.squares:
+            for sq in row:
+                sq.has_boat = bool(boat_ids[sq.row, sq.column] >= 0)
+                sq.is_hit = bool(shots[sq.row, sq.column])
+        if unexplored is None:
+            unexplored = CellIndex.from_mask(~shots)
+        self.unexplored = unexplored
+
+    def sunk_boat(self, x: int, y: int) -> List[Tuple[int]]:
+        """Returns coordinates of the boat on a square if it is sunk, None otherwise."""
+        for coords in self.boat_coords:
+            if (x, y) in coords:
+                if all(self.get_square(*coord).is_hit for coord in coords):
+                    return coords
+                return None
+        return None
+
+    def surviving_boats(self) -> int:
+        """Returns the number of boats with at least one square not hit."""
+        return sum(
+            not all(self.get_square(*coord).is_hit for coord in coords)
+            for coords in self.boat_coords
+        )
+
 
 class Square:
     """A single square in a battleship board."""
@@ -333,52 +528,352 @@ class Square:
         return f"({self.row}, {self.column})"
 
 
+def parse_coordinates(text: str) -> Tuple[int]:
+    """
+    Parses coordinates written as x, y.
+
+    Raises:
+        ValueError: if text is not two integers separated by a comma.
+    """
+    values = text.split(",")
+    if len(values) != 2:
+        raise ValueError(f"Expected coordinates as x, y, got {text.strip()!r}")
+    try:
+        return tuple(int(value) for value in values)
+    except ValueError:
+        raise ValueError(f"Expected integer coordinates, got {text.strip()!r}")
+
+
+def parse_orientation(text: str) -> str:
+    """
+    Parses an orientation, V for vertical or H for horizontal.
+
+    Raises:
+        ValueError: if text is neither V nor H.
+    """
+    orientation = text.strip().upper()
+    if orientation not in ("V", "H"):
+        raise ValueError(f"Expected orientation V or H, got {text.strip()!r}")
+    return orientation
+
+
+class MoveScript:
+    """
+    Placements and shots of a scripted player, read from a file or a stream such as
+    stdin, e.g. to replay recorded games or to load-test the engine. One command per
+    line, blank lines and lines starting with # are skipped:
+
+        place <boat size> <V or H> <x>, <y>     places a boat, before any shot
+        fire <x>, <y>[; <x>, <y> ...]           fires at one or several squares
+
+    Lines are read lazily, by batches. Every batch is parsed and validated as a
+    whole before any of its moves is played, and all bad lines of a batch are
+    reported at once.
+
+    Scripts read from a file keep it open until exhausted or closed, and can be
+    used as context managers.
+    """
+
+    def __init__(
+        self,
+        source: Iterable[str],
+        board_width: int,
+        board_height: int,
+        batch_size: int = 1000,
+    ):
+        """
+        Instantiates a script.
+
+        Args:
+            source: lines of the script, e.g. an open file or sys.stdin.
+            board_width: number of horizontal tiles, to validate moves.
+            board_height: number of vertical tiles, to validate moves.
+            batch_size: number of lines parsed at once.
+        """
+        self.source = source
+        self.lines = enumerate(source, start=1)
+        self.owns_source = False  # Whether close() closes the source
+        self.board_width = board_width
+        self.board_height = board_height
+        self.batch_size = batch_size
+        self.placements = []  # (boat size, orientation, top-left, line number)
+        self.shots = collections.deque()  # Targets not fired yet, in order
+        self.fired = set()  # Targets of all shots read, to reject duplicates
+        self.is_exhausted = False
+
+    @classmethod
+    def from_file(cls, path: str, *args, **kwargs) -> "MoveScript":
+        """
+        Instantiates a script read from a file, closed with the script. See __init__
+        for arguments.
+        """
+        script = cls(open(path), *args, **kwargs)
+        script.owns_source = True
+        return script
+
+    @classmethod
+    def from_stream(cls, stream: TextIO, *args, **kwargs) -> "MoveScript":
+        """Instantiates a script read from a stream, e.g. sys.stdin, left open."""
+        return cls(stream, *args, **kwargs)
+
+    def close(self):
+        """Closes the file of the script, if read from a file."""
+        if self.owns_source:
+            self.source.close()
+
+    def __enter__(self) -> "MoveScript":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def read_batch(self):
+        """
+        Parses the next batch of lines.
+
+        Raises:
+            ValueError: listing every bad line of the batch, if any.
+        """
+        batch = list(itertools.islice(self.lines, self.batch_size))
+        if not batch:
+            self.is_exhausted = True
+            self.close()
+            return
+
+        placements, shots, errors = [], [], []
+        batch_fired = set()  # Targets of the shots of the batch
+        for line_no, line in batch:
+            text = line.strip()
+            if not text or text.startswith("#"):
+                continue
+            command, _, args = text.partition(" ")
+            try:
+                if command == "place":
+                    if shots or self.fired:
+                        raise ValueError("Boats must be placed before any shot")
+                    size, orientation, top_left = args.split(None, 2)
+                    placement = (
+                        int(size),
+                        parse_orientation(orientation),
+                        parse_coordinates(top_left),
+                    )
+                    self.check_placement(*placement)
+                    placements.append((*placement, line_no))
+                elif command == "fire":
+                    targets = []
+                    for text_target in args.split(";"):
+                        target = parse_coordinates(text_target)
+                        self.check_target(target, batch_fired)
+                        batch_fired.add(target)
+                        targets.append(target)
+                    shots.extend(targets)
+                else:
+                    raise ValueError(f"Unknown command {command!r}")
+            except ValueError as e:
+                errors.append(f"line {line_no}: {e}: {text!r}")
+
+        if errors:
+            raise ValueError("Invalid script:\n" + "\n".join(errors))
+        self.placements.extend(placements)
+        self.shots.extend(shots)
+        self.fired.update(shots)
+
+    def check_placement(self, boat_size: int, orientation: str, top_left: Tuple[int]):
+        """
+        Checks that a boat is on the board, every tile of it.
+
+        Raises:
+            ValueError: if the boat is invalid.
+        """
+        if boat_size < 1:
+            raise ValueError(f"Boat size must be at least 1, got {boat_size}")
+        coords = BattleshipBoard.get_coordinates(boat_size, top_left, orientation)
+        if not all(
+            0 <= x < self.board_height and 0 <= y < self.board_width for x, y in coords
+        ):
+            raise ValueError(f"Boat of size {boat_size} at {top_left} out of the board")
+
+    def check_target(self, target: Tuple[int], batch_fired: set):
+        """
+        Checks that a target is on the board and not fired at before.
+
+        Raises:
+            ValueError: if the target is invalid.
+        """
+        x, y = target
+        if not (0 <= x < self.board_height and 0 <= y < self.board_width):
+            raise ValueError(f"Target {target} out of the board")
+        if target in self.fired or target in batch_fired:
+            raise ValueError(f"Target {target} already fired at")
+
+    def get_placements(self) -> List[Tuple]:
+        """
+        Returns the placements of the boats, empty if the script has none. Reads the
+        script up to the first shot.
+        """
+        while not self.shots and not self.is_exhausted:
+            self.read_batch()
+        return self.placements
+
+    def next_shots(self, n_shots: int) -> List[Tuple[int]]:
+        """
+        Returns the targets of the next shots, reading more lines when needed.
+
+        Raises:
+            ValueError: if the script ends before n_shots shots.
+        """
+        while len(self.shots) < n_shots and not self.is_exhausted:
+            self.read_batch()
+        if len(self.shots) < n_shots:
+            raise ValueError(
+                f"Script ran out of shots, {n_shots} needed, {len(self.shots)} left"
+            )
+        return [self.shots.popleft() for _ in range(n_shots)]
+
+
 class BattleshipRunner:
     """Runs a game of Battleship."""
 
-    def __init__(self, player1, player2, to_start, board_width, board_height, boats):
-        """Instantiates a battleship runner."""
+    def __init__(
+        self,
+        player1,
+        player2,
+        to_start,
+        board_width,
+        board_height,
+        boats,
+        seed=None,
+        salvo=None,
+        events=None,
+        snapshot=None,
+        checkpoint=None,
+    ):
+        """
+        Instantiates a battleship runner.
+
+        Random streams of the game (boat placement and AI moves of each player) are
+        derived from seed, see battleship_rng. Pass the seed of a previous game to
+        replay it. If None, a new seed is drawn.
+
+        salvo sets the number of shots fired per turn: None for classic rules (fire
+        again after a hit), an int for a fixed salvo size, or "ships" for as many shots
+        as the player has surviving boats.
+
+        events is the bus game events are emitted into, see battleship_events. If
+        None, a new bus without subscribers.
+
+        snapshot is a game saved with snapshot(), to be resumed instead of starting a
+        new game. Its seed replaces seed.
+
+        checkpoint is called with a snapshot of the game after every move until the
+        game is over, e.g. to save it to a file. The game is played within __init__,
+        so this is how to snapshot a game in progress. If None, no snapshots.
+        """
         self.players = [player1, player2]
         self.to_start = to_start
         self.board_width = board_width
         self.board_heights = board_height
         self.boats = boats
+        self.salvo = salvo
+        if snapshot is not None:
+            seed = int(battleship_snapshot.unpack(snapshot)["seed"])
+        self.seed = seed if seed is not None else battleship_rng.new_master_seed()
+        self.events = events if events is not None else battleship_events.EventBus()
+        self.checkpoint = checkpoint
 
         self.other_player = {player1: player2, player2: player1}
         self.is_over = False
         self.timer = None  # TODO: potential feature to implement
 
-        # Give each player their own board
-        for p in self.players:
-            p.set_own_board(BattleshipBoard(board_width, board_height, boats))
-            p.place_boats()
+        # Give each player their own board and random streams
+        board_rngs = battleship_rng.game_generators(self.seed, game_index=0)
+        for i, p in enumerate(self.players):
+            board_rng, moves_rng = board_rngs[i], board_rngs[i + 2]
+            p.set_rng(moves_rng)
+            p.set_events(self.events)
+            board = BattleshipBoard(board_width, board_height, boats, board_rng)
+            p.set_own_board(board)
+            if snapshot is None:  # Boats of a resumed game are restored below
+                p.place_boats()
 
         # Give each player a reference to enemy's board
         player1.set_enemy_board(player2.get_own_board())
         player2.set_enemy_board(player1.get_own_board())
 
-        # Give turn to a player
-        for p in self.players:
-            if p == to_start:
-                p.give_turn()
+        # Give turn to a player, or resume the game
+        if snapshot is not None:
+            self.restore(snapshot)
+        else:
+            for p in self.players:
+                if p == to_start:
+                    p.give_turn()
 
         self.run_game()
 
+    def snapshot(self) -> bytes:
+        """Returns the state of the game as a blob, see battleship_snapshot."""
+        boat_ids, shots = zip(*[p.get_own_board().to_arrays() for p in self.players])
+        turns = [p.get_turn() for p in self.players]
+        return battleship_snapshot.pack(
+            np.stack(boat_ids),
+            np.stack(shots),
+            turns.index(True) if True in turns else -1,
+            [p.rng for p in self.players],
+            self.seed,
+            unexplored=[p.get_own_board().unexplored for p in self.players],
+        )
+
+    def restore(self, snapshot):
+        """Sets the state of the game from a blob returned by snapshot()."""
+        record = battleship_snapshot.unpack(snapshot)
+        for i, p in enumerate(self.players):
+            p.get_own_board().load_arrays(
+                record["boat_ids"][i],
+                record["shots"][i],
+                battleship_snapshot.to_index(record, i),
+            )
+            p.set_rng(battleship_snapshot.words_to_rng(record["rng"][i]))
+            if record["turn"] == i:
+                p.give_turn()
+            else:
+                p.end_turn()
+
     def run_game(self):
         """Governs the game of battleship."""
         print(f"Battleship game is on!! {(self.to_start)} fires first!")
+        print(f"Game seed is {self.seed}")
         while not self.is_over:
             for p in self.players:
+                if self.is_over:
+                    break
                 if p.get_turn():
                     if p.get_nature() == "HUMAN":
                         self.print_boards(p)
-                    p.move()
 
-                    if not p.get_turn():
-                        print(f"Miss! {p} losses turn!")
+                    if self.salvo is not None:
+                        n_shots = self.get_salvo_size(p)
+                        hits = p.move_salvo(n_shots)
+                        print(f"{p} fired {n_shots} shots, {sum(hits)} hit a boat!")
+                        p.end_turn()
                         self.other_player[p].give_turn()
                     else:
-                        print(f"\nBoat hit! {p} to fire again!")
+                        p.move()
+
+                        if not p.get_turn():
+                            print(f"Miss! {p} losses turn!")
+                            self.other_player[p].give_turn()
+                        else:
+                            print(f"\nBoat hit! {p} to fire again!")
+
+                    self.is_over = self.is_game_over()
+                    if self.checkpoint is not None and not self.is_over:
+                        self.checkpoint(self.snapshot())
+
+    def get_salvo_size(self, player) -> int:
+        """Returns the number of shots a player fires in a salvo turn."""
+        if self.salvo == "ships":
+            return player.get_own_board().surviving_boats()
+        return self.salvo
 
     @staticmethod
     def print_boards(player):
@@ -393,49 +888,175 @@ class BattleshipRunner:
 
     def is_game_over(self):
         """Determines whether the game has finished."""
-        pass
-        # TODO: define
+        for p in self.players:
+            if p.get_own_board().surviving_boats() == 0:
+                print(f"Game is over! {self.other_player[p]} won the game!!!")
+                for player in self.players:
+                    if player.stats is not None:
+                        player.stats.record_game_over(won=player != p)
+                self.events.game_over(self.other_player[p].name)
+                return True
+        return False
 
 
 class Player:
     """Defines a player of the game Battleship."""
 
-    def __init__(self, name, nature, random_placement):
-        """Instantiates a player."""
+    def __init__(self, name, nature, random_placement, script=None):
+        """
+        Instantiates a player. A SCRIPT player reads its placements and shots from a
+        MoveScript, and places its boats as random_placement says if the script has
+        no placements.
+        """
         self.name = name
         self.nature = nature
         self.random_placement = random_placement
+        self.script = script
         self.own_board = None
         self.enemy_board = None
         self.my_turn = False
+        self.rng = None
+        self.stats = None  # Streaming stats of the player, see battleship_stats
+        self.events = battleship_events.EventBus()  # Replaced by BattleshipRunner
 
     def move(self):
         """Prompts player to act."""
+        start = time.perf_counter()
         if self.nature == "HUMAN":
-            target = input("Coordinates to fire as x, y\n").split(",")
-            target = tuple([int(x) for x in target])
+            target = self.input_targets(1)[0]
+        elif self.nature == "SCRIPT":
+            target = self.script.next_shots(1)[0]
         elif self.nature == "AI":
-            x = random.randint(0, self.enemy_board.board_height)
-            y = random.randint(0, self.enemy_board.board_width)
-            print(f"{self} fires at {x}, {y}")
-            target = (x, y)
+            target = self.enemy_board.unexplored.sample(self.rng)
+            print(f"{self} fires at {target[0]}, {target[1]}")
+        decision_time = time.perf_counter() - start
 
         hit_boat = self.enemy_board.fire(*target)
+        if self.stats is not None:
+            self.stats.record_shot(target, bool(hit_boat), decision_time)
+        if hit_boat is not None:
+            self.emit_shot(target, hit_boat)
         if not hit_boat:
             self.my_turn = False
 
+    def move_salvo(self, n_shots: int) -> List[bool]:
+        """
+        Prompts player to fire a salvo of several shots at once.
+
+        Args:
+            n_shots: number of shots in the salvo.
+
+        Returns:
+            For each shot, True if it hit a boat, False if it missed.
+        """
+        start = time.perf_counter()
+        if self.nature == "HUMAN":
+            targets = self.input_targets(n_shots)
+        elif self.nature == "SCRIPT":
+            targets = self.script.next_shots(n_shots)
+        elif self.nature == "AI":
+            # Distinct squares not hit yet, drawn at random
+            targets = self.enemy_board.unexplored.sample_many(self.rng, n_shots)
+            print(f"{self} fires at {targets}")
+        decision_time = time.perf_counter() - start
+
+        hits = self.enemy_board.fire_salvo(targets)
+        if self.stats is not None:
+            for target, hit_boat in zip(targets, hits):
+                self.stats.record_shot(target, hit_boat, decision_time / len(targets))
+        sunk = []  # Boats sunk by the salvo, emitted once each
+        for target, hit_boat in zip(targets, hits):
+            self.emit_shot(target, hit_boat, sunk)
+        return hits
+
+    def input_targets(self, n_shots: int) -> List[Tuple[int]]:
+        """
+        Takes the targets of a turn from user input. Asks again until there are as
+        many targets as shots (or squares left to fire at), all distinct, on the
+        enemy board and not fired at before.
+
+        Args:
+            n_shots: number of shots to fire.
+
+        Returns:
+            Coordinates of each target.
+        """
+        board = self.enemy_board
+        n_targets = min(n_shots, len(board.unexplored))
+        if n_targets == 1:
+            prompt = "Coordinates to fire as x, y\n"
+        else:
+            prompt = f"{n_targets} coordinates to fire as x, y separated by ;\n"
+        while True:
+            try:
+                targets = [parse_coordinates(text) for text in input(prompt).split(";")]
+                if len(targets) != n_targets:
+                    raise ValueError(
+                        f"Expected {n_targets} targets, got {len(targets)}"
+                    )
+                for x, y in targets:
+                    if not (0 <= x < board.board_height and 0 <= y < board.board_width):
+                        raise ValueError(f"Target {(x, y)} out of the board")
+                    if (x, y) not in board.unexplored:
+                        raise ValueError(f"Target {(x, y)} already fired at")
+                if len(set(targets)) != len(targets):
+                    raise ValueError("Targets must be distinct")
+            except ValueError as e:
+                print(f"{e}, please try again")
+                continue
+            return targets
+
+    def emit_shot(self, target: Tuple[int], hit_boat: bool, sunk: List = None):
+        """
+        Emits the events of a shot fired by the player, see battleship_events.
+
+        Args:
+            target: coordinates of the square hit.
+            hit_boat: whether the shot hit a boat.
+            sunk: boats already emitted as sunk by the same salvo, if any. Updated.
+        """
+        self.events.fire(self.name, target, hit_boat)
+        if not hit_boat:
+            return
+        self.events.hit(self.name, target)
+        coords = self.enemy_board.sunk_boat(*target)
+        if coords is not None and coords not in (sunk or []):
+            self.events.sunk(self.name, len(coords), coords)
+            if sunk is not None:
+                sunk.append(coords)
+
     def place_boats(self):
         """Places boats on the board."""
-        self.own_board.set_board(self.random_placement)
+        if self.nature == "SCRIPT" and self.script.get_placements():
+            self.own_board.place_boats_from(self.script.placements)
+        else:
+            self.own_board.set_board(self.random_placement)
 
     def give_turn(self):
         """Assigns turn to the player."""
         self.my_turn = True
+        self.events.turn_change(self.name)
+
+    def end_turn(self):
+        """Takes turn away from the player."""
+        self.my_turn = False
 
     def get_turn(self):
         """Retrieves whether it's a player's turn."""
         return self.my_turn
 
+    def set_rng(self, rng):
+        """Sets player's random generator, used for AI moves."""
+        self.rng = rng
+
+    def set_stats(self, stats):
+        """Sets player's streaming stats, updated on every shot."""
+        self.stats = stats
+
+    def set_events(self, events):
+        """Sets the bus the player emits game events into."""
+        self.events = events
+
     def set_own_board(self, board):
         """Sets player's board."""
         self.own_board = board
@@ -461,7 +1082,9 @@ class Player:
 
 
 if __name__ == "__main__":
-    # Natures available are HUMAN and AI. AI can be fool, standard, hard
+    # Natures available are HUMAN, AI and SCRIPT. AI can be fool, standard, hard.
+    # SCRIPT reads placements and shots from a file, or from stdin with
+    # MoveScript.from_stream(sys.stdin, board_width, board_height)
     player1 = Player(name="player1", nature="AI", random_placement=True)
     player2 = Player(name="player2", nature="HUMAN", random_placement=True)
 
@@ -471,7 +1094,18 @@ if __name__ == "__main__":
     board_height = 10
 
     boats = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
+    seed = None  # Seed of a previous game to replay it, None for a new game
+    salvo = None  # Shots per turn: None for classic rules, an int, or "ships"
+    checkpoint = None  # Called with a snapshot after every move, to resume the game
 
     game = BattleshipRunner(
-        player1, player2, to_start, board_width, board_height, boats
+        player1,
+        player2,
+        to_start,
+        board_width,
+        board_height,
+        boats,
+        seed,
+        salvo,
+        checkpoint=checkpoint,
     )
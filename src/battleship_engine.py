@@ -0,0 +1,349 @@
+"""
+Headless, NumPy-based rules of the game of battleship.
+
+Boards are represented as integer arrays instead of objects per square:
+    - boat_ids: id of the boat on each tile, -1 for water.
+    - obs: what the enemy knows about each tile, encoded with UNEXPLORED, WATER, HIT
+      and SUNK. SYMBOLS maps these codes to the characters used by battleship_ai.
+
+Nothing in this module imports PyQt, so it can be used by simulations and
+reinforcement learning environments.
+"""
+
+from typing import Dict, List, Tuple
+import numpy as np
+
+UNEXPLORED, WATER, HIT, SUNK = 0, 1, 2, 3
+SYMBOLS = np.array(["x", "w", "h", "s"])
+
+
+def fleet_sizes(boats: Dict) -> List[int]:
+    """
+    Flattens a boats dictionary into a list of boat sizes, biggest boat first.
+
+    Args:
+        boats: dictionary where keys are boat size and values # of boats.
+
+    Returns:
+        Size of every boat in the fleet.
+    """
+    sizes = [size for size, n_boats in boats.items() for _ in range(n_boats)]
+    return sorted(sizes, reverse=True)
+
+
+def place_fleets(
+    n_boards: int,
+    board_size: int,
+    boats: Dict,
+    rng: np.random.Generator,
+    smart: bool = True,
+    max_attempts: int = 100,
+) -> np.array:
+    """
+    Places a full fleet on several boards at once. For every boat, all valid
+    positions of all boards are computed as a single array operation and one of them
+    is drawn uniformly at random per board.
+
+    Args:
+        n_boards: number of boards to set.
+        board_size: size of the board, assumed to be square.
+        boats: dictionary where keys are boat size and values # of boats.
+        rng: random generator used to draw positions.
+        smart: if True, boats will not be placed adjacent to one another.
+        max_attempts: number of times boards ending in a dead end are set again.
+
+    Returns:
+        Array of shape (n_boards, board_size, board_size) with the id of the boat on
+        each tile, -1 for water. Boat ids follow the order of fleet_sizes.
+
+    Raises:
+        ValueError: if some board could not be set after max_attempts.
+    """
+    boat_ids = np.full((n_boards, board_size, board_size), -1, dtype=np.int16)
+    pending = np.arange(n_boards)
+
+    for _ in range(max_attempts):
+        boat_ids[pending] = -1
+        failed = _place_fleets_once(boat_ids, pending, boats, rng, smart)
+        pending = pending[failed]
+        if pending.size == 0:
+            return boat_ids
+
+    raise ValueError(
+        f"Could not place boats {boats} on a board of size {board_size} "
+        f"after {max_attempts} attempts"
+    )
+
+
+def place_fleet(
+    board_size: int, boats: Dict, rng: np.random.Generator, smart: bool = True
+) -> np.array:
+    """Places a full fleet on a single board. See place_fleets."""
+    return place_fleets(1, board_size, boats, rng, smart)[0]
+
+
+def _place_fleets_once(
+    boat_ids: np.array,
+    pending: np.array,
+    boats: Dict,
+    rng: np.random.Generator,
+    smart: bool,
+) -> np.array:
+    """
+    Places all boats on the pending boards, in place.
+
+    Returns:
+        Boolean array flagging the pending boards that ran out of valid positions.
+    """
+    board_size = boat_ids.shape[1]
+    ids = boat_ids[pending]
+    failed = np.zeros(len(pending), dtype=bool)
+    rows = np.arange(len(pending))
+
+    for boat_id, size in enumerate(fleet_sizes(boats)):
+        blocked = ids >= 0
+        if smart:  # Tiles adjacent to a boat are also blocked
+            occupied = blocked.copy()
+            blocked[:, 1:, :] |= occupied[:, :-1, :]
+            blocked[:, :-1, :] |= occupied[:, 1:, :]
+            blocked[:, :, 1:] |= occupied[:, :, :-1]
+            blocked[:, :, :-1] |= occupied[:, :, 1:]
+
+        # Count blocked tiles of every horizontal and vertical window of boat size
+        horizontal = _window_sums(blocked, size, axis=2) == 0
+        vertical = _window_sums(blocked, size, axis=1) == 0
+        candidates = np.concatenate(
+            [horizontal.reshape(len(ids), -1), vertical.reshape(len(ids), -1)], axis=1
+        )
+
+        # Draw one valid position per board, uniformly at random
+        scores = np.where(candidates, rng.random(candidates.shape), -1.0)
+        choice = np.argmax(scores, axis=1)
+        failed |= scores[rows, choice] < 0
+
+        n_horizontal = horizontal.shape[1] * horizontal.shape[2]
+        is_vertical = choice >= n_horizontal
+        top = np.where(
+            is_vertical,
+            (choice - n_horizontal) // board_size,
+            choice // horizontal.shape[2],
+        )
+        left = np.where(
+            is_vertical,
+            (choice - n_horizontal) % board_size,
+            choice % horizontal.shape[2],
+        )
+
+        # Write boat on the chosen tiles
+        offsets = np.arange(size)
+        tiles_row = top[:, None] + np.where(is_vertical[:, None], offsets, 0)
+        tiles_col = left[:, None] + np.where(is_vertical[:, None], 0, offsets)
+        ok = ~failed
+        ids[rows[ok, None], tiles_row[ok], tiles_col[ok]] = boat_id
+
+    boat_ids[pending] = ids
+    return failed
+
+
+def _window_sums(array: np.array, size: int, axis: int) -> np.array:
+    """Sums every window of given size along an axis of a 3D boolean array."""
+    cumsum = np.cumsum(array, axis=axis, dtype=np.int32)
+    pad = [(0, 0)] * 3
+    pad[axis] = (1, 0)
+    cumsum = np.pad(cumsum, pad)
+    upper = np.take(cumsum, np.arange(size, cumsum.shape[axis]), axis=axis)
+    lower = np.take(cumsum, np.arange(0, cumsum.shape[axis] - size), axis=axis)
+    return upper - lower
+
+
+def obs_to_array(obs: np.array) -> np.array:
+    """
+    Transforms an encoded observation into the array understood by battleship_ai,
+    where:
+        'x' are unexplored tiles
+        'w' are explored water tiles
+        'h' are explored hit tiles
+        's' are explored sunk tiles
+    """
+    return SYMBOLS[obs]
+
+
+class CellIndex:
+    """
+    Set of tiles of a board, e.g. unexplored tiles, supporting O(1) uniform sampling,
+    O(1) removal and iteration. Tiles are kept as flat indices in a dense array, with
+    a map from tile to position in the array: removed tiles are swapped with the
+    last one.
+    """
+
+    def __init__(self, n_rows: int, n_cols: int = None):
+        """Instantiates the index with all tiles of a board (square if no n_cols)."""
+        self.n_cols = n_cols if n_cols is not None else n_rows
+        n_tiles = n_rows * self.n_cols
+        self.cells = np.arange(n_tiles)
+        self.pos = np.arange(n_tiles)  # Position of each tile in cells, -1 if removed
+        self.size = n_tiles
+
+    @classmethod
+    def from_mask(cls, mask: np.array) -> "CellIndex":
+        """Builds the index of the tiles of a mask, e.g. enemy_array == 'x'."""
+        return cls.from_cells(np.flatnonzero(mask), *mask.shape)
+
+    @classmethod
+    def from_cells(cls, cells: np.array, n_rows: int, n_cols: int) -> "CellIndex":
+        """
+        Builds the index of tiles given as flat indices, in the order of to_cells, so
+        that the index samples the same tiles as the one it was saved from.
+        """
+        index = cls(n_rows, n_cols)
+        index.cells = np.array(cells, dtype=np.int64)
+        index.pos = np.full(n_rows * n_cols, -1)
+        index.pos[index.cells] = np.arange(len(index.cells))
+        index.size = len(index.cells)
+        return index
+
+    def to_cells(self) -> np.array:
+        """Returns flat indices of the tiles, in their internal order."""
+        return self.cells[: self.size].copy()
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, coord: Tuple[int]) -> bool:
+        return self.pos[coord[0] * self.n_cols + coord[1]] >= 0
+
+    def __iter__(self):
+        for cell in self.cells[: self.size]:
+            yield divmod(int(cell), self.n_cols)
+
+    def remove(self, coord: Tuple[int]):
+        """Removes a tile, if in the index."""
+        cell = coord[0] * self.n_cols + coord[1]
+        i = self.pos[cell]
+        if i < 0:
+            return
+        last = self.cells[self.size - 1]
+        self.cells[i], self.pos[last] = last, i
+        self.pos[cell] = -1
+        self.size -= 1
+
+    def sample(self, rng: np.random.Generator) -> Tuple[int]:
+        """
+        Returns a tile drawn uniformly at random.
+
+        Raises:
+            ValueError: if the index is empty.
+        """
+        if self.size == 0:
+            raise ValueError("No tiles left to sample from")
+        return divmod(int(self.cells[rng.integers(0, self.size)]), self.n_cols)
+
+    def sample_many(self, rng: np.random.Generator, k: int) -> List[Tuple[int]]:
+        """Returns up to k distinct tiles drawn uniformly at random."""
+        picks = rng.choice(self.size, size=min(k, self.size), replace=False)
+        return [divmod(int(cell), self.n_cols) for cell in self.cells[picks]]
+
+
+class Board:
+    """
+    A single battleship board as NumPy arrays, holding both the boats and what the
+    enemy has explored so far.
+    """
+
+    def __init__(self, boat_ids: np.array):
+        """
+        Instantiates a board.
+
+        Args:
+            boat_ids: square array with the id of the boat on each tile, -1 for water.
+                Ids must be consecutive, starting at 0.
+        """
+        self.board_size = boat_ids.shape[0]
+        self.boat_ids = boat_ids
+        self.obs = np.zeros(boat_ids.shape, dtype=np.int8)
+        self.boat_sizes = np.bincount(boat_ids[boat_ids >= 0])
+        self.remaining = self.boat_sizes.copy()
+        self.boats_left = len(self.boat_sizes)
+        self.unexplored = CellIndex(self.board_size)
+
+    def fire(self, x: int, y: int) -> Tuple[bool, int]:
+        """
+        Hits a tile. Assumes the tile is on the board and unexplored.
+
+        Args:
+            x: row of the tile to hit.
+            y: column of the tile to hit.
+
+        Returns:
+            Whether a boat was hit, and the id of the boat sunk by the shot, -1 if
+            none.
+        """
+        boat_id = self.boat_ids[x, y]
+        self.unexplored.remove((x, y))
+        if boat_id < 0:
+            self.obs[x, y] = WATER
+            return False, -1
+
+        self.obs[x, y] = HIT
+        self.remaining[boat_id] -= 1
+        if self.remaining[boat_id] > 0:
+            return True, -1
+
+        self.obs[self.boat_ids == boat_id] = SUNK
+        self.boats_left -= 1
+        return True, boat_id
+
+    def fire_mask(self, mask: np.array) -> Tuple[int, np.array]:
+        """
+        Hits all tiles of a mask at once, as done by area shots. Tiles already
+        explored are left as they are.
+
+        Args:
+            mask: boolean array of the size of the board, True for tiles to hit.
+
+        Returns:
+            Number of boat tiles hit, and ids of the boats sunk by the shot.
+        """
+        fired = mask & (self.obs == UNEXPLORED)
+        for x, y in np.argwhere(fired):
+            self.unexplored.remove((x, y))
+        hits = fired & (self.boat_ids >= 0)
+        self.obs[fired] = WATER
+        self.obs[hits] = HIT
+
+        hit_count = np.bincount(self.boat_ids[hits], minlength=len(self.boat_sizes))
+        self.remaining -= hit_count
+        sunk = np.flatnonzero((self.remaining == 0) & (hit_count > 0))
+        if sunk.size:
+            self.obs[np.isin(self.boat_ids, sunk)] = SUNK
+            self.boats_left -= sunk.size
+        return int(hit_count.sum()), sunk
+
+    def fire_salvo(self, targets: List[Tuple[int]]) -> Tuple[np.array, np.array]:
+        """
+        Hits several distinct tiles in a single call, as done in salvo mode.
+
+        Args:
+            targets: 2D coordinates of the tiles to hit.
+
+        Returns:
+            Whether each shot hit a boat, and ids of the boats sunk by the salvo.
+        """
+        rows, cols = np.array(targets, dtype=np.intp).reshape(-1, 2).T
+        is_hit = (self.boat_ids[rows, cols] >= 0) & (self.obs[rows, cols] == UNEXPLORED)
+        mask = np.zeros(self.obs.shape, dtype=bool)
+        mask[rows, cols] = True
+        _, sunk = self.fire_mask(mask)
+        return is_hit, sunk
+
+    def alive_sizes(self) -> np.array:
+        """Returns sizes of boats not sunk, as observed by the enemy."""
+        return self.boat_sizes[self.remaining > 0]
+
+    def is_over(self) -> bool:
+        """Determines whether all boats of the board are sunk."""
+        return self.boats_left == 0
+
+    def to_array(self) -> np.array:
+        """Returns what the enemy knows about the board, as understood by AIs."""
+        return obs_to_array(self.obs)
@@ -0,0 +1,194 @@
+"""
+Vectorized, gym-style environment to train reinforcement learning agents on the game
+of battleship.
+
+A single agent fires at B independent enemy boards at once. Boards follow the same
+rules as battleship_cli and battleship_ui: boats of sizes given by a boats dictionary,
+optionally never adjacent to one another, and sunk once all their tiles are hit.
+"""
+
+from typing import Dict, Tuple
+import numpy as np
+
+import battleship_engine
+import battleship_rng
+from battleship_engine import UNEXPLORED, WATER, HIT, SUNK
+
+
+class BattleshipVecEnv:
+    """
+    Runs B games of battleship in parallel, as NumPy arrays.
+
+    Observations are int8 arrays of shape (B, board_size, board_size) encoded as in
+    battleship_engine. Actions are flat tile indices, i.e. row * board_size + column.
+    Games that finish are set again automatically on the same step.
+
+    The arrays returned by reset() and step() are preallocated and reused between
+    steps. Copy them if they need to outlive the next step.
+    """
+
+    def __init__(
+        self,
+        n_envs: int,
+        board_size: int = 10,
+        boats: Dict = None,
+        smart: bool = True,
+        seed: int = None,
+        worker_index: int = 0,
+    ):
+        """
+        Instantiates the environment.
+
+        Args:
+            n_envs: number of games played in parallel.
+            board_size: size of the board, assumed to be square.
+            boats: dictionary where keys are boat size and values # of boats.
+            smart: if True, boats will not be placed adjacent to one another.
+            seed: master seed of the environment. Each environment in a pool of
+                workers should use its own worker_index.
+            worker_index: index of the environment within a pool of workers.
+        """
+        self.n_envs = n_envs
+        self.board_size = board_size
+        self.boats = boats if boats is not None else {2: 1, 3: 2, 4: 1, 5: 1}
+        self.smart = smart
+        self.seed = seed if seed is not None else battleship_rng.new_master_seed()
+        self.rng = battleship_rng.worker_generator(self.seed, worker_index)
+
+        # Rewards given to the agent
+        self.reward_hit = 1.0
+        self.reward_miss = 0.0
+        self.reward_invalid = -1.0
+
+        n_tiles = board_size * board_size
+        self.boat_sizes = np.array(battleship_engine.fleet_sizes(self.boats))
+        self._env_index = np.arange(n_envs)
+
+        # Preallocated buffers, returned to the agent without copying
+        self.obs = np.zeros((n_envs, board_size, board_size), dtype=np.int8)
+        self.action_mask = np.ones((n_envs, n_tiles), dtype=bool)
+        self.rewards = np.zeros(n_envs, dtype=np.float32)
+        self.dones = np.zeros(n_envs, dtype=bool)
+        self.episode_shots = np.zeros(n_envs, dtype=np.int32)
+
+        # Hidden state of the games
+        self._boat_ids = np.full((n_envs, n_tiles), -1, dtype=np.int16)
+        self._remaining = np.zeros((n_envs, len(self.boat_sizes)), dtype=np.int16)
+        self._boats_left = np.zeros(n_envs, dtype=np.int16)
+        self._shots = np.zeros(n_envs, dtype=np.int32)
+        self._obs_flat = self.obs.reshape(n_envs, n_tiles)  # View on self.obs
+
+    def reset(self) -> np.array:
+        """Sets all games again and returns the first observation."""
+        self._reset_envs(self._env_index)
+        self.rewards[:] = 0
+        self.dones[:] = False
+        return self.obs
+
+    def step(self, actions: np.array) -> Tuple[np.array, np.array, np.array, Dict]:
+        """
+        Fires once on every board.
+
+        Args:
+            actions: flat index of the tile to fire at, one per game. Firing at an
+                already-fired tile is an invalid action: it is counted as a shot but
+                does not change the board.
+
+        Returns:
+            obs: observation of every board after the shot.
+            rewards: reward obtained by the shot.
+            dones: True for games that finished on this step. These games are
+                already set again, and obs shows their new, unexplored board.
+            info: dictionary where 'episode_shots' holds the number of shots taken to
+                finish each game, only meaningful where dones is True.
+        """
+        envs = self._env_index
+        actions = np.asarray(actions, dtype=np.intp)
+        self._shots += 1
+
+        valid = self.action_mask[envs, actions]
+        boat_id = self._boat_ids[envs, actions]
+        is_hit = valid & (boat_id >= 0)
+
+        # Mark fired tiles
+        fired_envs, fired_tiles = envs[valid], actions[valid]
+        self._obs_flat[fired_envs, fired_tiles] = np.where(is_hit[valid], HIT, WATER)
+        self.action_mask[fired_envs, fired_tiles] = False
+
+        self.rewards[:] = np.where(valid, self.reward_miss, self.reward_invalid)
+        self.rewards[is_hit] = self.reward_hit
+
+        # Hit boats lose one tile, and are sunk when no tiles remain
+        hit_envs, hit_boats = envs[is_hit], boat_id[is_hit]
+        self._remaining[hit_envs, hit_boats] -= 1
+        is_sunk = self._remaining[hit_envs, hit_boats] == 0
+        sunk_envs, sunk_boats = hit_envs[is_sunk], hit_boats[is_sunk]
+        if sunk_envs.size:
+            sunk_tiles = self._boat_ids[sunk_envs] == sunk_boats[:, None]
+            self._obs_flat[sunk_envs] = np.where(
+                sunk_tiles, SUNK, self._obs_flat[sunk_envs]
+            )
+            self._boats_left[sunk_envs] -= 1
+
+        # Finished games are set again straight away
+        np.equal(self._boats_left, 0, out=self.dones)
+        done_envs = envs[self.dones]
+        if done_envs.size:
+            self.episode_shots[done_envs] = self._shots[done_envs]
+            self._reset_envs(done_envs)
+
+        return self.obs, self.rewards, self.dones, {"episode_shots": self.episode_shots}
+
+    def _reset_envs(self, envs: np.array):
+        """Places new boats on the given boards and clears their observations."""
+        boards = battleship_engine.place_fleets(
+            len(envs), self.board_size, self.boats, self.rng, self.smart
+        )
+        self._boat_ids[envs] = boards.reshape(len(envs), -1)
+        self._remaining[envs] = self.boat_sizes
+        self._boats_left[envs] = len(self.boat_sizes)
+        self._shots[envs] = 0
+        self._obs_flat[envs] = UNEXPLORED
+        self.action_mask[envs] = True
+
+    def boat_mask(self) -> np.array:
+        """
+        Returns where the hidden boats are on every board, as a boolean array of the
+        shape of the observations. Meant as labels for supervised learning, not as
+        observations.
+        """
+        return (self._boat_ids >= 0).reshape(self.obs.shape)
+
+    def alive_boats(self) -> np.array:
+        """Returns whether each boat of every board is not sunk, in fleet order."""
+        return self._remaining > 0
+
+    def symbol_arrays(self) -> np.array:
+        """Returns the observations as arrays understood by battleship_ai."""
+        return battleship_engine.obs_to_array(self.obs)
+
+
+def random_policy(env: BattleshipVecEnv, rng: np.random.Generator) -> np.array:
+    """Picks a random unexplored tile on every board, using the action mask."""
+    scores = np.where(env.action_mask, rng.random(env.action_mask.shape), -1.0)
+    return np.argmax(scores, axis=1)
+
+
+if __name__ == "__main__":
+    import time
+
+    n_envs = 4096
+    n_steps = 500
+
+    env = BattleshipVecEnv(n_envs, seed=1)
+    rng = np.random.default_rng(1)
+    env.reset()
+
+    # Precompute actions so that only the environment is timed
+    actions = rng.integers(0, env.board_size**2, size=(n_steps, n_envs))
+
+    start = time.perf_counter()
+    for t in range(n_steps):
+        obs, rewards, dones, info = env.step(actions[t])
+    elapsed = time.perf_counter() - start
+    print(f"{n_envs * n_steps / elapsed:,.0f} env steps per second")
@@ -0,0 +1,111 @@
+"""
+Event bus of a game of battleship.
+
+Front ends (battleship_cli, battleship_ui) emit what happens in a game as it happens,
+and stats, replays, consoles or telemetry subscribe to it instead of polling boards.
+Events and the arguments passed to their handlers:
+    - fire(player, target, is_hit): a player fired at a tile.
+    - hit(player, target): the shot of a player hit a boat.
+    - sunk(player, boat_size, tiles): the shot of a player sunk a boat.
+    - turn_change(player): a player gets the turn.
+    - game_over(winner): the game is over.
+
+Players are given by name and tiles as (row, column). Emitting an event without
+subscribers costs a method call and a loop over an empty list, so that front ends
+emit unconditionally.
+"""
+
+from typing import Callable, List, Tuple
+
+EVENTS = ("fire", "hit", "sunk", "turn_change", "game_over")
+
+
+class EventBus:
+    """Handlers subscribed to each event of a game, called in order of subscription."""
+
+    def __init__(self):
+        """Instantiates a bus without subscribers."""
+        self.handlers = {event: [] for event in EVENTS}
+
+    def subscribe(self, event: str, handler: Callable) -> Callable:
+        """
+        Subscribes a handler to an event. Can be used as a decorator.
+
+        Args:
+            event: one of EVENTS.
+            handler: function called with the arguments of the event.
+
+        Returns:
+            The handler.
+
+        Raises:
+            ValueError: if the event is unknown.
+        """
+        if event not in self.handlers:
+            raise ValueError(f"Unknown event {event}, expected one of {EVENTS}")
+        self.handlers[event].append(handler)
+        return handler
+
+    def unsubscribe(self, event: str, handler: Callable):
+        """Unsubscribes a handler from an event, if subscribed."""
+        if handler in self.handlers.get(event, []):
+            self.handlers[event].remove(handler)
+
+    def has_subscribers(self, event: str) -> bool:
+        """Determines whether an event has handlers, e.g. to skip costly arguments."""
+        return bool(self.handlers[event])
+
+    def fire(self, player: str, target: Tuple[int], is_hit: bool):
+        """Emits a shot of a player at a tile."""
+        for handler in self.handlers["fire"]:
+            handler(player, target, is_hit)
+
+    def hit(self, player: str, target: Tuple[int]):
+        """Emits a shot of a player hitting a boat."""
+        for handler in self.handlers["hit"]:
+            handler(player, target)
+
+    def sunk(self, player: str, boat_size: int, tiles: List[Tuple[int]]):
+        """Emits a boat sunk by a player, given by its size and tiles."""
+        for handler in self.handlers["sunk"]:
+            handler(player, boat_size, tiles)
+
+    def turn_change(self, player: str):
+        """Emits the turn given to a player."""
+        for handler in self.handlers["turn_change"]:
+            handler(player)
+
+    def game_over(self, winner: str):
+        """Emits the end of the game and its winner."""
+        for handler in self.handlers["game_over"]:
+            handler(winner)
+
+
+def describe(
+    bus: EventBus, write: Callable[[str], None] = print
+) -> List[Tuple[str, Callable]]:
+    """
+    Subscribes handlers writing every event of a bus as a line of text, as shown by
+    game consoles.
+
+    Args:
+        bus: bus of the game.
+        write: function called with each line, print by default.
+
+    Returns:
+        Events and handlers subscribed, to unsubscribe them once the console is gone.
+    """
+    handlers = [
+        (
+            "fire",
+            lambda p, t, is_hit: write(
+                f"{p} fires at {t[0]}, {t[1]}: {'hit' if is_hit else 'miss'}"
+            ),
+        ),
+        ("sunk", lambda p, size, tiles: write(f"{p} sunk a boat of size {size}!")),
+        ("turn_change", lambda p: write(f"{p} to fire")),
+        ("game_over", lambda winner: write(f"Game is over! {winner} won!!!")),
+    ]
+    for event, handler in handlers:
+        bus.subscribe(event, handler)
+    return handlers
@@ -0,0 +1,371 @@
+"""
+Counting and feasibility of fleet layouts.
+
+A layout is a set of boat positions on the board, boats of the same size being
+interchangeable. Layouts are counted exactly by dynamic programming over the tiles of
+the board in row-major order (a "broken profile" DP): the state is what is known about
+the last tile processed in every column, plus the boats left to place. For boards too
+big for the exact count, estimate_layouts gives an unbiased estimate with its standard
+error, by sequential importance sampling.
+
+Feasibility is decided by an exact search for a single layout, memoizing dead ends,
+so that impossible configurations are rejected before random placement loops forever.
+"""
+
+from typing import Dict, List, Tuple
+import functools
+import math
+import numpy as np
+
+from battleship_engine import fleet_sizes
+
+# State of the last tile processed in a column: EMPTY, DONE (tile of a boat that does
+# not continue down or right) or a tuple (orientation, boat size, tiles placed so far)
+# for a boat that still needs more tiles.
+EMPTY = 0
+DONE = 1
+
+
+def count_layouts(board_size: int, boats: Dict, smart: bool = True) -> int:
+    """
+    Counts valid layouts of a fleet exactly. The classic fleet on a 10 x 10 board
+    takes about two minutes: use estimate_layouts for bigger boards or fleets.
+
+    Args:
+        board_size: size of the board, assumed to be square.
+        boats: dictionary where keys are boat size and values # of boats.
+        smart: if True, boats cannot be adjacent to one another.
+
+    Returns:
+        Number of distinct layouts, 0 if the fleet does not fit.
+    """
+    n = board_size
+    sizes = sorted(
+        (size for size, n_boats in boats.items() if n_boats > 0), reverse=True
+    )
+    if sizes and sizes[0] > n:
+        return 0
+
+    # States are packed into a single int: the code of the tile state of every
+    # column, then the boats left in mixed radix (one digit per boat size)
+    tile_states = [EMPTY, DONE] + [
+        (orientation, size, placed)
+        for size in sizes
+        for placed in range(1, size)
+        for orientation in ("V", "H")
+    ]
+    codes = {tile: code for code, tile in enumerate(tile_states)}
+    bits = (len(tile_states) - 1).bit_length()
+    mask = (1 << bits) - 1
+    radix = [1]
+    for size in sizes:
+        radix.append(radix[-1] * (boats[size] + 1))
+    fleet_shift = bits * n
+
+    @functools.lru_cache(maxsize=None)
+    def transitions(up: int, left: int, fleet: int, row: int, col: int) -> List:
+        """Lists (code of the tile, # boats placed of each size as a fleet delta)."""
+        left_boats = tuple(
+            fleet // radix[i] % (boats[size] + 1) for i, size in enumerate(sizes)
+        )
+        return [
+            (codes[tile], radix[sizes.index(size)] if size else 0)
+            for tile, size in _next_tiles(
+                tile_states[up],
+                tile_states[left],
+                left_boats,
+                sizes,
+                row,
+                col,
+                n,
+                smart,
+            )
+        ]
+
+    is_horizontal = [isinstance(tile, tuple) and tile[0] == "H" for tile in tile_states]
+    states = {(radix[-1] - 1) << fleet_shift: 1}  # All boats left, empty profile
+
+    for row in range(n):
+        for col in range(n):
+            shift = bits * col
+            new_states = {}
+            for key, ways in states.items():
+                up = (key >> shift) & mask
+                left = (key >> (shift - bits)) & mask if col > 0 else EMPTY
+                base = key & ~(mask << shift)
+                # Left tile is only needed as a tile above from now on: only whether
+                # it is empty matters, so horizontal boats are merged into DONE
+                if is_horizontal[left]:
+                    base = base & ~(mask << (shift - bits)) | DONE << (shift - bits)
+                for tile, placed in transitions(up, left, key >> fleet_shift, row, col):
+                    new_key = base | tile << shift
+                    new_key -= placed << fleet_shift
+                    new_states[new_key] = new_states.get(new_key, 0) + ways
+            states = new_states
+
+    # No boats left, and no boat expecting more tiles below the last row
+    return sum(
+        ways
+        for key, ways in states.items()
+        if key >> fleet_shift == 0
+        and all((key >> (bits * col)) & mask in (EMPTY, DONE) for col in range(n))
+    )
+
+
+def _next_tiles(
+    up, left, left_boats: Tuple[int], sizes: List[int], row, col, n, smart: bool
+) -> List:
+    """
+    Lists the possible states of the current tile, given the state of the tiles above
+    and to the left of it, with the size of the boat started on it (0 if none).
+    """
+    up_open = isinstance(up, tuple) and up[0] == "V"  # Boat must continue down
+    left_open = isinstance(left, tuple) and left[0] == "H"  # Boat must continue right
+    if up_open and left_open:
+        return []
+
+    if up_open or left_open:
+        orientation, size, placed = up if up_open else left
+        other = left if up_open else up
+        if smart and other != EMPTY:  # Another boat would be adjacent
+            return []
+        placed += 1
+        tiles_left = size - placed
+        if tiles_left > (n - 1 - row if up_open else n - 1 - col):
+            return []
+        return [((orientation, size, placed) if tiles_left else DONE, 0)]
+
+    options = [(EMPTY, 0)]
+    if smart and (up != EMPTY or left != EMPTY):
+        return options
+
+    for i, size in enumerate(sizes):
+        if left_boats[i] == 0:
+            continue
+        if size == 1:
+            options.append((DONE, size))
+            continue
+        if col + size <= n:
+            options.append((("H", size, 1), size))
+        if row + size <= n:
+            options.append((("V", size, 1), size))
+    return options
+
+
+def is_feasible(board_size: int, boats: Dict, smart: bool = True) -> bool:
+    """Determines whether a fleet fits on a board. See find_layout."""
+    return find_layout(board_size, boats, smart) is not None
+
+
+def find_layout(board_size: int, boats: Dict, smart: bool = True) -> np.array:
+    """
+    Finds a layout of a fleet by exact-cover style search: the first free tile (in
+    row-major order) either stays empty or is the top-left tile of one of the boats
+    left. All tiles before it are decided, so a state is fully described by the free
+    tiles and the boats left, and states known to be dead ends are memoized.
+
+    Args:
+        board_size: size of the board, assumed to be square.
+        boats: dictionary where keys are boat size and values # of boats.
+        smart: if True, boats cannot be adjacent to one another.
+
+    Returns:
+        Array with the id of the boat on each tile, -1 for water, as in
+        battleship_engine. None if the fleet does not fit.
+    """
+    n = board_size
+    sizes = sorted(
+        (size for size, n_boats in boats.items() if n_boats > 0), reverse=True
+    )
+    if sum(size * boats[size] for size in sizes) > n * n or (sizes and sizes[0] > n):
+        return None
+
+    # Bit masks of the tiles of every boat starting on every tile, and of the tiles
+    # blocked by it (its own tiles, plus adjacent ones if smart)
+    positions = {}
+    for row in range(n):
+        for col in range(n):
+            for size in sizes:
+                options = []
+                for d_row, d_col in [(0, 1), (1, 0)] if size > 1 else [(0, 1)]:
+                    tiles = [(row + i * d_row, col + i * d_col) for i in range(size)]
+                    if tiles[-1][0] >= n or tiles[-1][1] >= n:
+                        continue
+                    blocked = set(tiles)
+                    if smart:
+                        for x, y in tiles:
+                            for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+                                if 0 <= x + dx < n and 0 <= y + dy < n:
+                                    blocked.add((x + dx, y + dy))
+                    options.append((_to_mask(tiles, n), _to_mask(blocked, n), tiles))
+                positions[row * n + col, size] = options
+
+    dead_ends = set()
+    layout = []
+
+    def search(free: int, left_boats: Tuple[int]) -> bool:
+        """Places the boats left (# of boats of each size) on the free tiles."""
+        if not any(left_boats):
+            return True
+        if (free, left_boats) in dead_ends:
+            return False
+        tiles_left = sum(size * k for size, k in zip(sizes, left_boats))
+        if tiles_left > bin(free).count("1"):
+            dead_ends.add((free, left_boats))
+            return False
+
+        first = (free & -free).bit_length() - 1
+        for i, size in enumerate(sizes):
+            if left_boats[i] == 0:
+                continue
+            remaining = left_boats[:i] + (left_boats[i] - 1,) + left_boats[i + 1 :]
+            for tiles_mask, blocked_mask, tiles in positions[first, size]:
+                if tiles_mask & free != tiles_mask:
+                    continue
+                layout.append(tiles)
+                if search(free & ~blocked_mask, remaining):
+                    return True
+                layout.pop()
+        if search(free & ~(1 << first), left_boats):  # First free tile stays empty
+            return True
+        dead_ends.add((free, left_boats))
+        return False
+
+    fleet = tuple(boats[size] for size in sizes)
+    if not search((1 << (n * n)) - 1, fleet):
+        return None
+    boat_ids = np.full((n, n), -1, dtype=np.int16)
+    for boat_id, tiles in enumerate(sorted(layout, key=len, reverse=True)):
+        for tile in tiles:
+            boat_ids[tile] = boat_id
+    return boat_ids
+
+
+def _to_mask(tiles, n: int) -> int:
+    """Encodes tiles as a bit mask, one bit per tile in row-major order."""
+    mask = 0
+    for x, y in tiles:
+        mask |= 1 << (x * n + y)
+    return mask
+
+
+def estimate_layouts(
+    board_size: int,
+    boats: Dict,
+    smart: bool = True,
+    n_samples: int = 10000,
+    rng: np.random.Generator = None,
+    batch_tiles: int = 10**6,
+) -> Tuple[float, float]:
+    """
+    Estimates the number of layouts of a fleet by sequential importance sampling,
+    for boards too big for count_layouts. Boats are placed one by one, biggest first,
+    at a position drawn uniformly among the valid ones: the product of the number of
+    valid positions at every step, divided by the orderings of boats of the same
+    size, is an unbiased estimate of the number of layouts.
+
+    Args:
+        board_size: size of the board, assumed to be square.
+        boats: dictionary where keys are boat size and values # of boats.
+        smart: if True, boats cannot be adjacent to one another.
+        n_samples: number of layouts sampled.
+        rng: random generator. If None, a generator seeded from OS entropy.
+        batch_tiles: max. number of tiles of all layouts sampled at once, bounding
+            memory use on big boards.
+
+    Returns:
+        Estimate of the number of layouts, and its standard error.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    batch_size = max(1, batch_tiles // board_size**2)
+    weights = np.concatenate(
+        [
+            _sample_weights(
+                board_size, boats, smart, min(batch_size, n_samples - i), rng
+            )
+            for i in range(0, n_samples, batch_size)
+        ]
+    )
+    return float(weights.mean()), float(weights.std(ddof=1) / math.sqrt(n_samples))
+
+
+def _sample_weights(
+    n: int, boats: Dict, smart: bool, n_samples: int, rng: np.random.Generator
+) -> np.array:
+    """Samples layouts at once, see estimate_layouts. Returns their weights."""
+    occupied = np.zeros((n_samples, n, n), dtype=bool)
+    log_weight = np.zeros(n_samples)
+    alive = np.ones(n_samples, dtype=bool)
+    rows = np.arange(n_samples)
+
+    for size in fleet_sizes(boats):
+        blocked = occupied.copy()
+        if smart:
+            blocked[:, 1:, :] |= occupied[:, :-1, :]
+            blocked[:, :-1, :] |= occupied[:, 1:, :]
+            blocked[:, :, 1:] |= occupied[:, :, :-1]
+            blocked[:, :, :-1] |= occupied[:, :, 1:]
+
+        # Valid positions: windows of boat size without blocked tiles
+        windows = np.lib.stride_tricks.sliding_window_view
+        horizontal = ~windows(blocked, size, axis=2).any(axis=-1)
+        candidates = horizontal.reshape(n_samples, -1)
+        if size > 1:
+            vertical = ~windows(blocked, size, axis=1).any(axis=-1)
+            candidates = np.concatenate(
+                [candidates, vertical.reshape(n_samples, -1)], 1
+            )
+
+        # Uniform choice among valid positions: the k-th one, k drawn at random
+        n_valid = candidates.sum(axis=1)
+        alive &= n_valid > 0
+        log_weight += np.log(np.maximum(n_valid, 1))
+        k = (rng.random(n_samples) * n_valid).astype(np.int64)
+        choice = np.argmax(np.cumsum(candidates, axis=1) > k[:, None], axis=1)
+
+        n_horizontal = n * (n - size + 1)
+        is_vertical = choice >= n_horizontal
+        top = np.where(
+            is_vertical, (choice - n_horizontal) // n, choice // (n - size + 1)
+        )
+        left = np.where(
+            is_vertical, (choice - n_horizontal) % n, choice % (n - size + 1)
+        )
+        for i in range(size):
+            occupied[rows, top + i * is_vertical, left + i * ~is_vertical] |= alive
+
+    log_weight -= sum(math.lgamma(n_boats + 1) for n_boats in boats.values())
+    return np.where(alive, np.exp(log_weight), 0.0)
+
+
+if __name__ == "__main__":
+    import time
+
+    boats = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
+    smart = True
+    n_samples = 100000  # Layouts sampled on a 10 x 10 board
+    rng = np.random.default_rng(1)
+
+    for board_size in (6, 7, 8):
+        start = time.perf_counter()
+        n_layouts = count_layouts(board_size, boats, smart)
+        elapsed = time.perf_counter() - start
+        estimate, error = estimate_layouts(board_size, boats, smart, n_samples, rng)
+        print(
+            f"{board_size} x {board_size}: {n_layouts} layouts ({elapsed:.1f} s), "
+            f"estimated {estimate:.4g} +/- {error:.2g}"
+        )
+
+    for board_size in (10, 100):
+        samples = n_samples * 100 // board_size**2  # Same number of tiles sampled
+        estimate, error = estimate_layouts(board_size, boats, smart, samples, rng)
+        print(f"{board_size} x {board_size}: estimated {estimate:.4g} +/- {error:.2g}")
+
+    for board_size, fleet in [(10, {5: 12}), (10, {2: 25}), (10, {2: 26})]:
+        start = time.perf_counter()
+        feasible = is_feasible(board_size, fleet, smart)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{fleet} fits on {board_size} x {board_size}: {feasible} ({elapsed:.2f} s)"
+        )
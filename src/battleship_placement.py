@@ -0,0 +1,339 @@
+"""
+Adversarial placement of fleets against the shooting AIs.
+
+Boats are usually placed uniformly at random. Here layouts are searched by simulated
+annealing to maximize the number of shots a given AI needs to sink the whole fleet:
+at every step, several neighbours of the current layout (one boat moved or rotated)
+are scored in parallel, and the best of them replaces the current layout with the
+Metropolis rule.
+
+A layout is scored by the mean number of shots over many solo games of the AI against
+it. All layouts face the same random streams of the AI (same master seed and game
+indices), so that scores differ by the layout and not by the luck of the AI. Scores
+are cached by layout, as the search often comes back to layouts already scored.
+
+The best layouts found make a stress corpus for shooting AIs, and a "hard placement"
+for AI players in simulations, see battleship_sim.play_game.
+"""
+
+from concurrent.futures import Executor
+from typing import Dict, List, Tuple
+import math
+import numpy as np
+
+import battleship_ai
+import battleship_engine
+import battleship_rng
+import battleship_sim
+
+
+def shots_to_sink(
+    AI_mode: str,
+    boat_ids: np.array,
+    seed: int,
+    game_index: int,
+    params: battleship_ai.HardParams = None,
+) -> int:
+    """
+    Plays a solo game of an AI against a fixed layout, with the random stream of the
+    first player of a game of battleship_sim.
+
+    Args:
+        AI_mode: one of battleship_sim.AI_MODES.
+        boat_ids: layout fired at, see battleship_engine.Board.
+        seed: master seed of the batch of games.
+        game_index: index of the game within the batch.
+        params: heuristics of the hard AI, see battleship_ai.HardParams. If None,
+            the defaults.
+
+    Returns:
+        Number of shots fired to sink all boats.
+    """
+    rng = battleship_rng.game_generators(seed, game_index)[2]  # moves_p1
+    board = battleship_engine.Board(boat_ids)
+    clusters = battleship_ai.HitClusters()
+    tracker = battleship_ai.FleetTracker.from_sizes(board.boat_sizes)
+    shots = 0
+    while not board.is_over():
+        target = battleship_sim.choose_target(
+            AI_mode,
+            board.to_array(),
+            board.board_size,
+            int(board.alive_sizes().max()),
+            rng,
+            clusters,
+            board.unexplored,
+            board.alive_sizes(),
+            params,
+            tracker,
+        )
+        is_hit, sunk_id = board.fire(*target)
+        hit_tiles = [target] if is_hit and sunk_id < 0 else []
+        battleship_sim.update_clusters(
+            clusters, board, hit_tiles, [sunk_id] if sunk_id >= 0 else []
+        )
+        if sunk_id >= 0:
+            tracker.sink(int(board.boat_sizes[sunk_id]))
+        shots += 1
+    return shots
+
+
+def score_layouts(
+    AI_mode: str, layouts: List[np.array], seed: int, game_indices: List[int]
+) -> List[float]:
+    """Returns the mean shots_to_sink of each layout. Suited to process pools."""
+    return [
+        float(np.mean([shots_to_sink(AI_mode, layout, seed, i) for i in game_indices]))
+        for layout in layouts
+    ]
+
+
+def layout_key(boat_ids: np.array) -> bytes:
+    """Returns a key of a layout, the same whatever the ids given to its boats."""
+    ids = boat_ids.ravel()
+    firsts = np.unique(ids[ids >= 0], return_index=True)[1]
+    order = np.full(ids.max() + 2, -1, dtype=np.int16)
+    order[ids[np.sort(firsts)]] = np.arange(len(firsts))
+    return order[ids].tobytes()
+
+
+def move_boat(
+    boat_ids: np.array, rng: np.random.Generator, smart: bool = True
+) -> np.array:
+    """
+    Returns a neighbour of a layout: one boat, drawn at random, moved to a position
+    drawn uniformly among its valid ones, in either orientation.
+
+    Args:
+        boat_ids: layout, see battleship_engine.Board. Not modified.
+        rng: random generator.
+        smart: if True, boats cannot be adjacent to one another.
+
+    Returns:
+        The new layout, the same as the old one if the boat is drawn at its own
+        position.
+    """
+    new_ids = boat_ids.copy()
+    boat_id = rng.integers(0, boat_ids.max() + 1)
+    size = int((boat_ids == boat_id).sum())
+    new_ids[new_ids == boat_id] = -1
+
+    blocked = new_ids >= 0
+    if smart:
+        occupied = blocked.copy()
+        blocked[1:, :] |= occupied[:-1, :]
+        blocked[:-1, :] |= occupied[1:, :]
+        blocked[:, 1:] |= occupied[:, :-1]
+        blocked[:, :-1] |= occupied[:, 1:]
+
+    windows = np.lib.stride_tricks.sliding_window_view
+    horizontal = np.argwhere(~windows(blocked, size, axis=1).any(axis=-1))
+    vertical = np.argwhere(~windows(blocked, size, axis=0).any(axis=-1))
+    positions = [(x, y, False) for x, y in horizontal]
+    if size > 1:
+        positions += [(x, y, True) for x, y in vertical]
+    x, y, is_vertical = positions[rng.integers(0, len(positions))]
+    if is_vertical:
+        new_ids[x : x + size, y] = boat_id
+    else:
+        new_ids[x, y : y + size] = boat_id
+    return new_ids
+
+
+class PlacementOptimizer:
+    """
+    Simulated annealing of fleet layouts against an AI, with a cache of the scores
+    of layouts already evaluated.
+    """
+
+    def __init__(
+        self,
+        AI_mode: str,
+        board_size: int,
+        boats: Dict,
+        seed: int,
+        n_games: int = 200,
+        smart: bool = True,
+        pool: Executor = None,
+    ):
+        """
+        Instantiates the optimizer.
+
+        Args:
+            AI_mode: AI the layouts are optimized against, one of
+                battleship_sim.AI_MODES.
+            board_size: size of the board, assumed to be square.
+            boats: dictionary where keys are boat size and values # of boats.
+            seed: master seed of the games scoring every layout.
+            n_games: number of games scoring every layout.
+            smart: if True, boats cannot be adjacent to one another.
+            pool: process pool scoring layouts. If None, layouts are scored in this
+                process.
+        """
+        self.AI_mode = AI_mode
+        self.board_size = board_size
+        self.boats = boats
+        self.seed = seed
+        self.n_games = n_games
+        self.smart = smart
+        self.pool = pool
+        self.scores = {}  # Layout key to score
+        self.hits = 0
+        self.misses = 0
+
+    def score(self, layouts: List[np.array]) -> List[float]:
+        """Returns the mean shots the AI needs to sink each layout."""
+        keys = [layout_key(layout) for layout in layouts]
+        new = {}  # Layouts not scored yet, by key
+        for key, layout in zip(keys, layouts):
+            if key in self.scores or key in new:
+                self.hits += 1
+            else:
+                self.misses += 1
+                new[key] = layout
+
+        games = range(self.n_games)
+        if self.pool is None:
+            for key, layout in new.items():
+                self.scores[key] = score_layouts(
+                    self.AI_mode, [layout], self.seed, games
+                )[0]
+        else:  # One task per layout
+            futures = {
+                key: self.pool.submit(
+                    score_layouts, self.AI_mode, [layout], self.seed, games
+                )
+                for key, layout in new.items()
+            }
+            for key, future in futures.items():
+                self.scores[key] = future.result()[0]
+        return [self.scores[key] for key in keys]
+
+    def anneal(
+        self,
+        rng: np.random.Generator,
+        n_steps: int = 100,
+        n_proposals: int = 8,
+        temperature: Tuple[float] = (2.0, 0.05),
+        layout: np.array = None,
+    ) -> Tuple[np.array, float]:
+        """
+        Searches a layout maximizing the shots the AI needs to sink it.
+
+        Args:
+            rng: random generator of the search.
+            n_steps: number of annealing steps.
+            n_proposals: neighbours scored in parallel at every step.
+            temperature: temperature at the first and last step, in shots. It
+                decreases geometrically in between.
+            layout: starting layout. If None, a random one.
+
+        Returns:
+            The best layout found and its score.
+        """
+        if layout is None:
+            layout = battleship_engine.place_fleet(
+                self.board_size, self.boats, rng, self.smart
+            )
+        score = self.score([layout])[0]
+        best, best_score = layout, score
+        t_start, t_end = temperature
+
+        for step in range(n_steps):
+            t = t_start * (t_end / t_start) ** (step / max(n_steps - 1, 1))
+            proposals = [move_boat(layout, rng, self.smart) for _ in range(n_proposals)]
+            scores = self.score(proposals)
+            i = int(np.argmax(scores))
+            if scores[i] >= score or rng.random() < math.exp((scores[i] - score) / t):
+                layout, score = proposals[i], scores[i]
+            if score > best_score:
+                best, best_score = layout, score
+        return best, best_score
+
+    def stats(self) -> Dict:
+        """Returns hits, misses and hit rate of the cache of scores."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.scores),
+        }
+
+
+def build_corpus(
+    optimizer: PlacementOptimizer,
+    n_layouts: int,
+    rng: np.random.Generator,
+    **anneal_kwargs,
+) -> Tuple[np.array, np.array]:
+    """
+    Builds a stress corpus of hard layouts, each from its own annealing run.
+
+    Args:
+        optimizer: optimizer of layouts against an AI.
+        n_layouts: number of layouts in the corpus.
+        rng: random generator of the searches.
+        anneal_kwargs: arguments of PlacementOptimizer.anneal.
+
+    Returns:
+        Layouts, stacked in an array of shape (n_layouts, board_size, board_size),
+        and their scores.
+    """
+    runs = [optimizer.anneal(rng, **anneal_kwargs) for _ in range(n_layouts)]
+    layouts, scores = zip(*runs)
+    return np.stack(layouts), np.array(scores)
+
+
+def save_corpus(path: str, layouts: np.array):
+    """Saves a corpus of layouts as a .npy file."""
+    np.save(path, layouts)
+
+
+def load_corpus(path: str) -> np.array:
+    """Loads a corpus of layouts saved with save_corpus."""
+    return np.load(path)
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ProcessPoolExecutor
+    import time
+
+    boats = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
+    board_size = 10
+    AI_mode = "standard"  # AI the layouts are optimized against
+    seed = 1
+    n_games = 100  # Games scoring every layout
+    n_steps = 50
+    n_proposals = 8
+    n_layouts = 2  # Layouts in the stress corpus
+    n_random = 8  # Random layouts, for comparison
+    rng = np.random.default_rng(1)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor() as pool:
+        optimizer = PlacementOptimizer(
+            AI_mode, board_size, boats, seed, n_games, pool=pool
+        )
+        random_layouts = battleship_engine.place_fleets(
+            n_random, board_size, boats, rng
+        )
+        random_score = np.mean(optimizer.score(list(random_layouts)))
+        layouts, scores = build_corpus(
+            optimizer, n_layouts, rng, n_steps=n_steps, n_proposals=n_proposals
+        )
+    print(f"Search took {time.perf_counter() - start:.1f} s, {optimizer.stats()}")
+    print(f"{AI_mode} AI needs {random_score:.1f} shots on random layouts")
+    print(f"{AI_mode} AI needs {np.round(scores, 1)} shots on optimized layouts")
+
+    # Scores on fresh games, as optimized scores are biased upwards by selection
+    fresh = range(n_games, 2 * n_games)
+    for mode in battleship_sim.AI_MODES:
+        print(
+            f"{mode} AI on fresh games: "
+            f"{np.mean(score_layouts(mode, list(random_layouts), seed, fresh)):.1f} "
+            f"shots on random layouts, "
+            f"{np.mean(score_layouts(mode, list(layouts), seed, fresh)):.1f} "
+            f"on optimized layouts"
+        )
+    print(f"Best layout:\n{layouts[np.argmax(scores)]}")
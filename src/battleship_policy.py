@@ -0,0 +1,487 @@
+"""
+Learned targeting policy, trained offline on simulated games.
+
+A small convolutional network maps what a player knows about the enemy board (state of
+every tile, and boats not sunk yet of each size) to the probability that each tile
+holds a boat. Each tile is scored from the 3 x 3 patch around it, described by the
+state of its tiles and by how many positions of the boats not sunk cover them (see
+coverage). The policy fires at the unexplored tile most likely to hold a boat.
+
+It is trained by supervised learning on states of games played in a
+battleship_env.BattleshipVecEnv, where the hidden boats give the labels. States are
+collected with the policy being trained (plus some random shots), so that it learns
+on the states it will actually face.
+
+Inference is pure NumPy and batched: a single forward pass chooses the targets of
+many games at once, see play_batch. Weights are tied to a board size and a fleet, and
+saved as .npz files.
+"""
+
+from typing import Dict, List, Tuple
+import os
+import numpy as np
+
+import battleship_ai
+import battleship_engine
+import battleship_rng
+from battleship_engine import UNEXPLORED
+from battleship_env import BattleshipVecEnv
+
+# Weights trained for the classic board and fleet, see __main__
+DEFAULT_WEIGHTS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "resources", "policy.npz"
+)
+SYMBOL_CODES = {symbol: code for code, symbol in enumerate(battleship_engine.SYMBOLS)}
+
+
+class Policy:
+    """
+    Small convolutional network scoring every tile of a batch of boards: the same
+    perceptron scores every tile from the features of the 3 x 3 patch around it.
+    """
+
+    def __init__(
+        self,
+        board_size: int,
+        boats: Dict,
+        hidden: Tuple[int] = (64, 32),
+        rng: np.random.Generator = None,
+    ):
+        """
+        Instantiates a policy with random weights.
+
+        Args:
+            board_size: size of the board, assumed to be square.
+            boats: dictionary where keys are boat size and values # of boats.
+            hidden: number of units of each hidden layer.
+            rng: random generator of the initial weights.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        self.board_size = board_size
+        self.boats = boats
+        self.sizes = np.array(sorted(boats))  # Distinct boat sizes
+        self.n_channels = 4 + 3 * len(self.sizes) + 1  # See features
+        layers = [9 * self.n_channels, *hidden, 1]
+        self.weights = [
+            (rng.standard_normal((n_in, n_out)) * np.sqrt(2 / n_in)).astype(np.float32)
+            for n_in, n_out in zip(layers[:-1], layers[1:])
+        ]
+        self.biases = [np.zeros(n_out, dtype=np.float32) for n_out in layers[1:]]
+
+    def features(self, obs: np.array, alive: np.array) -> np.array:
+        """
+        Encodes a batch of states as inputs of the network, one row per tile.
+
+        Args:
+            obs: int8 array of shape (B, board_size, board_size), encoded as in
+                battleship_engine.
+            alive: array of shape (B, len(sizes)), number of boats not sunk of each
+                size in sizes.
+
+        Returns:
+            float32 array of shape (B * n_tiles, n_inputs): channels of the 3 x 3
+            patch around every tile, zero outside the board. Channels are the
+            one-hot state of the tile, for every boat size the coverage of the tile
+            (see coverage) by all positions and by positions through a hit tile and
+            the share of boats of that size not sunk, and 1 on the board.
+        """
+        n_boards, n, _ = obs.shape
+        counts = np.array([self.boats[size] for size in self.sizes], dtype=np.float32)
+        alive = (alive / counts).astype(np.float32)
+
+        # Channels of every tile, framed by a border of zeros
+        grid = np.zeros((n_boards, n + 2, n + 2, self.n_channels), dtype=np.float32)
+        channels = grid[:, 1:-1, 1:-1]
+        for code in range(4):
+            channels[..., code] = obs == code
+        for i, size in enumerate(self.sizes):
+            share = alive[:, i, None, None]
+            total, through_hit = coverage(obs, size)
+            channels[..., 4 + 3 * i] = total * share / size
+            channels[..., 5 + 3 * i] = through_hit * share / size
+            channels[..., 6 + 3 * i] = share
+        channels[..., -1] = 1.0
+
+        patches = [grid[:, i : i + n, j : j + n] for i in range(3) for j in range(3)]
+        return np.concatenate(patches, -1).reshape(n_boards * n * n, -1)
+
+    def forward(self, x: np.array, keep: bool = False) -> Tuple[np.array, List]:
+        """Returns logits of rows of features, and activations of every layer if keep."""
+        activations = [x]
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            x = x @ w + b
+            if i < len(self.weights) - 1:
+                np.maximum(x, 0, out=x)  # ReLU
+            if keep:
+                activations.append(x)
+        return x, activations
+
+    def logits(self, obs: np.array, alive: np.array) -> np.array:
+        """Returns logits of every tile, of shape (B, n_tiles). See features."""
+        return self.forward(self.features(obs, alive))[0].reshape(len(obs), -1)
+
+    def probabilities(self, obs: np.array, alive: np.array) -> np.array:
+        """
+        Returns the probability that each tile holds a boat, -1 for explored tiles,
+        as an array of shape (B, n_tiles). See features for arguments.
+        """
+        probs = 1 / (1 + np.exp(-self.logits(obs, alive)))
+        probs[obs.reshape(len(obs), -1) != UNEXPLORED] = -1.0
+        return probs
+
+    def choose(self, obs: np.array, alive: np.array) -> np.array:
+        """
+        Chooses the target of every board of a batch in a single forward pass.
+
+        Args:
+            obs: observations, see features.
+            alive: boats not sunk, see features.
+
+        Returns:
+            Flat index of the tile to fire at on every board, always unexplored.
+        """
+        logits = self.logits(obs, alive)
+        logits[obs.reshape(len(obs), -1) != UNEXPLORED] = -np.inf
+        return np.argmax(logits, axis=1)
+
+    def check_fits(self, board_size: int, alive_sizes: List[int]):
+        """
+        Checks that the policy was trained for a board and its boats not sunk.
+
+        Args:
+            board_size: size of the board, assumed to be square.
+            alive_sizes: sizes of boats not sunk.
+
+        Raises:
+            ValueError: if the policy was trained on another board size, or if boats
+                not sunk are not part of the fleet it was trained for.
+        """
+        if board_size != self.board_size:
+            raise ValueError(
+                f"Policy trained on boards of size {self.board_size}, got {board_size}"
+            )
+        sizes, counts = np.unique(
+            np.asarray(alive_sizes, dtype=int), return_counts=True
+        )
+        for size, n in zip(sizes, counts):
+            if n > self.boats.get(int(size), 0):
+                raise ValueError(
+                    f"Policy trained for fleet {self.boats}, got boats of sizes "
+                    f"{sorted(int(size) for size in alive_sizes)} not sunk"
+                )
+
+    def save(self, path: str):
+        """Saves the weights and the fleet they were trained for."""
+        arrays = {f"w{i}": w for i, w in enumerate(self.weights)}
+        arrays.update({f"b{i}": b for i, b in enumerate(self.biases)})
+        fleet = np.array([[size, n] for size, n in sorted(self.boats.items())])
+        np.savez(path, board_size=self.board_size, fleet=fleet, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "Policy":
+        """Loads a policy saved with save."""
+        data = np.load(path)
+        boats = {int(size): int(n) for size, n in data["fleet"]}
+        policy = cls(int(data["board_size"]), boats, hidden=())
+        n_layers = sum(name.startswith("w") for name in data.files)
+        policy.weights = [data[f"w{i}"] for i in range(n_layers)]
+        policy.biases = [data[f"b{i}"] for i in range(n_layers)]
+        return policy
+
+
+def coverage(obs: np.array, size: int) -> Tuple[np.array]:
+    """
+    Counts the positions of a boat of a given size that cover every tile, on a batch
+    of observations. Positions cannot include explored water, sunk tiles or tiles next
+    to a sunk boat.
+
+    Returns:
+        float32 arrays of the shape of obs: number of positions covering each tile,
+        and number of those positions going through at least one hit tile.
+    """
+    blocked = (obs == battleship_engine.WATER) | (obs == battleship_engine.SUNK)
+    sunk = obs == battleship_engine.SUNK
+    blocked[:, 1:, :] |= sunk[:, :-1, :]
+    blocked[:, :-1, :] |= sunk[:, 1:, :]
+    blocked[:, :, 1:] |= sunk[:, :, :-1]
+    blocked[:, :, :-1] |= sunk[:, :, 1:]
+    hit = obs == battleship_engine.HIT
+
+    total = np.zeros(obs.shape, dtype=np.float32)
+    through_hit = np.zeros(obs.shape, dtype=np.float32)
+    for axis in (1, 2) if size > 1 else (1,):
+        # Boards with the axis of the boat last, as views
+        blocked_t, hit_t = blocked.swapaxes(axis, -1), hit.swapaxes(axis, -1)
+        valid = window_sums(blocked_t, size) == 0
+        with_hit = valid & (window_sums(hit_t, size) > 0)
+        for starts, cover in ((valid, total), (with_hit, through_hit)):
+            cover.swapaxes(axis, -1)[...] += cover_counts(starts, size)
+    return total, through_hit
+
+
+def window_sums(a: np.array, size: int) -> np.array:
+    """
+    Sums every window of size consecutive elements along the last axis, from
+    cumulative sums: few NumPy calls, as boards are small.
+    """
+    cumsum = np.cumsum(a, axis=-1, dtype=np.int32)
+    sums = cumsum[..., size - 1 :].copy()
+    sums[..., 1:] -= cumsum[..., :-size]
+    return sums
+
+
+def cover_counts(starts: np.array, size: int) -> np.array:
+    """
+    Counts, for every tile along the last axis, the boat positions covering it given
+    where positions start: tile i is covered by positions starting at i - size + 1
+    to i.
+    """
+    n_starts = starts.shape[-1]
+    n = n_starts + size - 1
+    cumsum = np.cumsum(starts, axis=-1, dtype=np.int32)
+    tiles = np.arange(n)
+    counts = cumsum[..., np.minimum(tiles, n_starts - 1)]
+    counts[..., size:] -= cumsum[..., : n - size]
+    return counts
+
+
+def alive_counts(policy: Policy, alive_sizes: List[int]) -> np.array:
+    """Counts boats not sunk of each size of a policy, e.g. from Board.alive_sizes."""
+    return np.array([[np.sum(np.equal(alive_sizes, size)) for size in policy.sizes]])
+
+
+_loaded = {}  # Path to policy, loaded once per process
+
+
+def load_policy(path: str = DEFAULT_WEIGHTS) -> Policy:
+    """Returns the policy saved at path, loading it on first use."""
+    if path not in _loaded:
+        _loaded[path] = Policy.load(path)
+    return _loaded[path]
+
+
+def learned_AI(
+    enemy_array: np.array,
+    board_size: int,
+    alive_sizes: List[int],
+    policy: Policy = None,
+) -> Tuple[int]:
+    """
+    Learned AI, firing at the unexplored tile most likely to hold a boat.
+
+    Args:
+        enemy_array: a numpy array representing a board, as for the other AIs.
+        board_size: size of the board, assumed to be square.
+        alive_sizes: sizes of enemy boats not sunk.
+        policy: trained policy. If None, the default one, see DEFAULT_WEIGHTS.
+
+    Returns:
+        2D coordinates of the tile to fire at.
+
+    Raises:
+        ValueError: if the policy was not trained for the board and fleet, see
+            Policy.check_fits.
+    """
+    policy = policy if policy is not None else load_policy()
+    policy.check_fits(board_size, alive_sizes)
+    tile = policy.choose(to_obs(enemy_array), alive_counts(policy, alive_sizes))[0]
+    return divmod(int(tile), board_size)
+
+
+def learned_salvo_AI(
+    enemy_array: np.array,
+    board_size: int,
+    k: int,
+    alive_sizes: List[int],
+    policy: Policy = None,
+) -> List[Tuple[int]]:
+    """Salvo version of learned_AI, fires at the k tiles most likely to hold a boat."""
+    policy = policy if policy is not None else load_policy()
+    policy.check_fits(board_size, alive_sizes)
+    probs = policy.probabilities(to_obs(enemy_array), alive_counts(policy, alive_sizes))
+    return battleship_ai.top_k_tiles(probs.reshape(enemy_array.shape), k)
+
+
+def to_obs(enemy_array: np.array) -> np.array:
+    """Encodes an array understood by AIs as a batch of one observation."""
+    return np.vectorize(SYMBOL_CODES.get, otypes=[np.int8])(enemy_array)[None]
+
+
+def env_alive(env: BattleshipVecEnv, policy: Policy) -> np.array:
+    """Returns boats not sunk of each size of the policy, on every board of env."""
+    alive = env.alive_boats()
+    return np.stack(
+        [alive[:, env.boat_sizes == size].sum(1) for size in policy.sizes], 1
+    )
+
+
+def play_batch(policy: Policy, n_games: int, seed: int) -> np.array:
+    """
+    Plays solo games of the policy all at once, one forward pass per shot.
+
+    Args:
+        policy: trained policy.
+        n_games: number of games to play.
+        seed: master seed of the boards.
+
+    Returns:
+        Number of shots needed to sink all boats, per game.
+    """
+    env = BattleshipVecEnv(n_games, policy.board_size, policy.boats, seed=seed)
+    obs = env.reset()
+    shots = np.zeros(n_games, dtype=np.int32)
+    is_over = np.zeros(n_games, dtype=bool)
+    while not is_over.all():  # Games over are set again by env, and ignored
+        obs, _, dones, info = env.step(policy.choose(obs, env_alive(env, policy)))
+        first = dones & ~is_over
+        shots[first] = info["episode_shots"][first]
+        is_over |= dones
+    return shots
+
+
+def train_policy(
+    board_size: int,
+    boats: Dict,
+    seed: int,
+    n_rounds: int = 16,
+    n_envs: int = 512,
+    n_steps: int = 100,
+    n_epochs: int = 2,
+    batch_size: int = 256,
+    learning_rate: float = 1e-3,
+    epsilon: float = 0.1,
+    policy: Policy = None,
+) -> Policy:
+    """
+    Trains a policy to predict where boats are, on states of its own games.
+
+    Every round plays n_steps shots on n_envs boards with the policy (a random shot
+    with probability epsilon), then fits the policy with Adam on the states seen in
+    the round, minimizing the cross-entropy of the boat on unexplored tiles.
+
+    Args:
+        board_size: size of the board, assumed to be square.
+        boats: dictionary where keys are boat size and values # of boats.
+        seed: master seed of the boards and initial weights.
+        n_rounds: number of rounds of playing and fitting.
+        n_envs: number of games played at once.
+        n_steps: shots per game and round.
+        n_epochs: passes over the states of a round.
+        batch_size: states per gradient step.
+        learning_rate: step size of Adam.
+        epsilon: probability of a random shot while playing.
+        policy: policy to train further. If None, a new one.
+
+    Returns:
+        The trained policy.
+    """
+    rng = battleship_rng.worker_generator(seed, 0)
+    if policy is None:
+        policy = Policy(board_size, boats, rng=rng)
+    params = policy.weights + policy.biases
+    moments = [(np.zeros_like(p), np.zeros_like(p)) for p in params]
+    beta1, beta2, t = 0.9, 0.999, 0
+
+    env = BattleshipVecEnv(n_envs, board_size, boats, seed=seed, worker_index=1)
+    obs = env.reset()
+    for _ in range(n_rounds):
+        # Play, keeping every state and where boats are
+        states, alives, labels = [], [], []
+        for _ in range(n_steps):
+            alive = env_alive(env, policy)
+            states.append(obs.copy())
+            alives.append(alive)
+            labels.append(env.boat_mask().reshape(n_envs, -1))
+            actions = policy.choose(obs, alive)
+            explore = rng.random(n_envs) < epsilon
+            random_actions = np.argmax(
+                np.where(env.action_mask, rng.random(env.action_mask.shape), -1), 1
+            )
+            actions[explore] = random_actions[explore]
+            obs, _, _, _ = env.step(actions)
+
+        states, alives = np.concatenate(states), np.concatenate(alives)
+        labels = np.concatenate(labels).astype(np.float32)
+
+        # Fit, encoding states batch by batch as there is one row per tile
+        for _ in range(n_epochs):
+            order = rng.permutation(len(states))
+            for start in range(0, len(states), batch_size):
+                batch = order[start : start + batch_size]
+                x = policy.features(states[batch], alives[batch])
+                y = labels[batch].reshape(-1, 1)
+                unexplored = states[batch].reshape(-1, 1) == UNEXPLORED
+                grads = _gradients(policy, x, y, unexplored)
+                t += 1
+                for p, g, (m, v) in zip(params, grads, moments):
+                    m *= beta1
+                    m += (1 - beta1) * g
+                    v *= beta2
+                    v += (1 - beta2) * g * g
+                    m_hat = m / (1 - beta1**t)
+                    v_hat = v / (1 - beta2**t)
+                    p -= learning_rate * m_hat / (np.sqrt(v_hat) + 1e-8)
+    return policy
+
+
+def _gradients(
+    policy: Policy, x: np.array, y: np.array, mask: np.array
+) -> List[np.array]:
+    """
+    Returns gradients of the sigmoid cross-entropy on masked tiles, for weights then
+    biases of every layer.
+    """
+    logits, activations = policy.forward(x, keep=True)
+    probs = 1 / (1 + np.exp(-logits))
+    delta = (probs - y) * mask / max(mask.sum(), 1)
+
+    grads_w, grads_b = [], []
+    for i in reversed(range(len(policy.weights))):
+        grads_w.append(activations[i].T @ delta)
+        grads_b.append(delta.sum(0))
+        if i > 0:
+            delta = (delta @ policy.weights[i].T) * (activations[i] > 0)
+    return grads_w[::-1] + grads_b[::-1]
+
+
+if __name__ == "__main__":
+    import time
+    import battleship_placement
+
+    boats = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
+    board_size = 10
+    seed = 1
+    n_rounds = 16  # Rounds of training, about 35 s each on a single core
+    n_games = 1000  # Games to evaluate the policy batched
+    n_games_solo = 100  # Games to compare AIs one move at a time, much slower
+    retrain = False  # If False, the default weights are evaluated if they exist
+
+    if retrain or not os.path.exists(DEFAULT_WEIGHTS):
+        start = time.perf_counter()
+        policy = train_policy(board_size, boats, seed, n_rounds)
+        policy.save(DEFAULT_WEIGHTS)
+        print(f"Trained in {time.perf_counter() - start:.0f} s")
+    policy = load_policy()
+
+    start = time.perf_counter()
+    shots = play_batch(policy, n_games, seed=seed + 1)
+    elapsed = time.perf_counter() - start
+    print(
+        f"learned AI batched: {shots.mean():.1f} shots to sink all boats, "
+        f"{elapsed / shots.sum() * 1e6:.1f} us per move"
+    )
+
+    boards = battleship_engine.place_fleets(
+        n_games_solo, board_size, boats, np.random.default_rng(seed + 1)
+    )
+    for AI_mode in ("learned", "hard"):
+        start = time.perf_counter()
+        shots = [
+            battleship_placement.shots_to_sink(AI_mode, board, seed, i)
+            for i, board in enumerate(boards)
+        ]
+        elapsed = time.perf_counter() - start
+        print(
+            f"{AI_mode} AI one move at a time: {np.mean(shots):.1f} shots to sink "
+            f"all boats, {elapsed / np.sum(shots) * 1e6:.0f} us per move"
+        )
@@ -0,0 +1,35 @@
+"""Adapters between the PyQt boards of battleship_ui and the arrays used by AIs."""
+
+# pylint: disable=no-name-in-module
+from PyQt5.QtWidgets import QGridLayout
+import numpy as np
+
+
+def board_to_array(board: QGridLayout, board_size: int) -> np.array:
+    """
+    Transforms a GUI board into a numpy array.
+
+    Args:
+        board: pyqt grid layout representing the GUI battleship board.
+        board_size: size of the board, assumed to be square.
+
+    Returns:
+        Array equivalent to the GUI board, where:
+            'x' are unexplored tiles
+            'w' are explored water tiles
+            'h' are explored hit tiles
+            's' are explored sunk tiles
+    """
+    array = np.empty((board_size, board_size), dtype="str")
+    for i in range(board_size):
+        for j in range(board_size):
+            sq = board.itemAtPosition(i, j).widget()
+            if not sq.is_hit:
+                array[i, j] = "x"
+            elif not sq.has_boat:
+                array[i, j] = "w"
+            elif not sq.is_sunk:
+                array[i, j] = "h"
+            else:
+                array[i, j] = "s"
+    return array
@@ -0,0 +1,186 @@
+"""
+GUI of battleship with the game engine and the AIs running in a child process. This is
+the maintained GUI: new features go here rather than in battleship_ui, whose engine
+and AIs share the GUI process.
+
+The engine process (see battleship_server) publishes the state of the game in shared
+memory, which the GUI maps read-only. Every new state is notified through a pipe,
+watched by the Qt event loop, upon which the GUI copies the state and repaints.
+Clicks on the enemy board are sent back to the engine over a queue. However long
+the AIs think, the GUI process only paints and forwards clicks, so it stays
+responsive.
+
+The human player, if any, is player 1 and fires on the board of player 2, whose boats
+are hidden until the game is over.
+"""
+
+# pylint: disable=no-name-in-module
+from typing import Dict, Tuple
+import multiprocessing
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QMainWindow, QHBoxLayout, QVBoxLayout, QLabel
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtCore import QSocketNotifier, pyqtSignal
+
+import battleship_server
+from battleship_spectator import BoardView
+
+
+class ClickableBoardView(BoardView):
+    """A board painted from arrays, emitting the tiles clicked."""
+
+    clicked = pyqtSignal(int, int)
+
+    def mouseReleaseEvent(self, event: QMouseEvent):
+        """Standard PyQt function triggered on mouse release."""
+        row, col = event.y() // self.tile_size, event.x() // self.tile_size
+        if 0 <= row < self.board_size and 0 <= col < self.board_size:
+            self.clicked.emit(row, col)
+
+
+class RemoteWindow(QMainWindow):
+    """Window showing a game played by an engine process."""
+
+    def __init__(
+        self,
+        AI_modes: Tuple[str],
+        board_size: int,
+        boats: Dict,
+        seed: int,
+        delay_AI: float = 0.1,
+        *args,
+        **kwargs,
+    ):
+        """
+        Instantiates the window and starts the engine process.
+
+        Args:
+            AI_modes: AI mode of each player, one of battleship_sim.AI_MODES, or
+                battleship_server.HUMAN for player 1.
+            board_size: size of the board, assumed to be square.
+            boats: dictionary where keys are boat size and values # of boats.
+            seed: master seed of the game, see battleship_rng.
+            delay_AI: seconds between AI shots.
+
+        Raises:
+            ValueError: if AI_modes are invalid, see battleship_server.check_AI_modes.
+        """
+        battleship_server.check_AI_modes(AI_modes)  # Before the engine process starts
+        super().__init__(*args, **kwargs)
+        self.AI_modes = AI_modes
+        self.board_size = board_size
+        self.state = None  # Last state copied from shared memory
+        self.hidden = np.full((board_size, board_size), -1, dtype=np.int8)
+
+        self.setWindowTitle("Battleship")
+        self.boards = [
+            ClickableBoardView(board_size),
+            ClickableBoardView(board_size),
+        ]
+        self.boards[1].clicked.connect(self.fire)
+        self.titles = [QLabel(), QLabel()]
+        self.status = QLabel()
+        hb = QHBoxLayout()
+        for player in range(2):
+            vb = QVBoxLayout()
+            vb.addWidget(self.titles[player])
+            vb.addWidget(self.boards[player])
+            hb.addLayout(vb)
+        vb = QVBoxLayout()
+        vb.addLayout(hb)
+        vb.addWidget(self.status)
+        w = QWidget()
+        w.setLayout(vb)
+        self.setCentralWidget(w)
+
+        # Spawned rather than forked, so that the engine does not inherit Qt
+        context = multiprocessing.get_context("spawn")
+        self.shared = battleship_server.SharedState(board_size, read_only=True)
+        self.notifications, notify = context.Pipe(duplex=False)
+        self.commands = context.Queue()
+        self.engine = context.Process(
+            target=battleship_server.serve_game,
+            args=(
+                self.shared.name,
+                notify,
+                self.commands,
+                AI_modes,
+                board_size,
+                boats,
+                seed,
+                delay_AI,
+            ),
+            daemon=True,
+        )
+        self.engine.start()
+        notify.close()
+        self.notifier = QSocketNotifier(
+            self.notifications.fileno(), QSocketNotifier.Read, self
+        )
+        self.notifier.activated.connect(self.on_notification)
+        self.show()
+
+    def on_notification(self):
+        """Copies the latest state published by the engine and repaints."""
+        try:
+            while self.notifications.poll():  # Only the latest state is shown
+                self.notifications.recv()
+        except EOFError:  # Engine process gone
+            self.notifier.setEnabled(False)
+        self.state = self.shared.read()
+        self.refresh()
+
+    def fire(self, row: int, col: int):
+        """Sends a shot of the human player to the engine, if it is their turn."""
+        if (
+            self.state is not None
+            and self.state["turn"] == 0
+            and self.AI_modes[0] == battleship_server.HUMAN
+        ):
+            self.commands.put((row, col))
+
+    def refresh(self):
+        """Repaints boards and labels from the last state copied."""
+        state = self.state
+        is_over = state["winner"] >= 0
+        for player, board in enumerate(self.boards):
+            board.obs = state["obs"][player]
+            is_hidden = (
+                player == 1 and self.AI_modes[0] == battleship_server.HUMAN
+            ) and not is_over
+            board.boat_ids = self.hidden if is_hidden else state["boat_ids"][player]
+            board.update()
+        for player, title in enumerate(self.titles):
+            mode = self.AI_modes[player]
+            nature = f"{mode} AI" if mode != battleship_server.HUMAN else "human"
+            title.setText(
+                f"Board of player {player + 1} - {nature} - "
+                f"{state['shots'][1 - player]} shots received"
+            )
+        if is_over:
+            self.status.setText(f"Player {state['winner'] + 1} won")
+        else:
+            self.status.setText(f"Player {state['turn'] + 1} to fire")
+
+    def closeEvent(self, event):
+        """Standard PyQt function triggered on close, stopping the engine."""
+        self.notifier.setEnabled(False)
+        self.commands.put(None)
+        self.engine.join(timeout=5.0)
+        if self.engine.is_alive():
+            self.engine.terminate()
+        self.shared.close(unlink=True)
+        super().closeEvent(event)
+
+
+if __name__ == "__main__":
+    boats = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
+    board_size = 10
+    AI_modes = (battleship_server.HUMAN, "hard")  # Or two AIs to watch a game
+    seed = 1
+    delay_AI = 0.3  # Seconds between AI shots
+
+    app = QApplication([])
+    window = RemoteWindow(AI_modes, board_size, boats, seed, delay_AI)
+    app.exec_()
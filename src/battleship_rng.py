@@ -0,0 +1,48 @@
+"""
+Random number streams for games of battleship.
+
+Every game and every worker gets its own NumPy generator, derived from a single master
+seed with NumPy's SeedSequence. Streams are keyed by the index of the game (or worker)
+rather than by the order in which they are created, so that:
+    - parallel workers never share or duplicate random state, even when forked.
+    - any single game of a batch can be replayed from the master seed and its index.
+"""
+from typing import List
+import numpy as np
+
+
+# Domains keep game streams and worker streams apart for the same index
+GAME_DOMAIN = 0
+WORKER_DOMAIN = 1
+
+# Streams drawn by a game, in order
+GAME_STREAMS = ("board_p1", "board_p2", "moves_p1", "moves_p2")
+
+
+def new_master_seed() -> int:
+    """Returns a fresh 64-bit master seed from OS entropy, to be logged for replays."""
+    return int(np.random.SeedSequence().generate_state(1, np.uint64)[0])
+
+
+def game_generators(
+    master_seed: int, game_index: int, n_streams: int = len(GAME_STREAMS)
+) -> List[np.random.Generator]:
+    """
+    Returns the independent generators used by a single game.
+
+    Args:
+        master_seed: seed of the whole batch of games.
+        game_index: index of the game within the batch.
+        n_streams: number of generators to return, by default one per GAME_STREAMS.
+
+    Returns:
+        Generators, the same ones every time for a given master seed and game index.
+    """
+    seq = np.random.SeedSequence(master_seed, spawn_key=(GAME_DOMAIN, game_index))
+    return [np.random.default_rng(s) for s in seq.spawn(n_streams)]
+
+
+def worker_generator(master_seed: int, worker_index: int) -> np.random.Generator:
+    """Returns the generator of a worker process, independent from all games."""
+    seq = np.random.SeedSequence(master_seed, spawn_key=(WORKER_DOMAIN, worker_index))
+    return np.random.default_rng(seq)
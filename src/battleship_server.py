@@ -0,0 +1,234 @@
+"""
+Game engine and AIs running in a process of their own, for the GUI of
+battleship_remote.
+
+The engine process plays a game on battleship_engine boards, with the rules of
+battleship_sim (a player fires again after a hit). It publishes the state of the game
+in a shared-memory buffer after every shot and notifies the GUI through a pipe. Human
+shots come back as (row, column) over a queue. AI work never runs in the GUI process,
+so the GUI stays responsive whatever the cost of the AI.
+
+The buffer is a NumPy record (see state_dtype) guarded by a sequence number: odd
+while the engine writes, even once the state is consistent. Readers copy the state
+and retry if the sequence number changed meanwhile, so they never lock the engine.
+
+Nothing in this module imports PyQt, so that the engine process starts fast.
+"""
+
+from multiprocessing import shared_memory
+from typing import Dict, Tuple
+import functools
+import queue
+import time
+import numpy as np
+
+import battleship_ai
+import battleship_engine
+import battleship_rng
+import battleship_sim
+
+HUMAN = ""  # AI mode of a human player
+
+
+@functools.lru_cache(maxsize=None)
+def state_dtype(board_size: int) -> np.dtype:
+    """Returns the layout of the shared state of a game on boards of board_size."""
+    shape = (2, board_size, board_size)
+    return np.dtype(
+        [
+            ("sequence", np.uint64),  # Odd while being written
+            ("turn", np.int8),  # Player to fire, -1 once the game is over
+            ("winner", np.int8),  # -1 until the game is over
+            ("shots", np.int32, (2,)),  # Shots fired by each player
+            ("boat_ids", np.int8, shape),  # Boats of each player, -1 for water
+            ("obs", np.int8, shape),  # What each player's enemy knows of its board
+        ]
+    )
+
+
+class SharedState:
+    """State of a game in a shared-memory buffer, written by a single process."""
+
+    def __init__(self, board_size: int, name: str = None, read_only: bool = False):
+        """
+        Creates the buffer, or attaches to an existing one.
+
+        Args:
+            board_size: size of the board, assumed to be square.
+            name: name of an existing buffer. If None, a new buffer is created, to be
+                unlinked by its creator once the game is over.
+            read_only: if True, the state is mapped read-only.
+        """
+        dtype = state_dtype(board_size)
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=name is None, size=dtype.itemsize
+        )
+        self.name = self.shm.name
+        self.state = np.ndarray((), dtype=dtype, buffer=self.shm.buf)
+        if name is None:
+            self.state["sequence"] = 0
+            self.state["turn"] = -1
+            self.state["winner"] = -1
+        if read_only:
+            self.state.setflags(write=False)
+
+    def write(
+        self,
+        boards: Tuple[battleship_engine.Board],
+        turn: int,
+        winner: int,
+        shots: Tuple[int],
+    ):
+        """Publishes the state of the game, see state_dtype."""
+        self.state["sequence"] += 1  # Odd, readers retry
+        self.state["shots"] = shots
+        for player, board in enumerate(boards):
+            self.state["boat_ids"][player] = board.boat_ids
+            self.state["obs"][player] = board.obs
+        self.state["turn"] = turn
+        self.state["winner"] = winner
+        self.state["sequence"] += 1  # Even, consistent again
+
+    def read(self) -> np.ndarray:
+        """Returns a consistent copy of the state, without blocking the writer."""
+        while True:
+            sequence = int(self.state["sequence"])
+            if sequence % 2 == 0:
+                copy = self.state.copy()
+                if int(self.state["sequence"]) == sequence:
+                    return copy
+            time.sleep(0)
+
+    def close(self, unlink: bool = False):
+        """Detaches from the buffer, and frees it if unlink."""
+        del self.state
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def check_AI_modes(AI_modes: Tuple[str]):
+    """
+    Checks the AI modes of a game served by serve_game. Only player 1 may be human,
+    as the GUI only forwards clicks on the board of player 2.
+
+    Raises:
+        ValueError: if there are not two AI modes, or if one of them is unknown or
+            human for player 2.
+    """
+    if len(AI_modes) != 2:
+        raise ValueError(f"Expected the AI modes of 2 players, got {AI_modes}")
+    for player, AI_mode in enumerate(AI_modes):
+        if AI_mode == HUMAN and player == 0:
+            continue
+        if AI_mode not in battleship_sim.AI_MODES:
+            expected = battleship_sim.AI_MODES + ((HUMAN,) if player == 0 else ())
+            raise ValueError(
+                f"Invalid AI mode {AI_mode!r} for player {player + 1}, expected one "
+                f"of {expected}"
+            )
+
+
+def serve_game(
+    state_name: str,
+    notify,
+    commands,
+    AI_modes: Tuple[str],
+    board_size: int,
+    boats: Dict,
+    seed: int,
+    delay_AI: float = 0.1,
+):
+    """
+    Plays a game in the engine process, until it is over and a None command is
+    received.
+
+    Args:
+        state_name: name of the SharedState the engine writes.
+        notify: connection to the GUI, sent the sequence number of every new state.
+        commands: queue of human shots as (row, column) on the board of the enemy,
+            None to stop.
+        AI_modes: AI mode of each player, one of battleship_sim.AI_MODES, or HUMAN
+            for player 1.
+        board_size: size of the board, assumed to be square.
+        boats: dictionary where keys are boat size and values # of boats.
+        seed: master seed of the game, see battleship_rng.
+        delay_AI: seconds between AI shots, so that they can be followed.
+
+    Raises:
+        ValueError: if AI_modes are invalid, see check_AI_modes.
+    """
+    check_AI_modes(AI_modes)
+    shared = SharedState(board_size, state_name)
+    rng_board_p1, rng_board_p2, rng_moves_p1, rng_moves_p2 = (
+        battleship_rng.game_generators(seed, 0)
+    )
+    boards = [
+        battleship_engine.Board(battleship_engine.place_fleet(board_size, boats, rng))
+        for rng in (rng_board_p1, rng_board_p2)
+    ]
+    rngs = [rng_moves_p1, rng_moves_p2]
+    clusters = [battleship_ai.HitClusters(), battleship_ai.HitClusters()]
+    trackers = [battleship_ai.FleetTracker(boats), battleship_ai.FleetTracker(boats)]
+
+    shots = [0, 0]
+
+    def publish(turn, winner=-1):
+        shared.write(boards, turn, winner, shots)
+        notify.send(int(shared.state["sequence"]))
+
+    player = 0
+    publish(player)
+    while True:
+        enemy = boards[1 - player]
+        if AI_modes[player] == HUMAN:
+            target = commands.get()
+            if target is None:
+                break
+            target = tuple(target)
+            if enemy.obs[target] != battleship_engine.UNEXPLORED:
+                continue  # Square already fired at
+        else:
+            time.sleep(delay_AI)
+            alive_sizes = enemy.alive_sizes()
+            target = battleship_sim.choose_target(
+                AI_modes[player],
+                enemy.to_array(),
+                board_size,
+                int(alive_sizes.max()),
+                rngs[player],
+                clusters[player],
+                enemy.unexplored,
+                alive_sizes,
+                tracker=trackers[player],
+            )
+            if not _is_running(commands):
+                break
+
+        is_hit, sunk_id = enemy.fire(*target)
+        hit_tiles = [target] if is_hit and sunk_id < 0 else []
+        sunk = [sunk_id] if sunk_id >= 0 else []
+        battleship_sim.update_clusters(clusters[player], enemy, hit_tiles, sunk)
+        for boat_id in sunk:
+            trackers[player].sink(int(enemy.boat_sizes[boat_id]))
+        shots[player] += 1
+
+        if enemy.is_over():
+            publish(-1, player)
+            while commands.get() is not None:  # Wait for the GUI to close
+                pass
+            break
+        if not is_hit:
+            player = 1 - player
+        publish(player)
+    shared.close()
+
+
+def _is_running(commands) -> bool:
+    """Returns False if the GUI asked to stop, ignoring clicks out of turn."""
+    while True:
+        try:
+            if commands.get_nowait() is None:
+                return False
+        except queue.Empty:
+            return True
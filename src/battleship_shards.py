@@ -0,0 +1,346 @@
+"""
+Simulation of AI vs AI games sharded across several machines.
+
+A run is split into deterministic shards, each defined by an AI pairing, a board
+configuration and a range of game indices under a master seed. As every game draws
+from its own random streams (see battleship_rng), a shard gives the same results
+wherever and however many times it runs.
+
+Machines share a work directory, e.g. over a network file system:
+
+    root/
+        plan/<shard_id>.json      shards of the run, written by the coordinator
+        claims/<shard_id>         shard being played, holding the id of its worker
+        results/shard-<shard_id>/ results of a shard, a shard of a battleship_store
+        tmp/                      results being written
+
+Workers claim shards by creating their claim file exclusively, play them into tmp/,
+and publish the results by renaming them into results/, which is atomic. Shards whose
+worker failed are released at once, and claims of workers that died are taken over
+once older than a lease, so failed shards are retried by any worker. A shard may then
+be played twice, but its results are published only once: retries are idempotent.
+
+Results of all shards make a single battleship_store, from which exact aggregate
+statistics are computed.
+"""
+
+from typing import Dict, List, NamedTuple, Tuple
+import json
+import os
+import shutil
+import time
+import numpy as np
+
+import battleship_sim
+import battleship_store
+
+
+class Shard(NamedTuple):
+    """A range of games of an AI pairing on a board configuration."""
+
+    AI_modes: Tuple[str]
+    board_size: int
+    boats: Dict
+    seed: int
+    start: int  # Index of the first game
+    stop: int  # Index after the last game
+
+    @property
+    def shard_id(self) -> str:
+        """Returns an id of the shard, the same for the same games."""
+        fleet = battleship_store.fleet_to_str(self.boats).replace(",", "_")
+        return (
+            f"{self.AI_modes[0]}-{self.AI_modes[1]}-{self.board_size}-{fleet}-"
+            f"{self.seed}-{self.start:09d}-{self.stop:09d}"
+        )
+
+    def to_json(self) -> str:
+        """Encodes the shard as JSON, see from_json."""
+        fields = self._asdict()
+        fields["boats"] = sorted(self.boats.items())
+        return json.dumps(fields)
+
+    @classmethod
+    def from_json(cls, text: str) -> "Shard":
+        """Decodes a shard encoded with to_json."""
+        fields = json.loads(text)
+        fields["AI_modes"] = tuple(fields["AI_modes"])
+        fields["boats"] = {int(size): int(n) for size, n in fields["boats"]}
+        return cls(**fields)
+
+
+def plan_shards(
+    pairings: List[Tuple[str]],
+    board_size: int,
+    boats: Dict,
+    seed: int,
+    n_games: int,
+    shard_size: int = 500,
+) -> List[Shard]:
+    """
+    Splits a run into shards.
+
+    Args:
+        pairings: AI modes of the players of every pairing to evaluate.
+        board_size: size of the board, assumed to be square.
+        boats: dictionary where keys are boat size and values # of boats.
+        seed: master seed of the run.
+        n_games: number of games per pairing.
+        shard_size: number of games per shard.
+
+    Returns:
+        Shards covering games 0 to n_games - 1 of every pairing.
+    """
+    return [
+        Shard(
+            tuple(AI_modes),
+            board_size,
+            boats,
+            seed,
+            start,
+            min(start + shard_size, n_games),
+        )
+        for AI_modes in pairings
+        for start in range(0, n_games, shard_size)
+    ]
+
+
+class WorkDir:
+    """Work directory shared by the coordinator and the workers of a run."""
+
+    def __init__(self, root: str, lease: float = 600.0):
+        """
+        Instantiates the work directory, creating its folders if needed.
+
+        Args:
+            root: path of the work directory.
+            lease: seconds after which the claim of a shard not done yet is deemed
+                left by a dead worker, and can be taken over. Must exceed the time to
+                play a shard.
+        """
+        self.root = root
+        self.lease = lease
+        for folder in ("plan", "claims", "results", "tmp"):
+            os.makedirs(os.path.join(root, folder), exist_ok=True)
+
+    def path(self, folder: str, name: str = "") -> str:
+        """Returns the path of a file of the work directory."""
+        return os.path.join(self.root, folder, name)
+
+    def submit(self, shards: List[Shard]):
+        """Adds shards to the plan of the run. Shards already planned are kept."""
+        for shard in shards:
+            path = self.path("plan", f"{shard.shard_id}.json")
+            if not os.path.exists(path):
+                with open(path + ".tmp", "w") as f:
+                    f.write(shard.to_json())
+                os.replace(path + ".tmp", path)
+
+    def planned(self) -> List[Shard]:
+        """Returns the shards of the run, in order of their ids."""
+        shards = []
+        for name in sorted(os.listdir(self.path("plan"))):
+            if name.endswith(".json"):
+                with open(self.path("plan", name)) as f:
+                    shards.append(Shard.from_json(f.read()))
+        return shards
+
+    def is_done(self, shard: Shard) -> bool:
+        """Returns whether the results of a shard are published."""
+        return os.path.exists(self.path("results", f"shard-{shard.shard_id}"))
+
+    def claim(self, shard: Shard, worker_id: str) -> bool:
+        """
+        Claims a shard for a worker. A claim older than the lease is taken over.
+
+        Returns:
+            Whether the worker got the shard.
+        """
+        path = self.path("claims", shard.shard_id)
+        try:
+            if time.time() - os.path.getmtime(path) > self.lease:
+                os.remove(path)  # Left by a dead worker
+        except FileNotFoundError:
+            pass
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            f.write(worker_id)
+        return True
+
+    def release(self, shard: Shard):
+        """Releases the claim of a shard, done or failed."""
+        try:
+            os.remove(self.path("claims", shard.shard_id))
+        except FileNotFoundError:
+            pass
+
+    def run_shard(self, shard: Shard, worker_id: str):
+        """Plays the games of a shard and publishes their results."""
+        tmp_root = self.path("tmp", f"{shard.shard_id}.{worker_id}")
+        shutil.rmtree(tmp_root, ignore_errors=True)
+        battleship_sim.simulate_to_store(
+            tmp_root,
+            shard.shard_id,
+            shard.AI_modes,
+            shard.board_size,
+            shard.boats,
+            shard.seed,
+            range(shard.start, shard.stop),
+        )
+        try:  # Atomic, fails if the shard was published by another worker meanwhile
+            os.rename(
+                os.path.join(tmp_root, f"shard-{shard.shard_id}"),
+                self.path("results", f"shard-{shard.shard_id}"),
+            )
+        except OSError:
+            if not self.is_done(shard):  # Not a race, e.g. permissions or disk full
+                raise
+        finally:
+            shutil.rmtree(tmp_root, ignore_errors=True)
+
+    def status(self) -> Dict:
+        """Returns the number of shards done, claimed and pending."""
+        shards = self.planned()
+        done = sum(self.is_done(shard) for shard in shards)
+        claimed = sum(
+            not self.is_done(shard)
+            and os.path.exists(self.path("claims", shard.shard_id))
+            for shard in shards
+        )
+        return {
+            "done": done,
+            "claimed": claimed,
+            "pending": len(shards) - done - claimed,
+        }
+
+    def results(self) -> battleship_store.ResultsStore:
+        """Returns the merged results of all shards published."""
+        return battleship_store.ResultsStore(self.path("results"))
+
+
+def run_worker(
+    root: str,
+    worker_id: str,
+    lease: float = 600.0,
+    poll: float = 1.0,
+    max_failures: int = 3,
+) -> int:
+    """
+    Plays shards of a run until all are done. Meant to run on every machine sharing
+    the work directory, or in several processes of a single machine.
+
+    Args:
+        root: path of the work directory.
+        worker_id: name of the worker, unique across machines.
+        lease: see WorkDir.
+        poll: seconds to wait when all shards not done are claimed by others.
+        max_failures: failures of this worker after which it stops.
+
+    Returns:
+        Number of shards played by the worker.
+    """
+    work = WorkDir(root, lease)
+    n_played, n_failures = 0, 0
+    while True:
+        pending = [shard for shard in work.planned() if not work.is_done(shard)]
+        if not pending:
+            return n_played
+        claimed = False
+        for shard in pending:
+            if work.is_done(shard) or not work.claim(shard, worker_id):
+                continue
+            claimed = True
+            try:
+                if not work.is_done(shard):
+                    work.run_shard(shard, worker_id)
+                    n_played += 1
+            except Exception:  # Shard left to any worker, this one included
+                n_failures += 1
+                if n_failures >= max_failures:
+                    raise
+            finally:
+                work.release(shard)
+        if not claimed:
+            time.sleep(poll)
+
+
+def summarize(store: battleship_store.ResultsStore) -> Dict:
+    """
+    Computes exact statistics of every configuration of a run: AI pairing, board size
+    and fleet, so that games of different boards are never mixed.
+
+    Returns:
+        Dictionary from configuration ("AI_mode_p1 vs AI_mode_p2, board_size,
+        fleet") to number of games, win rate of the first player and mean shots fired
+        by each player.
+    """
+    configs = set(
+        zip(
+            store.column("AI_mode_p1").tolist(),
+            store.column("AI_mode_p2").tolist(),
+            store.column("board_size").tolist(),
+            store.column("fleet").tolist(),
+        )
+    )
+    summary = {}
+    for mode_p1, mode_p2, board_size, fleet in sorted(configs):
+        where = {
+            "AI_mode_p1": mode_p1.decode(),
+            "AI_mode_p2": mode_p2.decode(),
+            "board_size": board_size,
+            "fleet": fleet.decode(),
+        }
+        winner = store.aggregate("winner", **where)[None]
+        shots = store.aggregate("shots", **where)[None]
+        key = f"{where['AI_mode_p1']} vs {where['AI_mode_p2']}, {board_size}, "
+        summary[key + where["fleet"]] = {
+            "games": winner["count"],
+            "win_rate_p1": 1 - winner["mean"],
+            "shots": shots["mean"].tolist(),
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    import tempfile
+
+    boats = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
+    board_size = 10
+    seed = 1
+    n_games = 400  # Per pairing
+    shard_size = 50
+    pairings = [("hard", "standard"), ("parity", "hard")]
+    n_nodes = 4  # Worker processes standing in for machines
+    lease = 20.0  # Seconds, above the time to play a shard
+
+    root = tempfile.mkdtemp(prefix="battleship-shards-")
+    work = WorkDir(root, lease)
+    work.submit(plan_shards(pairings, board_size, boats, seed, n_games, shard_size))
+    print(f"{len(work.planned())} shards planned in {root}")
+
+    # One node dies while playing its first shard, which is retried after the lease
+    start = time.perf_counter()
+    nodes = [
+        multiprocessing.Process(target=run_worker, args=(root, f"node{i}", lease))
+        for i in range(n_nodes)
+    ]
+    for node in nodes:
+        node.start()
+    time.sleep(1.0)
+    nodes[0].terminate()
+    print(f"node0 killed, status {work.status()}")
+    for node in nodes[1:]:
+        node.join()
+    print(f"Run took {time.perf_counter() - start:.1f} s, status {work.status()}")
+
+    store = work.results()
+    print(f"{len(store)} games in merged results")
+    for config, stats in summarize(store).items():
+        print(
+            f"{config}: {stats['games']} games, first player won "
+            f"{stats['win_rate_p1']:.1%}, shots {np.round(stats['shots'], 1)}"
+        )
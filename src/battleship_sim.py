@@ -0,0 +1,387 @@
+"""
+Headless simulation of AI vs AI games of battleship.
+
+Games follow the rules of battleship_cli: a player keeps firing while it hits boats and
+loses the turn on a miss. Boards are battleship_engine boards, and every game draws
+from its own random streams (see battleship_rng), so that game i of a batch can be
+replayed from the master seed and i alone.
+"""
+
+from typing import Dict, List, Tuple
+import time
+import numpy as np
+
+import battleship_ai
+import battleship_cache
+import battleship_engine
+import battleship_policy
+import battleship_rng
+import battleship_stats
+import battleship_store
+import battleship_superpowers
+
+AI_MODES = ("fool", "standard", "hard", "learned", "parity")
+
+
+def choose_target(
+    AI_mode: str,
+    enemy_array: np.array,
+    board_size: int,
+    max_size: int,
+    rng: np.random.Generator,
+    clusters: battleship_ai.HitClusters = None,
+    index: battleship_engine.CellIndex = None,
+    fleet: np.array = None,
+    params: battleship_ai.HardParams = None,
+    tracker: battleship_ai.FleetTracker = None,
+) -> Tuple[int]:
+    """
+    Asks an AI for its next target.
+
+    Args:
+        AI_mode: one of AI_MODES.
+        enemy_array: what the AI knows about the enemy board, see battleship_ai.
+        board_size: size of the board, assumed to be square.
+        max_size: size of biggest enemy boat not sunk.
+        rng: random generator of the AI.
+        clusters: hit tiles of the enemy board, see battleship_ai.HitClusters.
+        index: unexplored tiles of the enemy board, see battleship_engine.CellIndex.
+        fleet: sizes of enemy boats not sunk, needed by the learned AI.
+        params: heuristics of the hard AI, see battleship_ai.HardParams. If None,
+            the defaults.
+        tracker: enemy boats not sunk, as tracked by the AI, needed by the parity
+            AI.
+
+    Returns:
+        2D coordinates of the tile to fire at.
+    """
+    if AI_mode == "fool":
+        return battleship_ai.fool_AI(enemy_array, board_size, rng, index)
+    elif AI_mode == "standard":
+        return battleship_ai.standard_AI(enemy_array, board_size, rng, clusters, index)
+    elif AI_mode == "hard":
+        return battleship_ai.hard_AI(
+            enemy_array, board_size, max_size, rng, clusters, index, params
+        )
+    elif AI_mode == "learned":
+        return battleship_policy.learned_AI(enemy_array, board_size, fleet)
+    elif AI_mode == "parity":
+        return battleship_ai.parity_AI(enemy_array, board_size, tracker, rng, clusters)
+    raise ValueError(f"Unknown AI mode {AI_mode}, expected one of {AI_MODES}")
+
+
+def play_game(
+    AI_modes: Tuple[str],
+    board_size: int,
+    boats: Dict,
+    seed: int,
+    game_index: int = 0,
+    powers: Tuple[battleship_superpowers.Superpower] = (None, None),
+    smart: bool = True,
+    stats: Tuple[battleship_stats.GameStats] = (None, None),
+    cache: battleship_cache.DecisionCache = None,
+    record: Dict = None,
+    layouts: Tuple[np.array] = (None, None),
+) -> Dict:
+    """
+    Plays a full game between two AIs. Player 0 fires first.
+
+    Args:
+        AI_modes: AI mode of each player.
+        board_size: size of the board, assumed to be square.
+        boats: dictionary where keys are boat size and values # of boats.
+        seed: master seed of the batch of games.
+        game_index: index of the game within the batch.
+        powers: superpower of each player, None for no superpower.
+        smart: if True, boats will not be placed adjacent to one another.
+        stats: streaming stats of each player, updated while the game runs. None for
+            no stats.
+        cache: cache of AI decisions on recurring board states, shared by both
+            players. None for no cache. Only decisions that drew nothing from the
+            random stream of the AI are cached, e.g. target-mode follow-ups or
+            learned AI moves, so games are the same as without cache.
+        record: if not None, filled with what is needed to replay the game:
+            - boat_ids: boat_ids of the board of each player.
+            - events: for each shot, the player who fired and the tiles of the enemy
+              board that changed, as an array of (row, column, obs code) rows.
+        layouts: for each player, None to place boats at random, or a corpus of
+            layouts of shape (n_layouts, board_size, board_size), one of which is
+            drawn at random, e.g. hard layouts from battleship_placement.
+
+    Returns:
+        Dictionary with the winner (0 or 1), the duration of the game in seconds and,
+        per player:
+            - shots: number of shots fired.
+            - hits: number of boat tiles hit.
+            - powers_used: number of superpowers used.
+            - think_time: seconds spent by the AI choosing its targets.
+            - sink_turns: for each boat of the player, number of shots fired in the
+              game (by both players) when it was sunk, -1 if never sunk.
+    """
+    start = time.perf_counter()
+    rng_board_p1, rng_board_p2, rng_moves_p1, rng_moves_p2 = (
+        battleship_rng.game_generators(seed, game_index)
+    )
+    boards = [
+        battleship_engine.Board(
+            battleship_engine.place_fleet(board_size, boats, rng, smart)
+            if corpus is None
+            else corpus[rng.integers(0, len(corpus))]
+        )
+        for rng, corpus in zip((rng_board_p1, rng_board_p2), layouts)
+    ]
+    rngs = [rng_moves_p1, rng_moves_p2]
+    clusters = [battleship_ai.HitClusters(), battleship_ai.HitClusters()]
+    trackers = [battleship_ai.FleetTracker(boats), battleship_ai.FleetTracker(boats)]
+    charges = [power.charges if power else 0 for power in powers]
+    shots, hits, used = [0, 0], [0, 0], [0, 0]
+    think_time = [0.0, 0.0]
+    sink_turns = [[-1] * len(board.boat_sizes) for board in boards]
+    if record is not None:
+        record["boat_ids"] = [board.boat_ids for board in boards]
+        record["events"] = []
+    if cache is not None:  # Hash of what each player knows about the enemy board
+        hashes = [battleship_cache.ZobristHash(board_size) for _ in range(2)]
+
+    player = 0
+    while True:
+        enemy = boards[1 - player]
+        enemy_array = enemy.to_array()
+        rng = rngs[player]
+
+        # Superpowers are used as soon as an area is worth a charge
+        think_start = time.perf_counter()
+        target = None
+        if charges[player] > 0:
+            power = powers[player]
+            target = battleship_superpowers.choose_area_target(
+                power, enemy_array, board_size, rng
+            )
+
+        if target is not None:
+            decision_time = time.perf_counter() - think_start
+            mask = battleship_superpowers.area_mask(power, target, board_size)
+            n_hits, sunk = enemy.fire_mask(mask)
+            fired_tiles = np.argwhere(mask)
+            hit_tiles = np.argwhere(mask & (enemy.obs == battleship_engine.HIT))
+            charges[player] -= 1
+            used[player] += 1
+        else:
+            alive_sizes = enemy.alive_sizes()
+            target = None
+            if cache is not None:
+                key = cache.make_key(
+                    AI_modes[player], hashes[player].value, alive_sizes
+                )
+                target = cache.get(key)
+            if target is None:
+                if cache is not None:
+                    rng_state = rng.bit_generator.state
+                target = choose_target(
+                    AI_modes[player],
+                    enemy_array,
+                    board_size,
+                    int(alive_sizes.max()),
+                    rng,
+                    clusters[player],
+                    enemy.unexplored,
+                    alive_sizes,
+                    tracker=trackers[player],
+                )
+                # Only decisions without random draws are a function of the state
+                if cache is not None and rng.bit_generator.state == rng_state:
+                    cache.put(key, target)
+            decision_time = time.perf_counter() - think_start
+            is_hit, sunk_id = enemy.fire(*target)
+            n_hits = int(is_hit)
+            hit_tiles = [target] if is_hit and sunk_id < 0 else []
+            fired_tiles = [target]
+            sunk = [sunk_id] if sunk_id >= 0 else []
+
+        think_time[player] += decision_time
+        update_clusters(clusters[player], enemy, hit_tiles, sunk)
+        for boat_id in sunk:
+            trackers[player].sink(int(enemy.boat_sizes[boat_id]))
+        if cache is not None:
+            update_hash(hashes[player], enemy, fired_tiles, sunk)
+        if record is not None:
+            record["events"].append((player, get_changes(enemy, fired_tiles, sunk)))
+        if stats[player] is not None:
+            stats[player].record_shot(tuple(target), n_hits > 0, decision_time)
+
+        shots[player] += 1
+        hits[player] += n_hits
+        for boat_id in sunk:
+            sink_turns[1 - player][boat_id] = shots[0] + shots[1]
+
+        if enemy.is_over():
+            for i, player_stats in enumerate(stats):
+                if player_stats is not None:
+                    player_stats.record_game_over(won=i == player)
+            return {
+                "winner": player,
+                "duration": time.perf_counter() - start,
+                "shots": shots,
+                "hits": hits,
+                "powers_used": used,
+                "think_time": think_time,
+                "sink_turns": sink_turns,
+            }
+        if n_hits == 0:
+            player = 1 - player
+
+
+def update_clusters(
+    clusters: battleship_ai.HitClusters,
+    board: battleship_engine.Board,
+    hit_tiles: List[Tuple[int]],
+    sunk_ids: List[int],
+):
+    """Updates the hit clusters of an AI with the outcome of a shot."""
+    for x, y in hit_tiles:
+        clusters.add_hit((int(x), int(y)))
+    for boat_id in sunk_ids:
+        sunk_tiles = np.argwhere(board.boat_ids == boat_id)
+        clusters.remove_sunk([(int(x), int(y)) for x, y in sunk_tiles])
+
+
+def update_hash(
+    zobrist: battleship_cache.ZobristHash,
+    board: battleship_engine.Board,
+    fired_tiles: List[Tuple[int]],
+    sunk_ids: List[int],
+):
+    """Updates the hash of what a player knows about a board after a shot."""
+    for x, y in fired_tiles:
+        zobrist.set((x, y), board.obs[x, y])
+    for boat_id in sunk_ids:
+        for x, y in np.argwhere(board.boat_ids == boat_id):
+            zobrist.set((x, y), board.obs[x, y])
+
+
+def get_changes(
+    board: battleship_engine.Board, fired_tiles: List[Tuple[int]], sunk_ids: List[int]
+) -> np.array:
+    """Returns tiles of a board changed by a shot, as (row, column, obs code) rows."""
+    tiles = np.array(fired_tiles, dtype=np.int16).reshape(-1, 2)
+    if len(sunk_ids):
+        sunk_tiles = np.argwhere(np.isin(board.boat_ids, sunk_ids))
+        tiles = np.concatenate([tiles, sunk_tiles.astype(np.int16)])
+    codes = board.obs[tiles[:, 0], tiles[:, 1]].astype(np.int16)
+    return np.column_stack([tiles, codes])
+
+
+def play_games(
+    AI_modes: Tuple[str],
+    board_size: int,
+    boats: Dict,
+    seed: int,
+    game_indices: List[int],
+    powers: Tuple[battleship_superpowers.Superpower] = (None, None),
+    smart: bool = True,
+    cache: battleship_cache.DecisionCache = None,
+    layouts: Tuple[np.array] = (None, None),
+) -> List[Dict]:
+    """Plays several games of a batch, see play_game. Suited to process pools."""
+    return [
+        play_game(
+            AI_modes,
+            board_size,
+            boats,
+            seed,
+            i,
+            powers,
+            smart,
+            cache=cache,
+            layouts=layouts,
+        )
+        for i in game_indices
+    ]
+
+
+def play_games_cached(
+    AI_modes: Tuple[str],
+    board_size: int,
+    boats: Dict,
+    seed: int,
+    game_indices: List[int],
+    shared: battleship_cache.DecisionCache = None,
+    smart: bool = True,
+) -> Tuple[List[Dict], battleship_cache.DecisionCache]:
+    """
+    Plays several games of a batch with a decision cache of their own, backed by a
+    read-only shared cache. Suited to process pools, where shared is pickled with
+    every task: each task looks up its own copy, not memory shared across workers.
+
+    Returns:
+        Results of the games, see play_game, and the cache of the games, to be merged
+        into the shared one.
+    """
+    cache = battleship_cache.DecisionCache(shared=shared)
+    results = play_games(
+        AI_modes, board_size, boats, seed, game_indices, smart=smart, cache=cache
+    )
+    return results, cache
+
+
+def simulate_stats(
+    AI_modes: Tuple[str],
+    board_size: int,
+    boats: Dict,
+    seed: int,
+    game_indices: List[int],
+    smart: bool = True,
+) -> Tuple[battleship_stats.GameStats]:
+    """
+    Plays several games of a batch and returns the streaming stats of each player,
+    see battleship_stats. Suited to process pools: stats of all tasks can be merged.
+    """
+    stats = (
+        battleship_stats.GameStats(board_size),
+        battleship_stats.GameStats(board_size),
+    )
+    for i in game_indices:
+        play_game(AI_modes, board_size, boats, seed, i, smart=smart, stats=stats)
+    return stats
+
+
+def simulate_to_store(
+    root: str,
+    shard_id: str,
+    AI_modes: Tuple[str],
+    board_size: int,
+    boats: Dict,
+    seed: int,
+    game_indices: List[int],
+    smart: bool = True,
+):
+    """
+    Plays several games of a batch and appends their results to a shard of a
+    battleship_store. Suited to process pools, with a different shard_id per task.
+    """
+    with battleship_store.ResultsWriter(root, shard_id) as writer:
+        for i in game_indices:
+            result = play_game(AI_modes, board_size, boats, seed, i, smart=smart)
+            writer.append(
+                battleship_store.game_to_row(
+                    result, seed, i, AI_modes, board_size, boats
+                )
+            )
+
+
+if __name__ == "__main__":
+    import time
+
+    boats = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
+    board_size = 10
+    AI_modes = ("hard", "standard")
+    seed = 1
+    n_games = 100
+
+    start = time.perf_counter()
+    results = play_games(AI_modes, board_size, boats, seed, range(n_games))
+    elapsed = time.perf_counter() - start
+
+    wins = sum(result["winner"] == 0 for result in results)
+    print(f"{AI_modes[0]} won {wins} of {n_games} games against {AI_modes[1]}")
+    print(f"{n_games / elapsed:.1f} games per second")
@@ -0,0 +1,249 @@
+"""
+Compact snapshots of the state of a game of battleship.
+
+The full state of a game is packed into a fixed-size binary blob, whose layout only
+depends on the size of the board:
+    - header: number of rows and columns of the boards.
+    - seed: master seed of the game, see battleship_rng.
+    - turn: player to fire, -1 if none.
+    - shots_left: shots left to each player in the current turn, in salvo mode.
+    - boat_ids: boats of each player, as the id of the boat on each tile, -1 for
+      water, see battleship_engine.
+    - shots: tiles of each player's board fired at by the enemy.
+    - unexplored: tiles of each player's board not fired at yet, as flat indices in
+      the order of their battleship_engine.CellIndex, padded with -1. AIs sample
+      from this index, so its order is needed for a resumed game to go on exactly
+      as the original one.
+    - sunk: whether each boat of each player is sunk.
+    - rng: state of the random generator of each player's moves.
+
+Blobs are read without copy: unpack returns a NumPy record whose fields are views
+over the buffer, e.g. a bytes object, a memory-mapped file or shared memory.
+Front ends build and restore snapshots from their own objects, see
+BattleshipRunner.snapshot in battleship_cli and MainWindow.snapshot in battleship_ui.
+"""
+
+from typing import List, Tuple
+import functools
+import numpy as np
+
+import battleship_engine
+
+MAX_BOATS = 16  # Boats per player in a snapshot
+RNG_WORDS = 6  # State of a PCG64 generator, as 64-bit words
+
+
+@functools.lru_cache(maxsize=None)
+def snapshot_dtype(n_rows: int, n_cols: int = None) -> np.dtype:
+    """Returns the layout of snapshots of boards of n_rows x n_cols (square if None)."""
+    n_cols = n_cols if n_cols is not None else n_rows
+    shape = (2, n_rows, n_cols)
+    return np.dtype(
+        [
+            ("n_rows", np.uint16),
+            ("n_cols", np.uint16),
+            ("seed", np.uint64),
+            ("turn", np.int8),
+            ("shots_left", np.int16, (2,)),
+            ("boat_ids", np.int8, shape),
+            ("shots", np.bool_, shape),
+            ("unexplored", np.int32, (2, n_rows * n_cols)),  # Flat indices
+            ("sunk", np.bool_, (2, MAX_BOATS)),
+            ("rng", np.uint64, (2, RNG_WORDS)),
+        ]
+    )
+
+
+def pack(
+    boat_ids: np.array,
+    shots: np.array,
+    turn: int,
+    rngs: List[np.random.Generator],
+    seed: int,
+    shots_left: Tuple[int] = (0, 0),
+    unexplored: List[battleship_engine.CellIndex] = None,
+) -> bytes:
+    """
+    Packs the state of a game into a blob.
+
+    Args:
+        boat_ids: array of shape (2, n_rows, n_cols), boats of each player.
+        shots: boolean array of the same shape, tiles fired at on each board.
+        turn: player to fire (0 or 1), -1 if none.
+        rngs: random generator of each player's moves, PCG64 as drawn by
+            battleship_rng.
+        seed: master seed of the game.
+        shots_left: shots left to each player in the current turn, in salvo mode.
+        unexplored: index of the tiles of each board not fired at yet. If None, tiles
+            are stored in row-major order.
+
+    Returns:
+        The snapshot, of snapshot_dtype(n_rows, n_cols).itemsize bytes.
+
+    Raises:
+        ValueError: if a player has more than MAX_BOATS boats.
+    """
+    n_boats = int(boat_ids.max()) + 1
+    if n_boats > MAX_BOATS:
+        raise ValueError(f"Snapshots hold up to {MAX_BOATS} boats, got {n_boats}")
+
+    _, n_rows, n_cols = boat_ids.shape
+    record = np.zeros((), dtype=snapshot_dtype(n_rows, n_cols))
+    record["n_rows"], record["n_cols"] = n_rows, n_cols
+    record["seed"] = seed
+    record["turn"] = turn
+    record["shots_left"] = shots_left
+    record["boat_ids"] = boat_ids
+    record["shots"] = shots
+    record["unexplored"] = -1
+    for player in range(2):
+        ids = boat_ids[player]
+        hit = np.bincount(ids[shots[player] & (ids >= 0)], minlength=n_boats)
+        record["sunk"][player, :n_boats] = hit == np.bincount(
+            ids[ids >= 0], minlength=n_boats
+        )
+        record["rng"][player] = rng_to_words(rngs[player])
+        cells = (
+            unexplored[player].to_cells()
+            if unexplored is not None
+            else np.flatnonzero(~shots[player])
+        )
+        record["unexplored"][player, : len(cells)] = cells
+    return record.tobytes()
+
+
+def unpack(buffer) -> np.void:
+    """
+    Reads a snapshot without copying it.
+
+    Args:
+        buffer: object exposing the buffer protocol, starting with a snapshot.
+
+    Returns:
+        Record of snapshot_dtype, whose fields are views over the buffer.
+    """
+    n_rows, n_cols = np.frombuffer(buffer, dtype=np.uint16, count=2)
+    return np.frombuffer(buffer, dtype=snapshot_dtype(n_rows, n_cols), count=1)[0]
+
+
+def rng_to_words(rng: np.random.Generator) -> np.array:
+    """Returns the state of a PCG64 generator as RNG_WORDS 64-bit words."""
+    state = rng.bit_generator.state
+    mask = 2**64 - 1
+    return np.array(
+        [
+            state["state"]["state"] >> 64,
+            state["state"]["state"] & mask,
+            state["state"]["inc"] >> 64,
+            state["state"]["inc"] & mask,
+            state["has_uint32"],
+            state["uinteger"],
+        ],
+        dtype=np.uint64,
+    )
+
+
+def to_index(record: np.void, player: int) -> battleship_engine.CellIndex:
+    """Returns the index of the unexplored tiles of the board of a player."""
+    cells = record["unexplored"][player]
+    return battleship_engine.CellIndex.from_cells(
+        cells[cells >= 0], int(record["n_rows"]), int(record["n_cols"])
+    )
+
+
+def words_to_rng(words: np.array) -> np.random.Generator:
+    """Returns a PCG64 generator in the state given by rng_to_words."""
+    words = [int(word) for word in words]
+    rng = np.random.Generator(np.random.PCG64(0))  # Seed overwritten below
+    rng.bit_generator.state = {
+        "bit_generator": "PCG64",
+        "state": {
+            "state": (words[0] << 64) | words[1],
+            "inc": (words[2] << 64) | words[3],
+        },
+        "has_uint32": words[4],
+        "uinteger": words[5],
+    }
+    return rng
+
+
+def pack_boards(
+    boards: List[battleship_engine.Board],
+    turn: int,
+    rngs: List[np.random.Generator],
+    seed: int,
+) -> bytes:
+    """Packs a game played on battleship_engine boards, see pack."""
+    return pack(
+        np.stack([board.boat_ids for board in boards]),
+        np.stack([board.obs != battleship_engine.UNEXPLORED for board in boards]),
+        turn,
+        rngs,
+        seed,
+        unexplored=[board.unexplored for board in boards],
+    )
+
+
+def unpack_boards(buffer) -> Tuple[List[battleship_engine.Board], int, List]:
+    """
+    Restores a game on battleship_engine boards, see pack_boards.
+
+    Returns:
+        Boards of both players, player to fire and random generator of each player.
+    """
+    record = unpack(buffer)
+    boards = []
+    for player, (boat_ids, shots) in enumerate(
+        zip(record["boat_ids"], record["shots"])
+    ):
+        board = battleship_engine.Board(boat_ids.astype(np.int16))
+        hits = shots & (boat_ids >= 0)
+        board.obs[shots] = battleship_engine.WATER
+        board.obs[hits] = battleship_engine.HIT
+        board.remaining -= np.bincount(
+            boat_ids[hits], minlength=len(board.boat_sizes)
+        ).astype(board.remaining.dtype)
+        sunk = np.flatnonzero(board.remaining == 0)
+        board.obs[np.isin(board.boat_ids, sunk)] = battleship_engine.SUNK
+        board.boats_left -= len(sunk)
+        board.unexplored = to_index(record, player)
+        boards.append(board)
+    rngs = [words_to_rng(words) for words in record["rng"]]
+    return boards, int(record["turn"]), rngs
+
+
+if __name__ == "__main__":
+    import time
+    import battleship_rng
+
+    boats = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
+    board_size = 10
+    seed = 1
+    n_repeats = 10000
+
+    rngs = battleship_rng.game_generators(seed, 0)
+    boards = [
+        battleship_engine.Board(battleship_engine.place_fleet(board_size, boats, rng))
+        for rng in rngs[:2]
+    ]
+    for board, rng in zip(boards, rngs[2:]):  # Play a few random shots
+        for _ in range(30):
+            board.fire(*board.unexplored.sample(rng))
+
+    blob = pack_boards(boards, 0, rngs[2:], seed)
+    print(f"Snapshot of a {board_size} x {board_size} game: {len(blob)} bytes")
+
+    start = time.perf_counter()
+    for _ in range(n_repeats):
+        record = unpack(blob)
+    elapsed = (time.perf_counter() - start) / n_repeats
+    print(f"Zero-copy view: {elapsed * 1e6:.1f} us")
+
+    start = time.perf_counter()
+    for _ in range(n_repeats):
+        restored, turn, restored_rngs = unpack_boards(blob)
+    elapsed = (time.perf_counter() - start) / n_repeats
+    print(f"Restore of engine boards: {elapsed * 1e6:.1f} us")
+
+    assert all((a.obs == b.obs).all() for a, b in zip(boards, restored))
+    assert restored_rngs[0].random() == rngs[2].random()
@@ -0,0 +1,322 @@
+"""
+Sparse boards for very large games of battleship.
+
+Dense boards (battleship_cli, battleship_ui, battleship_engine) hold an object or an
+array cell per tile, so memory and setup time grow with the area of the board. Sparse
+boards only store boat tiles and fired tiles, in hash maps and sorted coordinate
+lists, so that e.g. 10,000 x 10,000 boards fit in memory as long as few tiles are
+taken by boats or fired at.
+
+AIs for sparse boards answer their unexplored-region queries (spacing to the nearest
+explored tile in a direction) with binary searches on sorted coordinates, instead of
+walking arrays.
+"""
+
+from typing import Dict, List, Tuple
+import bisect
+import numpy as np
+
+
+class SparseView:
+    """
+    What the enemy knows about a sparse board: only explored tiles are stored. Tiles
+    that are not stored are unexplored ('x').
+    """
+
+    def __init__(self, board_size: int):
+        """Instantiates an empty view of a square board."""
+        self.board_size = board_size
+        self.explored = {}  # Coordinates to 'w', 'h' or 's'
+        self.hits = set()  # Tiles hit whose boat is not sunk yet
+        self.rows = {}  # Row to sorted columns of explored tiles
+        self.cols = {}  # Column to sorted rows of explored tiles
+
+    def get(self, coord: Tuple[int]) -> str:
+        """Returns state of a tile as in battleship_ai: 'x', 'w', 'h' or 's'."""
+        return self.explored.get(coord, "x")
+
+    def record(self, coord: Tuple[int], state: str):
+        """Records the state of an explored tile."""
+        if coord not in self.explored:
+            bisect.insort(self.rows.setdefault(coord[0], []), coord[1])
+            bisect.insort(self.cols.setdefault(coord[1], []), coord[0])
+        self.explored[coord] = state
+        if state == "h":
+            self.hits.add(coord)
+        else:
+            self.hits.discard(coord)
+
+    def get_spacing(self, coord: Tuple[int], direction: Tuple[int]) -> int:
+        """
+        Finds spacing (in # of tiles in a certain direction) to the nearest explored
+        tile or border. Sparse equivalent of battleship_ai.get_spacing.
+        """
+        x, y = coord
+        if direction[0] == 0:  # Along the row
+            line, pos = self.rows.get(x, []), y
+        else:  # Along the column
+            line, pos = self.cols.get(y, []), x
+
+        step = direction[0] + direction[1]
+        if step > 0:
+            idx = bisect.bisect_right(line, pos)
+            nearest = line[idx] if idx < len(line) else self.board_size
+            return nearest - pos - 1
+        idx = bisect.bisect_left(line, pos)
+        nearest = line[idx - 1] if idx > 0 else -1
+        return pos - nearest - 1
+
+    def is_on_board(self, coord: Tuple[int]) -> bool:
+        """Returns whether a coordinate is on the board."""
+        return 0 <= coord[0] < self.board_size and 0 <= coord[1] < self.board_size
+
+
+class SparseBoard:
+    """A battleship board storing only its boat tiles and fired tiles."""
+
+    def __init__(self, board_size: int, boats: Dict, rng: np.random.Generator = None):
+        """
+        Instantiates the board.
+
+        Args:
+            board_size: size of the board, assumed to be square.
+            boats: dictionary where keys are boat size and values # of boats.
+            rng: random generator used to place boats. If None, a generator seeded
+                from OS entropy.
+        """
+        self.board_size = board_size
+        self.boats = boats
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.boat_tiles = {}  # Coordinates to boat id
+        self.boat_coords = []  # Coordinates of each boat, by boat id
+        self.remaining = []  # Tiles not hit of each boat, by boat id
+        self.boats_left = 0
+        self.alive_counts = {}  # Boat size to # of boats not sunk
+        self.view = SparseView(board_size)
+
+    def set_board(self, smart: bool = True, max_attempts: int = 10000):
+        """Places all boats randomly, biggest boats first. See place_boat_randomly."""
+        sizes = [size for size, n_boats in self.boats.items() for _ in range(n_boats)]
+        for boat_size in sorted(sizes, reverse=True):
+            self.place_boat_randomly(boat_size, smart, max_attempts)
+
+    def place_boat_randomly(
+        self, boat_size: int, smart: bool = True, max_attempts: int = 10000
+    ):
+        """
+        Places boat randomly by rejection sampling, checking only the tiles of the
+        candidate position against the hash map of boat tiles.
+
+        Args:
+            boat_size: length of the boat to be placed.
+            smart: if True, boats will not be placed adjacent to one another.
+            max_attempts: number of random positions tried before giving up.
+
+        Raises:
+            ValueError: if no valid position was found, e.g. on a crowded board.
+        """
+        for _ in range(max_attempts):
+            x, y = (int(v) for v in self.rng.integers(0, self.board_size, size=2))
+            orientation = "V" if self.rng.random() < 0.5 else "H"
+            coords = self.get_coordinates(boat_size, (x, y), orientation)
+            if not self.is_valid_position(coords):
+                continue
+            if smart and self.has_adjacent_boat(coords):
+                continue
+            self.boat_to_tiles(coords)
+            return
+        raise ValueError(
+            f"Could not place boat of size {boat_size} after {max_attempts} attempts"
+        )
+
+    @staticmethod
+    def get_coordinates(
+        boat_size: int, top_left: Tuple[int], orientation: str
+    ) -> List[Tuple[int]]:
+        """Gets coordinates of a boat given size, top-left position and orientation."""
+        x, y = top_left
+        if orientation == "V":
+            return [(x + i, y) for i in range(boat_size)]
+        return [(x, y + i) for i in range(boat_size)]
+
+    def is_valid_position(self, coords: List[Tuple[int]]) -> bool:
+        """Checks whether coords are on the board and free of boats."""
+        return all(
+            self.view.is_on_board(coord) and coord not in self.boat_tiles
+            for coord in coords
+        )
+
+    def has_adjacent_boat(self, coords: List[Tuple[int]]) -> bool:
+        """Determines whether a boat would have another adjacent boat."""
+        adj_deltas = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+        for x, y in coords:
+            for dx, dy in adj_deltas:
+                if (x + dx, y + dy) in self.boat_tiles:
+                    return True
+        return False
+
+    def boat_to_tiles(self, coords: List[Tuple[int]]):
+        """Adds boat coordinates to the board."""
+        boat_id = len(self.boat_coords)
+        for coord in coords:
+            self.boat_tiles[coord] = boat_id
+        self.boat_coords.append(coords)
+        self.remaining.append(len(coords))
+        self.boats_left += 1
+        self.alive_counts[len(coords)] = self.alive_counts.get(len(coords), 0) + 1
+
+    def fire(self, x: int, y: int) -> Tuple[bool, int]:
+        """
+        Hits a tile. Assumes the tile is on the board and unexplored.
+
+        Returns:
+            Whether a boat was hit, and the id of the boat sunk by the shot, -1 if
+            none.
+        """
+        boat_id = self.boat_tiles.get((x, y), -1)
+        if boat_id < 0:
+            self.view.record((x, y), "w")
+            return False, -1
+
+        self.view.record((x, y), "h")
+        self.remaining[boat_id] -= 1
+        if self.remaining[boat_id] > 0:
+            return True, -1
+
+        coords = self.boat_coords[boat_id]
+        for coord in coords:
+            self.view.record(coord, "s")
+        self.boats_left -= 1
+        self.alive_counts[len(coords)] -= 1
+        return True, boat_id
+
+    def max_alive_size(self) -> int:
+        """Returns size of biggest boat not sunk, as observed by the enemy."""
+        return max((size for size, n in self.alive_counts.items() if n > 0), default=0)
+
+    def is_over(self) -> bool:
+        """Determines whether all boats of the board are sunk."""
+        return self.boats_left == 0
+
+
+def sparse_fool_AI(
+    view: SparseView, rng: np.random.Generator, max_attempts: int = 1000
+) -> Tuple[int]:
+    """
+    Sparse version of fool_AI. Draws random tiles until an unexplored one is found,
+    then falls back to scanning the board if it is almost fully explored.
+    """
+    for _ in range(max_attempts):
+        target = tuple(int(v) for v in rng.integers(0, view.board_size, size=2))
+        if target not in view.explored:
+            return target
+
+    for x in range(view.board_size):
+        explored = view.rows.get(x, [])
+        if len(explored) < view.board_size:
+            y = next(y for y, e in enumerate(explored + [None]) if y != e)
+            return x, y
+    raise ValueError("No unexplored tiles left on the board")
+
+
+def sparse_standard_AI(view: SparseView, rng: np.random.Generator) -> Tuple[int]:
+    """Sparse version of standard_AI, following the lead on hit boats."""
+    target = sparse_infer_next_hit(view, rng)
+    if target is not None:
+        return target
+    return sparse_fool_AI(view, rng)
+
+
+def sparse_hard_AI(
+    view: SparseView,
+    max_size: int,
+    rng: np.random.Generator,
+    n_candidates: int = 64,
+) -> Tuple[int]:
+    """
+    Sparse version of hard_AI. In the absence of hit boats, it draws random unexplored
+    tiles and keeps the one with the biggest spacing to explored tiles, measured with
+    binary searches on the explored coordinates.
+
+    Args:
+        view: what the AI knows about the enemy board.
+        max_size: size of biggest boat not sunk in enemy board.
+        rng: random generator of the AI.
+        n_candidates: max. number of random tiles considered.
+
+    Returns:
+        2D coordinates of recommended tile to fire at.
+    """
+    target = sparse_infer_next_hit(view, rng)
+    if target is not None:
+        return target
+
+    best, best_spacing = None, -1
+    directions = [(-1, 0), (1, 0), (0, 1), (0, -1)]
+    for _ in range(n_candidates):
+        coord = sparse_fool_AI(view, rng)
+        spacing = min(view.get_spacing(coord, d) for d in directions)
+        if spacing >= max_size // 2:  # Primary condition of find_optimal_spaced_tile
+            return coord
+        if spacing > best_spacing:
+            best, best_spacing = coord, spacing
+    return best
+
+
+def sparse_infer_next_hit(view: SparseView, rng: np.random.Generator) -> Tuple[int]:
+    """
+    Finds an unexplored tile following the lead of a hit boat: at either end of a line
+    of hit tiles, or next to an isolated hit tile. Returns None if there is no lead.
+    """
+    hits = sorted(view.hits)  # Sorted so that the choice is reproducible
+    if not hits:
+        return None
+    x, y = hits[rng.integers(0, len(hits))]
+
+    targets = []
+    for axis in ((1, 0), (0, 1)):
+        line_hit = False
+        for sign in (1, -1):
+            dx, dy = sign * axis[0], sign * axis[1]
+            curs = (x + dx, y + dy)
+            while view.get(curs) == "h" and view.is_on_board(curs):
+                line_hit = True
+                curs = (curs[0] + dx, curs[1] + dy)
+            if view.is_on_board(curs) and view.get(curs) == "x":
+                targets.append((line_hit, curs))
+    if not targets:
+        return None
+
+    # Prefer extending a line of hits, as it gives away the orientation of the boat
+    in_line = [coord for line_hit, coord in targets if line_hit]
+    candidates = in_line if in_line else [coord for _, coord in targets]
+    return candidates[rng.integers(0, len(candidates))]
+
+
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+
+    # Stress test: boats take ~0.1% of a 10,000 x 10,000 board
+    board_size = 10000
+    boats = {2: 20000, 3: 20000, 5: 10000}  # Keys are boat size and values # of boats
+    n_shots = 100000
+    rng = np.random.default_rng(1)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    board = SparseBoard(board_size, boats, rng)
+    board.set_board()
+    print(f"Placed {board.boats_left} boats in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    hits = 0
+    for _ in range(n_shots):
+        target = sparse_hard_AI(board.view, board.max_alive_size(), rng)
+        is_hit, _ = board.fire(*target)
+        hits += is_hit
+    elapsed = time.perf_counter() - start
+    print(f"Fired {n_shots} shots ({hits} hits) in {elapsed:.1f} s")
+
+    _, peak = tracemalloc.get_traced_memory()
+    print(f"Peak memory {peak / 1e6:.0f} MB, a dense board has {board_size ** 2} tiles")
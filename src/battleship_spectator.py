@@ -0,0 +1,291 @@
+"""
+Spectator mode for AI vs AI games of battleship.
+
+Games are played headless at full engine speed by a background thread (see
+battleship_sim) and recorded as events, each event being the tiles changed by a shot.
+The GUI replays the events at its own pace: a timer redraws the boards at a capped
+frame rate, applying in one go all the events played since the previous frame. Boards
+are painted as a whole from arrays, instead of one widget per square.
+
+Once a game is over, the next one is loaded in the same window, so that thousands of
+games can be watched back to back.
+
+Keys:
+    Space: pause / resume.
+    Right: step to the next shot (pauses).
+    + / -: double / halve the replay speed, in shots per second.
+    End: fast-forward to the end of the game.
+    N: skip to the next game.
+"""
+
+# pylint: disable=no-name-in-module
+from typing import Dict, Iterator, Tuple
+import itertools
+import queue
+import threading
+import time
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QMainWindow, QHBoxLayout, QVBoxLayout, QLabel
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QPaintEvent, QColor, QPainter
+from PyQt5.QtCore import Qt, QTimer
+
+import battleship_engine
+import battleship_sim
+
+# Colors of tiles, as in battleship_ui.Square
+COLORS = {
+    "unexplored": QColor(Qt.lightGray),
+    "boat": QColor("#019424"),
+    "water": QColor("#00bfff"),
+    "hit": QColor("#ff0000"),
+    "sunk": QColor("#820808"),
+}
+
+
+def record_games(
+    AI_modes: Tuple[str],
+    board_size: int,
+    boats: Dict,
+    seed: int,
+    game_indices: Iterator[int] = None,
+) -> Iterator[Dict]:
+    """
+    Plays and records games one after the other, see battleship_sim.play_game.
+
+    Args:
+        AI_modes: AI mode of each player.
+        board_size: size of the board, assumed to be square.
+        boats: dictionary where keys are boat size and values # of boats.
+        seed: master seed of the batch of games.
+        game_indices: indices of the games to play. If None, games are played
+            endlessly.
+
+    Yields:
+        Records of the games, with their result and game index.
+    """
+    for i in game_indices if game_indices is not None else itertools.count():
+        record = {"game_index": i}
+        record["result"] = battleship_sim.play_game(
+            AI_modes, board_size, boats, seed, i, record=record
+        )
+        yield record
+
+
+class GameFeed(threading.Thread):
+    """
+    Background thread pulling recorded games from an iterator into a bounded queue,
+    so that games are played ahead of the replay without growing memory.
+    """
+
+    def __init__(self, records: Iterator[Dict], max_games: int = 100):
+        """Instantiates the feed, to be started with start()."""
+        super().__init__(daemon=True)
+        self.records = records
+        self.queue = queue.Queue(maxsize=max_games)
+        self.is_done = False
+
+    def run(self):
+        """Fills the queue with games until the iterator is exhausted."""
+        for record in self.records:
+            self.queue.put(record)
+        self.is_done = True
+
+    def next_game(self) -> Dict:
+        """Returns the next game if one is ready, None otherwise."""
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            return None
+
+
+class BoardView(QWidget):
+    """A whole board painted from arrays, as seen by a spectator."""
+
+    def __init__(self, board_size: int, tile_size: int = 30, *args, **kwargs):
+        """Instantiates an empty board."""
+        super().__init__(*args, **kwargs)
+        self.board_size = board_size
+        self.tile_size = tile_size
+        self.boat_ids = np.full((board_size, board_size), -1, dtype=np.int16)
+        self.obs = np.zeros((board_size, board_size), dtype=np.int8)
+        self.setFixedSize(board_size * tile_size, board_size * tile_size)
+
+    def set_game(self, boat_ids: np.array):
+        """Shows a new board, fully unexplored."""
+        self.boat_ids = boat_ids
+        self.obs[:] = battleship_engine.UNEXPLORED
+        self.update()
+
+    def apply(self, changes: np.array):
+        """Applies tile changes (rows of row, column, obs code), without repainting."""
+        self.obs[changes[:, 0], changes[:, 1]] = changes[:, 2]
+
+    def paintEvent(self, event: QPaintEvent):
+        """Standard PyQt function painting the widget. Called through update()."""
+        painter = QPainter(self)
+        painter.setPen(QColor(Qt.gray))
+        size = self.tile_size
+        for (i, j), code in np.ndenumerate(self.obs):
+            if code == battleship_engine.UNEXPLORED:
+                color = "boat" if self.boat_ids[i, j] >= 0 else "unexplored"
+            else:
+                color = ("unexplored", "water", "hit", "sunk")[code]
+            painter.setBrush(COLORS[color])
+            painter.drawRect(j * size, i * size, size - 1, size - 1)
+
+
+class SpectatorWindow(QMainWindow):
+    """Window replaying recorded games at a capped frame rate."""
+
+    def __init__(
+        self,
+        feed: GameFeed,
+        board_size: int,
+        AI_modes: Tuple[str],
+        speed: float = 20.0,
+        fps: int = 30,
+        *args,
+        **kwargs,
+    ):
+        """
+        Instantiates the window and starts replaying games.
+
+        Args:
+            feed: source of recorded games, started by the window.
+            board_size: size of the board, assumed to be square.
+            AI_modes: AI mode of each player, for display.
+            speed: shots replayed per second.
+            fps: max. number of frames drawn per second.
+        """
+        super().__init__(*args, **kwargs)
+        self.feed = feed
+        self.AI_modes = AI_modes
+        self.speed = speed
+        self.is_paused = False
+        self.record = None
+        self.cursor = 0  # Number of events of the current game applied so far
+        self.budget = 0.0  # Events due but not applied yet, as a fraction
+        self.games_watched = 0
+        self.wins = [0, 0]
+        self.last_frame = time.perf_counter()
+
+        self.setWindowTitle("Battleship - Spectator")
+        self.boards = [BoardView(board_size), BoardView(board_size)]
+        self.titles = [QLabel(), QLabel()]
+        self.status = QLabel()
+
+        hb = QHBoxLayout()
+        for player in range(2):
+            vb = QVBoxLayout()
+            vb.addWidget(self.titles[player])
+            vb.addWidget(self.boards[player])
+            hb.addLayout(vb)
+        vb = QVBoxLayout()
+        vb.addLayout(hb)
+        vb.addWidget(self.status)
+        w = QWidget()
+        w.setLayout(vb)
+        self.setCentralWidget(w)
+
+        self.feed.start()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.frame)
+        self.timer.start(int(1000 / fps))
+        self.show()
+
+    def frame(self):
+        """Applies all events due since the previous frame, then repaints once."""
+        now = time.perf_counter()
+        elapsed, self.last_frame = now - self.last_frame, now
+        if self.record is None and not self.load_next_game():
+            return
+        if not self.is_paused:
+            self.budget += elapsed * self.speed
+            n_events = int(self.budget)
+            self.budget -= n_events
+            self.advance(n_events)
+        self.refresh()
+
+    def advance(self, n_events: int):
+        """Applies the next n_events of the game, loading next games if needed."""
+        while n_events > 0 and self.record is not None:
+            events = self.record["events"]
+            stop = min(self.cursor + n_events, len(events))
+            for player, changes in events[self.cursor : stop]:
+                self.boards[1 - player].apply(changes)
+            n_events -= stop - self.cursor
+            self.cursor = stop
+            if self.cursor == len(events):
+                self.end_game()
+                if n_events > 0 and not self.load_next_game():
+                    break
+
+    def end_game(self):
+        """Counts the result of the current game, which stays on screen."""
+        if self.record.get("counted"):
+            return
+        self.record["counted"] = True
+        self.games_watched += 1
+        self.wins[self.record["result"]["winner"]] += 1
+
+    def load_next_game(self) -> bool:
+        """Shows the next recorded game. Returns False if none is ready yet."""
+        record = self.feed.next_game()
+        if record is None:
+            return False
+        self.record = record
+        self.cursor = 0
+        for board, boat_ids in zip(self.boards, record["boat_ids"]):
+            board.set_game(boat_ids)
+        return True
+
+    def refresh(self):
+        """Repaints boards and labels."""
+        for board in self.boards:
+            board.update()
+        if self.record is None:
+            return
+        n_events = len(self.record["events"])
+        for player, title in enumerate(self.titles):
+            title.setText(f"Board of player {player + 1} - {self.AI_modes[player]} AI")
+        state = "paused" if self.is_paused else f"{self.speed:g} shots/s"
+        self.status.setText(
+            f"Game {self.record['game_index']} - shot {self.cursor}/{n_events} - "
+            f"{state} - wins {self.wins[0]}:{self.wins[1]} "
+            f"in {self.games_watched} games"
+        )
+
+    def keyPressEvent(self, event):
+        """Standard PyQt function triggered on key press, see keys of the module."""
+        key = event.key()
+        if key == Qt.Key_Space:
+            self.is_paused = not self.is_paused
+        elif key == Qt.Key_Right:
+            self.is_paused = True
+            self.advance(1)
+        elif key == Qt.Key_Plus:
+            self.speed *= 2
+        elif key == Qt.Key_Minus:
+            self.speed /= 2
+        elif key == Qt.Key_End and self.record is not None:
+            self.advance(len(self.record["events"]) - self.cursor)
+        elif key == Qt.Key_N:
+            if self.record is not None:
+                self.end_game()
+            self.load_next_game()
+        self.refresh()
+
+
+if __name__ == "__main__":
+    boats = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
+    board_size = 10
+    AI_modes = ("hard", "standard")
+    seed = 1
+    speed = 20  # Shots replayed per second, fast-forward with +
+    fps = 30  # Max. frames drawn per second
+
+    app = QApplication([])
+    feed = GameFeed(record_games(AI_modes, board_size, boats, seed))
+    window = SpectatorWindow(feed, board_size, AI_modes, speed, fps)
+    app.exec_()
@@ -0,0 +1,319 @@
+"""
+Streaming statistics on games of battleship.
+
+Accumulators are updated in O(1) per event, use bounded memory (fixed histograms) and
+merge exactly, so that stats of long-running batch jobs can be produced while games
+run, combined across processes and monitored live, without storing every move.
+"""
+
+from typing import Dict, Tuple
+import math
+import numpy as np
+
+
+class Histogram:
+    """Histogram with fixed-width bins, plus underflow and overflow bins."""
+
+    def __init__(self, low: float, high: float, n_bins: int):
+        """Instantiates an empty histogram of n_bins between low and high."""
+        self.low = low
+        self.high = high
+        self.n_bins = n_bins
+        self.width = (high - low) / n_bins
+        self.counts = np.zeros(n_bins + 2, dtype=np.int64)  # Underflow, bins, overflow
+        self.total = 0.0
+
+    def add(self, value: float):
+        """Adds a value."""
+        if value < self.low:
+            idx = 0
+        elif value >= self.high:
+            idx = self.n_bins + 1
+        else:
+            idx = int((value - self.low) / self.width) + 1
+        self.counts[idx] += 1
+        self.total += value
+
+    def merge(self, other: "Histogram"):
+        """
+        Adds the counts of another histogram with the same bins.
+
+        Raises:
+            ValueError: if the bins of the histograms differ.
+        """
+        bins = (self.low, self.high, self.n_bins)
+        other_bins = (other.low, other.high, other.n_bins)
+        if bins != other_bins:
+            raise ValueError(f"Cannot merge histograms of bins {bins} and {other_bins}")
+        self.counts += other.counts
+        self.total += other.total
+
+    def count(self) -> int:
+        """Returns number of values added."""
+        return int(self.counts.sum())
+
+    def mean(self) -> float:
+        """Returns the exact mean of values added."""
+        return self.total / self.count() if self.count() else math.nan
+
+    def quantile(self, q: float) -> float:
+        """Returns the lower edge of the bin holding quantile q."""
+        if not self.count():
+            return math.nan
+        idx = int(np.searchsorted(np.cumsum(self.counts), q * self.count(), "right"))
+        idx = min(idx, self.n_bins + 1)
+        return self.low + (idx - 1) * self.width
+
+
+class LogHistogram:
+    """
+    Histogram with log-spaced bins, for values spanning orders of magnitude such as
+    durations. Quantiles are accurate to the relative width of a bin.
+    """
+
+    def __init__(self, low: float, high: float, bins_per_decade: int = 20):
+        """Instantiates an empty histogram between low and high (both > 0)."""
+        self.low = low
+        self.high = high
+        self.bins_per_decade = bins_per_decade
+        self.n_bins = int(math.ceil(math.log10(high / low) * bins_per_decade))
+        self.counts = np.zeros(self.n_bins + 2, dtype=np.int64)
+        self.total = 0.0
+
+    def add(self, value: float):
+        """Adds a value."""
+        if value < self.low:
+            idx = 0
+        elif value >= self.high:
+            idx = self.n_bins + 1
+        else:
+            idx = int(math.log10(value / self.low) * self.bins_per_decade) + 1
+        self.counts[idx] += 1
+        self.total += value
+
+    def merge(self, other: "LogHistogram"):
+        """
+        Adds the counts of another histogram with the same bins.
+
+        Raises:
+            ValueError: if the bins of the histograms differ.
+        """
+        bins = (self.low, self.high, self.bins_per_decade)
+        other_bins = (other.low, other.high, other.bins_per_decade)
+        if bins != other_bins:
+            raise ValueError(f"Cannot merge histograms of bins {bins} and {other_bins}")
+        self.counts += other.counts
+        self.total += other.total
+
+    def count(self) -> int:
+        """Returns number of values added."""
+        return int(self.counts.sum())
+
+    def quantile(self, q: float) -> float:
+        """Returns the geometric center of the bin holding quantile q."""
+        if not self.count():
+            return math.nan
+        idx = int(np.searchsorted(np.cumsum(self.counts), q * self.count(), "right"))
+        idx = min(max(idx, 1), self.n_bins)
+        return self.low * 10 ** ((idx - 0.5) / self.bins_per_decade)
+
+
+class CellCounter:
+    """Counts events per tile of the board."""
+
+    def __init__(self, board_size: int):
+        """Instantiates a counter of zeros."""
+        self.counts = np.zeros((board_size, board_size), dtype=np.int64)
+
+    def add(self, coord: Tuple[int]):
+        """Counts an event on a tile."""
+        self.counts[coord] += 1
+
+    def merge(self, other: "CellCounter"):
+        """
+        Adds the counts of another counter.
+
+        Raises:
+            ValueError: if the boards of the counters differ in size.
+        """
+        if self.counts.shape != other.counts.shape:
+            raise ValueError(
+                f"Cannot merge counters of boards {self.counts.shape} and "
+                f"{other.counts.shape}"
+            )
+        self.counts += other.counts
+
+    def frequency(self) -> np.array:
+        """Returns the share of events on each tile."""
+        total = self.counts.sum()
+        return self.counts / total if total else self.counts.astype(float)
+
+
+class PhaseHitRate:
+    """
+    Hit rate by phase of the game, where phase i covers shots number
+    i * phase_length to (i + 1) * phase_length - 1 of a player. The last phase covers
+    all later shots.
+    """
+
+    def __init__(self, phase_length: int = 10, n_phases: int = 10):
+        """Instantiates an empty accumulator."""
+        self.phase_length = phase_length
+        self.shots = np.zeros(n_phases, dtype=np.int64)
+        self.hits = np.zeros(n_phases, dtype=np.int64)
+
+    def add(self, shot_number: int, is_hit: bool):
+        """Counts a shot, given its number in the game (starting at 0)."""
+        phase = min(shot_number // self.phase_length, len(self.shots) - 1)
+        self.shots[phase] += 1
+        self.hits[phase] += is_hit
+
+    def merge(self, other: "PhaseHitRate"):
+        """
+        Adds the counts of another accumulator with the same phases.
+
+        Raises:
+            ValueError: if the phases of the accumulators differ.
+        """
+        phases = (self.phase_length, len(self.shots))
+        other_phases = (other.phase_length, len(other.shots))
+        if phases != other_phases:
+            raise ValueError(
+                f"Cannot merge hit rates of phases {phases} and {other_phases}"
+            )
+        self.shots += other.shots
+        self.hits += other.hits
+
+    def rates(self) -> np.array:
+        """Returns hit rate of each phase, nan for phases without shots."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.hits / self.shots
+
+
+class GameStats:
+    """
+    All streaming stats of a player over many games: shots needed to win, tile of the
+    first hit of each game, hit rate by phase of the game and time to decide a shot.
+    """
+
+    def __init__(self, board_size: int, phase_length: int = 10, n_phases: int = 10):
+        """
+        Instantiates empty stats.
+
+        Args:
+            board_size: size of the board, assumed to be square.
+            phase_length: number of shots per phase of the game.
+            n_phases: number of phases tracked, the last one covering all later shots.
+        """
+        self.games = 0
+        self.wins = 0
+        self.shots_to_win = Histogram(0, board_size**2 + 1, board_size**2 + 1)
+        self.first_hit = CellCounter(board_size)
+        self.hit_rate = PhaseHitRate(phase_length, n_phases)
+        self.decision_time = LogHistogram(1e-7, 1e3)
+
+        # State of the current game
+        self.shots = 0
+        self.has_hit = False
+
+    def record_shot(self, target: Tuple[int], is_hit: bool, decision_time: float):
+        """
+        Records a shot of the player.
+
+        Args:
+            target: 2D coordinates of the tile fired at.
+            is_hit: whether the shot hit a boat.
+            decision_time: seconds taken to choose the target.
+        """
+        self.hit_rate.add(self.shots, is_hit)
+        self.decision_time.add(decision_time)
+        if is_hit and not self.has_hit:
+            self.first_hit.add(target)
+            self.has_hit = True
+        self.shots += 1
+
+    def record_game_over(self, won: bool):
+        """Records the end of a game, and gets ready for the next one."""
+        self.games += 1
+        if won:
+            self.wins += 1
+            self.shots_to_win.add(self.shots)
+        self.shots = 0
+        self.has_hit = False
+
+    def merge(self, other: "GameStats"):
+        """
+        Adds stats of another player or process. Shots of games still in progress
+        in other are included in hit rate, decision time and first hit, whereas
+        games, wins and shots to win only include games that are over.
+
+        Raises:
+            ValueError: if the stats were set up differently, e.g. for another board.
+        """
+        self.shots_to_win.merge(other.shots_to_win)  # Checks the board size first
+        self.first_hit.merge(other.first_hit)
+        self.hit_rate.merge(other.hit_rate)
+        self.decision_time.merge(other.decision_time)
+        self.games += other.games
+        self.wins += other.wins
+
+    def summary(self) -> Dict:
+        """Returns the main figures of the stats."""
+        return {
+            "games": self.games,
+            "win_rate": self.wins / self.games if self.games else math.nan,
+            "shots_to_win_mean": self.shots_to_win.mean(),
+            "shots_to_win_p50": self.shots_to_win.quantile(0.5),
+            "shots_to_win_p90": self.shots_to_win.quantile(0.9),
+            "hit_rate_by_phase": self.hit_rate.rates(),
+            "decision_time_p50": self.decision_time.quantile(0.5),
+            "decision_time_p99": self.decision_time.quantile(0.99),
+        }
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    import battleship_sim
+
+    boats = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
+    board_size = 10
+    AI_modes = ("hard", "standard")
+    seed = 1
+    n_games = 2000
+    chunk_size = 100  # Games per task, stats are reported as each task completes
+
+    totals = (GameStats(board_size), GameStats(board_size))
+    with ProcessPoolExecutor() as pool:
+        futures = [
+            pool.submit(
+                battleship_sim.simulate_stats,
+                AI_modes,
+                board_size,
+                boats,
+                seed,
+                range(start, min(start + chunk_size, n_games)),
+            )
+            for start in range(0, n_games, chunk_size)
+        ]
+        for future in as_completed(futures):
+            for total, stats in zip(totals, future.result()):
+                total.merge(stats)
+            summary = totals[0].summary()
+            print(
+                f"{summary['games']} games: {AI_modes[0]} won {summary['win_rate']:.1%}"
+                f", {summary['shots_to_win_mean']:.1f} shots to win on average"
+            )
+
+    for mode, stats in zip(AI_modes, totals):
+        summary = stats.summary()
+        print(f"\n{mode} AI")
+        print(
+            f"Shots to win: p50 {summary['shots_to_win_p50']:.0f}, "
+            f"p90 {summary['shots_to_win_p90']:.0f}"
+        )
+        print(f"Hit rate by phase: {np.round(summary['hit_rate_by_phase'], 2)}")
+        print(
+            f"Decision time: p50 {summary['decision_time_p50'] * 1e6:.0f} us, "
+            f"p99 {summary['decision_time_p99'] * 1e6:.0f} us"
+        )
+        print(f"First hit frequency:\n{np.round(stats.first_hit.frequency(), 3)}")
@@ -0,0 +1,270 @@
+"""
+Columnar, append-only store for the results of simulated games.
+
+Results are kept as fixed-width NumPy columns, one .npy file per column and chunk:
+
+    root/
+        shard-<shard_id>/
+            chunk-000000/
+                seed.npy, game_index.npy, winner.npy, ...
+            chunk-000001/
+                ...
+
+Every writer process owns its shard, so workers append concurrently without locks.
+Chunks are written to a temporary directory and renamed into place, so readers never
+see half-written chunks. Readers memory-map the columns and aggregate them chunk by
+chunk, without loading the whole store.
+"""
+
+from typing import Dict, List
+import os
+import shutil
+import numpy as np
+
+MAX_BOATS = 16  # Per-boat columns are padded with -1 up to this number of boats
+
+# Column name to (dtype, shape of each row)
+SCHEMA = {
+    "seed": (np.uint64, ()),
+    "game_index": (np.int64, ()),
+    "AI_mode_p1": ("S16", ()),
+    "AI_mode_p2": ("S16", ()),
+    "board_size": (np.int16, ()),
+    "fleet": ("S64", ()),
+    "winner": (np.int8, ()),
+    "shots": (np.int32, (2,)),
+    "hits": (np.int32, (2,)),
+    "sink_turns": (np.int32, (2, MAX_BOATS)),
+    "duration": (np.float32, ()),
+    "think_time": (np.float32, (2,)),
+}
+
+
+def fleet_to_str(boats: Dict) -> str:
+    """Encodes a boats dictionary as a string, e.g. '2x1,3x2' for {2: 1, 3: 2}."""
+    return ",".join(f"{size}x{n_boats}" for size, n_boats in sorted(boats.items()))
+
+
+def game_to_row(
+    result: Dict,
+    seed: int,
+    game_index: int,
+    AI_modes: List[str],
+    board_size: int,
+    boats: Dict,
+) -> Dict:
+    """
+    Transforms the result of battleship_sim.play_game into a row of the store.
+
+    Raises:
+        ValueError: if a value does not fit its column, e.g. a fleet string longer
+            than the column, which would be silently truncated.
+    """
+    fleet = fleet_to_str(boats)
+    for column, text in (
+        ("AI_mode_p1", AI_modes[0]),
+        ("AI_mode_p2", AI_modes[1]),
+        ("fleet", fleet),
+    ):
+        width = np.dtype(SCHEMA[column][0]).itemsize
+        if len(text.encode()) > width:
+            raise ValueError(f"{column} {text!r} longer than {width} bytes")
+    if not 0 < board_size <= np.iinfo(SCHEMA["board_size"][0]).max:
+        raise ValueError(f"Board size {board_size} out of range")
+    sink_turns = np.full((2, MAX_BOATS), -1, dtype=SCHEMA["sink_turns"][0])
+    for player, turns in enumerate(result["sink_turns"]):
+        if len(turns) > MAX_BOATS:
+            raise ValueError(f"{len(turns)} boats, more than MAX_BOATS = {MAX_BOATS}")
+        sink_turns[player, : len(turns)] = turns
+    return {
+        "seed": seed,
+        "game_index": game_index,
+        "AI_mode_p1": AI_modes[0],
+        "AI_mode_p2": AI_modes[1],
+        "board_size": board_size,
+        "fleet": fleet,
+        "winner": result["winner"],
+        "shots": result["shots"],
+        "hits": result["hits"],
+        "sink_turns": sink_turns,
+        "duration": result["duration"],
+        "think_time": result["think_time"],
+    }
+
+
+class ResultsWriter:
+    """Appends rows to the shard of a single writer process, one chunk at a time."""
+
+    def __init__(self, root: str, shard_id: str, chunk_size: int = 10000):
+        """
+        Instantiates a writer. Chunks already in the shard are kept, and new chunks
+        are appended after them.
+
+        Args:
+            root: directory of the store.
+            shard_id: name of the shard, unique to this writer.
+            chunk_size: number of rows buffered before a chunk is written.
+        """
+        self.shard_dir = os.path.join(root, f"shard-{shard_id}")
+        self.chunk_size = chunk_size
+        self.rows = []
+        os.makedirs(self.shard_dir, exist_ok=True)
+        self.n_chunks = len(list_chunks(self.shard_dir))
+
+    def append(self, row: Dict):
+        """Buffers a row, writing a chunk once chunk_size rows are buffered."""
+        self.rows.append(row)
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Writes buffered rows as a new chunk."""
+        if not self.rows:
+            return
+        name = f"chunk-{self.n_chunks:06d}"
+        tmp_dir = os.path.join(self.shard_dir, f".tmp-{name}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        for column, (dtype, shape) in SCHEMA.items():
+            values = np.empty((len(self.rows),) + shape, dtype=dtype)
+            for i, row in enumerate(self.rows):
+                values[i] = row[column]
+            np.save(os.path.join(tmp_dir, f"{column}.npy"), values)
+
+        os.rename(tmp_dir, os.path.join(self.shard_dir, name))  # Atomic
+        self.n_chunks += 1
+        self.rows = []
+
+    def close(self):
+        """Writes any buffered rows."""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ResultsStore:
+    """Reads all shards of a store, memory-mapping its columns."""
+
+    def __init__(self, root: str):
+        """Instantiates a reader over the chunks present in root."""
+        self.root = root
+        self.chunks = [
+            os.path.join(root, shard, chunk)
+            for shard in sorted(os.listdir(root))
+            if shard.startswith("shard-")
+            for chunk in list_chunks(os.path.join(root, shard))
+        ]
+
+    def __len__(self):
+        return sum(len(self.read_chunk(chunk, "winner")) for chunk in self.chunks)
+
+    @staticmethod
+    def read_chunk(chunk: str, column: str) -> np.array:
+        """Memory-maps a column of a chunk."""
+        return np.load(os.path.join(chunk, f"{column}.npy"), mmap_mode="r")
+
+    def column(self, column: str) -> np.array:
+        """Returns a whole column, concatenated across chunks, in memory."""
+        arrays = [self.read_chunk(chunk, column) for chunk in self.chunks]
+        if not arrays:
+            dtype, shape = SCHEMA[column]
+            return np.empty((0,) + shape, dtype=dtype)
+        return np.concatenate(arrays)
+
+    def aggregate(self, values: str, by: str = None, **where) -> Dict:
+        """
+        Aggregates a numeric column chunk by chunk, optionally filtered and grouped.
+
+        Args:
+            values: column to aggregate. Per-player columns are aggregated per player.
+            by: column to group by, if any.
+            where: equality conditions on columns, e.g. AI_mode_p1="hard".
+
+        Returns:
+            Dictionary from group (None if not grouped) to count, sum, mean, min and
+            max of the column.
+        """
+        groups = {}
+        for chunk in self.chunks:
+            data = self.read_chunk(chunk, values)
+            mask = np.ones(len(data), dtype=bool)
+            for column, value in where.items():
+                if isinstance(value, str):
+                    value = value.encode()
+                mask &= self.read_chunk(chunk, column) == value
+
+            keys = self.read_chunk(chunk, by)[mask] if by else None
+            data = np.asarray(data[mask])
+            for key in np.unique(keys) if by else [None]:
+                selected = data[keys == key] if by else data
+                if len(selected) == 0:
+                    continue
+                if isinstance(key, bytes):
+                    key = key.decode()
+                elif key is not None:
+                    key = key.item()
+                acc = groups.setdefault(key, {"count": 0, "sum": 0, "min": None})
+                update_aggregate(acc, selected)
+
+        for acc in groups.values():
+            acc["mean"] = acc["sum"] / acc["count"]
+        return groups
+
+
+def update_aggregate(acc: Dict, values: np.array):
+    """Adds values to running count, sum, min and max, per player if applicable."""
+    acc["count"] += len(values)
+    acc["sum"] = acc["sum"] + values.sum(axis=0)
+    if acc["min"] is None:
+        acc["min"], acc["max"] = values.min(axis=0), values.max(axis=0)
+    else:
+        acc["min"] = np.minimum(acc["min"], values.min(axis=0))
+        acc["max"] = np.maximum(acc["max"], values.max(axis=0))
+
+
+def list_chunks(shard_dir: str) -> List[str]:
+    """Returns names of the complete chunks of a shard, in order."""
+    return sorted(name for name in os.listdir(shard_dir) if name.startswith("chunk-"))
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ProcessPoolExecutor
+    import tempfile
+    import battleship_sim
+
+    boats = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
+    board_size = 10
+    seed = 1
+    n_workers = 4
+    games_per_worker = 250
+    pairings = [("standard", "fool"), ("hard", "standard")]
+
+    root = tempfile.mkdtemp(prefix="battleship-results-")
+    with ProcessPoolExecutor(n_workers) as pool:
+        futures = [
+            pool.submit(
+                battleship_sim.simulate_to_store,
+                root,
+                f"worker{worker}",
+                pairings[worker % len(pairings)],
+                board_size,
+                boats,
+                seed,
+                range(worker * games_per_worker, (worker + 1) * games_per_worker),
+            )
+            for worker in range(n_workers)
+        ]
+        for future in futures:
+            future.result()
+
+    store = ResultsStore(root)
+    print(f"{len(store)} games stored in {root}")
+    for mode, stats in store.aggregate("winner", by="AI_mode_p1").items():
+        print(f"{mode} AI as player 1 won {1 - stats['mean']:.1%} of games")
+    for mode, stats in store.aggregate("shots", by="AI_mode_p1", winner=0).items():
+        print(f"{mode} AI needed {stats['mean'][0]:.1f} shots to win on average")
@@ -0,0 +1,80 @@
+"""
+Superpowers for the game of battleship: shots that hit several tiles at once.
+
+    - nuke: square of size x size tiles centered on the target.
+    - burst_h / burst_v: horizontal or vertical line of size tiles centered on the
+      target.
+
+Areas are clipped to the board, and resolved on a battleship_engine.Board as a single
+mask operation.
+"""
+
+from typing import NamedTuple, Tuple
+import numpy as np
+
+import battleship_ai
+
+KINDS = ("nuke", "burst_h", "burst_v")
+
+
+class Superpower(NamedTuple):
+    """A superpower available to a player during a game."""
+
+    kind: str  # One of KINDS
+    size: int  # Side of the nuke or length of the burst, in tiles
+    charges: int  # Number of times it can be used in a game
+    use_ratio: float = 0.75  # Min. fraction of area unexplored for an AI to use it
+
+
+def get_shape(power: Superpower) -> Tuple[int]:
+    """Returns number of rows and columns covered by a superpower."""
+    if power.kind == "nuke":
+        return power.size, power.size
+    elif power.kind == "burst_h":
+        return 1, power.size
+    elif power.kind == "burst_v":
+        return power.size, 1
+    raise ValueError(f"Unknown superpower {power.kind}, expected one of {KINDS}")
+
+
+def area_mask(power: Superpower, target: Tuple[int], board_size: int) -> np.array:
+    """
+    Returns the tiles hit by a superpower fired at a target.
+
+    Args:
+        power: superpower being fired.
+        target: 2D coordinates of the center of the area.
+        board_size: size of the board, assumed to be square.
+
+    Returns:
+        Boolean array of the size of the board, True for tiles hit.
+    """
+    height, width = get_shape(power)
+    top = max(target[0] - height // 2, 0)
+    left = max(target[1] - width // 2, 0)
+    mask = np.zeros((board_size, board_size), dtype=bool)
+    mask[
+        top : target[0] - height // 2 + height, left : target[1] - width // 2 + width
+    ] = True
+    return mask
+
+
+def choose_area_target(
+    power: Superpower,
+    enemy_array: np.array,
+    board_size: int,
+    rng: np.random.Generator = None,
+) -> Tuple[int]:
+    """
+    Decides whether an AI should use its superpower, and where.
+
+    Returns:
+        2D coordinates of the center of the area to fire at, or None if no area
+        covers enough unexplored tiles to be worth a charge.
+    """
+    shape = get_shape(power)
+    target, coverage = battleship_ai.area_AI(enemy_array, board_size, shape, rng)
+    area = shape[0] * shape[1]
+    if coverage >= power.use_ratio * area:
+        return target
+    return None
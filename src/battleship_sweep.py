@@ -0,0 +1,331 @@
+"""
+Hyperparameter sweeps of the AIs.
+
+AIs with tunable heuristics expose them as a NamedTuple of parameters, see PARAMS. A
+setting is scored by the mean number of shots the AI needs to sink a fleet, over solo
+games against layouts generated once per sweep and shared by all settings, so that
+scores differ by the setting and not by the luck of the layouts.
+
+Games are played in a process pool, by chunks of games. Every chunk completed is
+appended to a cache on disk, so an interrupted sweep resumes where it stopped and a
+longer evaluation of a setting reuses its shorter ones. Settings come from a grid or
+are drawn at random, and are evaluated either with the full budget of games or by
+successive halving: all settings play a few chunks, the worst ones are dropped and
+the others play more chunks, until a single setting is left.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+import hashlib
+import itertools
+import json
+import os
+import numpy as np
+
+import battleship_ai
+import battleship_engine
+import battleship_placement
+import battleship_rng
+
+# AI mode to its tunable parameters
+PARAMS = {"hard": battleship_ai.HardParams}
+
+_layouts = None  # Layouts shared by the games of a worker, see init_worker
+
+
+def init_worker(layouts: np.array):
+    """Initializer of the workers of a pool, which receive the layouts only once."""
+    global _layouts
+    _layouts = layouts
+
+
+def play_chunk(AI_mode: str, params: Dict, seed: int, game_indices: range) -> int:
+    """
+    Plays solo games of an AI against the shared layouts, game i against layout i.
+    Suited to process pools initialized with init_worker.
+
+    Returns:
+        Total number of shots fired to sink all boats.
+    """
+    params = make_params(AI_mode, params)
+    return sum(
+        battleship_placement.shots_to_sink(AI_mode, _layouts[i], seed, i, params)
+        for i in game_indices
+    )
+
+
+def make_params(AI_mode: str, params: Dict):
+    """
+    Returns the parameters of an AI from a setting, missing parameters taking their
+    default value.
+
+    Raises:
+        ValueError: if a parameter is invalid, see e.g. battleship_ai.HardParams.
+    """
+    params = PARAMS[AI_mode](**params)
+    params.check()
+    return params
+
+
+def grid_candidates(space: Dict) -> List[Dict]:
+    """
+    Returns every combination of parameter values.
+
+    Args:
+        space: dictionary where keys are parameter names and values lists of values.
+    """
+    names = sorted(space)
+    values = itertools.product(*[space[name] for name in names])
+    return [dict(zip(names, combination)) for combination in values]
+
+
+def random_candidates(
+    space: Dict, n_candidates: int, rng: np.random.Generator
+) -> List[Dict]:
+    """
+    Draws settings of parameters at random.
+
+    Args:
+        space: dictionary where keys are parameter names and values either lists of
+            values, drawn uniformly, or (low, high) tuples of a range, drawn
+            uniformly as ints if both bounds are ints, as floats otherwise.
+        n_candidates: number of settings to draw.
+        rng: random generator of the draws.
+    """
+    candidates = []
+    for _ in range(n_candidates):
+        candidate = {}
+        for name in sorted(space):
+            values = space[name]
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    candidate[name] = int(rng.integers(low, high + 1))
+                else:
+                    candidate[name] = float(rng.uniform(low, high))
+            else:
+                candidate[name] = values[rng.integers(0, len(values))]
+        candidates.append(candidate)
+    return candidates
+
+
+class EvaluationCache:
+    """
+    Results of chunks of games, kept in memory and appended to a JSON lines file, one
+    line per chunk completed. A line cut by an interruption is ignored on loading.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Instantiates a cache, loading the results already in its file.
+
+        Args:
+            path: path of the file. If None, results are only kept in memory.
+        """
+        self.path = path
+        self.results = {}
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.results[entry["key"]] = entry["shots"]
+
+    def get(self, key: str) -> int:
+        """Returns the total shots of a chunk, None if not cached."""
+        return self.results.get(key)
+
+    def put(self, key: str, shots: int):
+        """Caches the total shots of a chunk, on disk at once."""
+        self.results[key] = shots
+        if self.path is not None:
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"key": key, "shots": shots}) + "\n")
+
+
+class Sweep:
+    """
+    Evaluation of settings of an AI in a process pool, on layouts shared by all
+    settings, with a cache of the chunks of games already played.
+    """
+
+    def __init__(
+        self,
+        AI_mode: str,
+        board_size: int,
+        boats: Dict,
+        seed: int,
+        n_games: int = 1000,
+        chunk_size: int = 50,
+        cache_path: str = None,
+        smart: bool = True,
+        max_workers: int = None,
+    ):
+        """
+        Instantiates a sweep and the pool of its workers. To be used as a context
+        manager, which shuts the pool down.
+
+        Args:
+            AI_mode: AI to tune, one of the keys of PARAMS.
+            board_size: size of the board, assumed to be square.
+            boats: dictionary where keys are boat size and values # of boats.
+            seed: master seed of the layouts and of the games.
+            n_games: number of layouts, and max. number of games per setting.
+            chunk_size: number of games sent to a worker at once, and cached at once.
+            cache_path: path of the cache of chunks, see EvaluationCache. If None,
+                nothing is kept on disk.
+            smart: if True, boats will not be placed adjacent to one another.
+            max_workers: number of worker processes, by default one per CPU.
+
+        Raises:
+            ValueError: if AI_mode has no tunable parameters.
+        """
+        if AI_mode not in PARAMS:
+            raise ValueError(
+                f"AI mode {AI_mode} has no tunable parameters, expected one of "
+                f"{tuple(PARAMS)}"
+            )
+        self.AI_mode = AI_mode
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.n_chunks = n_games // chunk_size
+        rng = battleship_rng.worker_generator(seed, 0)
+        self.layouts = battleship_engine.place_fleets(
+            self.n_chunks * chunk_size, board_size, boats, rng, smart
+        )
+        self.layouts_id = hashlib.sha1(self.layouts.tobytes()).hexdigest()[:16]
+        self.cache = EvaluationCache(cache_path)
+        self.pool = ProcessPoolExecutor(
+            max_workers, initializer=init_worker, initargs=(self.layouts,)
+        )
+
+    def __enter__(self) -> "Sweep":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.pool.shutdown()
+
+    def chunk_key(self, params: Dict, chunk: int) -> str:
+        """
+        Returns the key of a chunk of games of a setting in the cache, the same for
+        settings that only differ by parameters left to their default value.
+        """
+        start = chunk * self.chunk_size
+        params = make_params(self.AI_mode, params)._asdict()
+        return json.dumps(
+            [self.AI_mode, self.layouts_id, self.seed, start, self.chunk_size, params],
+            sort_keys=True,
+        )
+
+    def evaluate(self, candidates: List[Dict], n_chunks: int = None) -> List[Dict]:
+        """
+        Scores settings on their first n_chunks chunks of games, playing the chunks
+        not cached yet in the pool.
+
+        Args:
+            candidates: settings, as dictionaries of parameter values. Missing
+                parameters take their default value.
+            n_chunks: number of chunks of games per setting. If None, all of them.
+
+        Returns:
+            One result per setting, best first: its parameters, mean shots to sink all
+            boats and number of games played.
+
+        Raises:
+            ValueError: if a setting is invalid, before any game is played.
+        """
+        for params in candidates:
+            make_params(self.AI_mode, params)
+        n_chunks = self.n_chunks if n_chunks is None else min(n_chunks, self.n_chunks)
+        futures = {}  # Chunk being played to its key
+        submitted = set()
+        for params in candidates:
+            for chunk in range(n_chunks):
+                key = self.chunk_key(params, chunk)
+                if self.cache.get(key) is None and key not in submitted:
+                    start = chunk * self.chunk_size
+                    future = self.pool.submit(
+                        play_chunk,
+                        self.AI_mode,
+                        params,
+                        self.seed,
+                        range(start, start + self.chunk_size),
+                    )
+                    futures[future] = key
+                    submitted.add(key)
+        for future in as_completed(futures):  # Cached as soon as each chunk is done
+            self.cache.put(futures[future], future.result())
+
+        n_games = n_chunks * self.chunk_size
+        results = []
+        for params in candidates:
+            shots = sum(
+                self.cache.get(self.chunk_key(params, chunk))
+                for chunk in range(n_chunks)
+            )
+            results.append(
+                {"params": params, "shots": shots / n_games, "games": n_games}
+            )
+        return sorted(results, key=lambda result: result["shots"])
+
+    def successive_halving(
+        self, candidates: List[Dict], min_chunks: int = 1, eta: int = 3
+    ) -> List[Dict]:
+        """
+        Scores settings by successive halving: every round, settings left play eta
+        times more chunks than in the previous round, and only the best 1 / eta of
+        them go on to the next round.
+
+        Args:
+            candidates: settings, see evaluate.
+            min_chunks: number of chunks of games per setting in the first round.
+            eta: factor by which settings are cut and chunks grow every round.
+
+        Returns:
+            One result per setting, see evaluate, from its last round. Best first,
+            settings dropped earlier come after those that went further.
+        """
+        results, n_chunks = [], min_chunks
+        while True:
+            scores = self.evaluate(candidates, n_chunks)
+            if len(candidates) == 1 or n_chunks >= self.n_chunks:
+                return scores + results
+            n_keep = max(len(candidates) // eta, 1)
+            candidates = [score["params"] for score in scores[:n_keep]]
+            results = scores[n_keep:] + results
+            n_chunks *= eta
+
+
+if __name__ == "__main__":
+    import time
+
+    boats = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
+    board_size = 10
+    AI_mode = "hard"
+    seed = 1
+    n_games = 810  # Full budget of a setting
+    chunk_size = 30
+    cache_path = "sweep_cache.jsonl"  # Run again to resume, or to reuse evaluations
+    space = {
+        "space_divisor": [1, 2, 3],
+        "border_relax": [0, 1, 2],
+        "edge_bias": [0.0, 0.25, 0.5],
+    }
+
+    with Sweep(
+        AI_mode, board_size, boats, seed, n_games, chunk_size, cache_path
+    ) as sweep:
+        start = time.perf_counter()
+        results = sweep.successive_halving(grid_candidates(space))
+        print(
+            f"Successive halving of {len(results)} settings took "
+            f"{time.perf_counter() - start:.1f} s"
+        )
+        default = sweep.evaluate([battleship_ai.HardParams()._asdict()])[0]
+
+    print(f"{'shots':>6}{'games':>7}  params")
+    for result in results[:5]:
+        print(f"{result['shots']:>6.2f}{result['games']:>7}  {result['params']}")
+    print(f"{default['shots']:>6.2f}{default['games']:>7}  defaults")
@@ -1,15 +1,21 @@
 """
 Game of battleship with a dedicated GUI.
 
+The engine and AIs run in the GUI process. battleship_remote is the maintained GUI,
+running them in a process of their own; this one is kept for what the remote window
+does not support yet, e.g. salvo mode and snapshots.
+
 Created on Sun Nov 17 12:07:24 2019
 
 @author: Ignacio Paricio
 """
+
 # pylint: disable=no-name-in-module
 # pylint: disable=invalid-name
 from typing import Tuple, List
-import random
+import collections
 import time
+import numpy as np
 from PyQt5.QtWidgets import (
     QWidget,
     QSizePolicy,
@@ -22,18 +28,36 @@ from PyQt5.QtWidgets import (
     QApplication,
 )
 from PyQt5.QtGui import QPaintEvent, QMouseEvent, QColor, QPainter, QBrush, QPen, QIcon
-from PyQt5.QtCore import QSize, Qt, QThread
+from PyQt5.QtCore import QSize, Qt, QThread, pyqtSignal
 
 import battleship_ai
+import battleship_cache
+import battleship_engine
+import battleship_events
+import battleship_layouts
+import battleship_policy
+import battleship_qt
+import battleship_rng
+import battleship_snapshot
+
+# Shots per turn: None for classic rules (fire again after a hit), an int for a fixed
+# salvo size, or "ships" for as many shots as surviving boats
+salvo = None
+
+# Max. seconds an AI may take to choose a move, None for no limit
+move_budget = 0.5
+
+# Whether AIs search their next move while the other player thinks, see Player.ponder
+ponder = True
 
-random.seed(1)
+# Bus of game events, subscribe to it to follow the game, see battleship_events
+events = battleship_events.EventBus()
 
 # TODO:
 #   1 - Use decorators for getters/setters
 #   2 - Find a way to run multiple instances of the game to collect AI data
-#   3 - Add text/console explaining latest events (e.g. AI fires at (x,y) / Boat sunk!)
-#   4 - Animations and timing of events (e.g. squares change color gradually)
-#   5 - User to define how many boats/size of board/placement of boats
+#   3 - Animations and timing of events (e.g. squares change color gradually)
+#   4 - User to define how many boats/size of board/placement of boats
 
 
 class Square(QWidget):
@@ -100,12 +124,22 @@ class Square(QWidget):
     def hit(self):
         """Update a square when it gets hit."""
         self.is_hit = True
+        player = next(p for p in players if p.get_turn())
+        player.unexplored.remove((self.y, self.x))  # Human and AI shots alike
+        shooter = player.get_name()
+        events.fire(shooter, (self.y, self.x), self.has_boat)
         if self.has_boat:
             self.boat.update()
             # Update status of all boat tiles in case it was sunk
             for sq in self.boat.squares:
                 sq.update()
-        else:
+            events.hit(shooter, (self.y, self.x))
+            if self.boat.is_sunk:
+                tiles = [(sq.y, sq.x) for sq in self.boat.squares]
+                events.sunk(shooter, self.boat.size, tiles)
+        if salvo is not None:
+            count_salvo_shot()
+        elif not self.has_boat:
             reverse_turns()
         self.update()
 
@@ -135,13 +169,36 @@ class Square(QWidget):
 class MainWindow(QMainWindow):
     """Window where the game of battleship is played."""
 
-    def __init__(self, board_size, boats_dict, players, *args, **kwargs):
-        """Instantiates a window object."""
+    # Lines of the console, emitted from any thread and shown by the GUI thread
+    log_line = pyqtSignal(str)
+
+    def __init__(
+        self, board_size, boats_dict, players, seed=None, snapshot=None, *args, **kwargs
+    ):
+        """
+        Instantiates a window object.
+
+        Random streams of the game (boat placement and AI moves of each player) are
+        derived from seed, see battleship_rng. If None, a new seed is drawn.
+
+        snapshot is a game saved with snapshot(), to be resumed instead of starting a
+        new game. Its seed replaces seed.
+        """
         super().__init__(*args, **kwargs)
         self.board_size = board_size
         self.boats_dict = boats_dict
         self.players = players
         self.runthread = None
+        if snapshot is not None:
+            seed = int(battleship_snapshot.unpack(snapshot)["seed"])
+        self.seed = seed if seed is not None else battleship_rng.new_master_seed()
+
+        # Give each player its own random streams
+        rngs = battleship_rng.game_generators(self.seed, game_index=0)
+        self.board_rngs = {players[0]: rngs[0], players[1]: rngs[1]}
+        for i, player in enumerate(players):
+            if player.rng is None:
+                player.rng = rngs[i + 2]
 
         self.setWindowTitle("Battleship")
         self.setWindowIcon(QIcon("../resources/icons/icon1.png"))
@@ -180,7 +237,16 @@ class MainWindow(QMainWindow):
         hb.addLayout(vb_p1)
         hb.addItem(v_spacer)
         hb.addLayout(vb_p2)
-        w.setLayout(hb)
+
+        # Console with the latest events, below the boards
+        self.console = QLabel()
+        self.console_lines = collections.deque(maxlen=5)
+        self.log_line.connect(self.log)
+        self.console_handlers = battleship_events.describe(events, self.log_line.emit)
+        vb = QVBoxLayout()
+        vb.addLayout(hb)
+        vb.addWidget(self.console)
+        w.setLayout(vb)
         self.setCentralWidget(w)
 
         # Initialize boards and give them to players
@@ -195,16 +261,100 @@ class MainWindow(QMainWindow):
             for sq in squares:
                 sq.is_clickable = not player.get_turn()
             self.set_board(player)
+            player.shots_left = player.salvo_size()
+            player.unexplored = battleship_engine.CellIndex(board_size)
+            player.knowledge = battleship_cache.ZobristHash(board_size)
+            player.fleet = battleship_ai.FleetTracker(boats_dict)
+        if snapshot is not None:
+            self.restore(snapshot)
 
         self.show()
 
         self.run_game()
 
+    def snapshot(self) -> bytes:
+        """Returns the state of the game as a blob, see battleship_snapshot."""
+        shape = (2, self.board_size, self.board_size)
+        boat_ids = np.full(shape, -1, dtype=np.int8)
+        shots = np.zeros(shape, dtype=bool)
+        for i, player in enumerate(self.players):
+            for boat_id, boat in enumerate(player.boats):
+                for sq in boat.squares:
+                    boat_ids[i, sq.y, sq.x] = boat_id
+            for sq in get_all_board_squares(player.get_board()):
+                shots[i, sq.y, sq.x] = sq.is_hit
+        turns = [player.get_turn() for player in self.players]
+        return battleship_snapshot.pack(
+            boat_ids,
+            shots,
+            turns.index(True) if True in turns else -1,
+            [player.rng for player in self.players],
+            self.seed,
+            [player.shots_left or 0 for player in self.players],
+            unexplored=[player.unexplored for player in self.players[::-1]],
+        )
+
+    def restore(self, snapshot):
+        """Sets the state of the game from a blob returned by snapshot()."""
+        record = battleship_snapshot.unpack(snapshot)
+        for i, player in enumerate(self.players):
+            board = player.get_board()
+            for sq in get_all_board_squares(board):
+                sq.boat = None
+                sq.reset()
+
+            boat_ids = record["boat_ids"][i]
+            player.boats = []
+            for boat_id in range(int(boat_ids.max()) + 1):
+                tiles = np.argwhere(boat_ids == boat_id)
+                squares = [board.itemAtPosition(y, x).widget() for y, x in tiles]
+                self.give_boat(player, Boat(squares, len(squares)))
+            for y, x in np.argwhere(record["shots"][i]):
+                board.itemAtPosition(y, x).widget().is_hit = True
+            for boat in player.boats:
+                boat.update()
+
+            # What the enemy knows about the board
+            enemy = self.players[1 - i]
+            enemy.unexplored = battleship_snapshot.to_index(record, i)
+            enemy_array = battleship_qt.board_to_array(board, self.board_size)
+            enemy.clusters = battleship_ai.HitClusters.from_array(enemy_array)
+            enemy.knowledge = battleship_cache.ZobristHash.from_array(enemy_array)
+            enemy.fleet = battleship_ai.FleetTracker(self.boats_dict)
+            for boat in player.boats:
+                if boat.is_sunk:
+                    enemy.fleet.sink(boat.size)
+            enemy.pondered = None
+
+            player.rng = battleship_snapshot.words_to_rng(record["rng"][i])
+            player.set_turn(record["turn"] == i)
+            player.shots_left = int(record["shots_left"][i])
+            text = f"Board of {player.get_name()} - {player.get_nature()}"
+            if player.get_turn():
+                text = text + " - Your turn!"
+            player.title_label.setText(text)
+            for sq in get_all_board_squares(board):
+                sq.is_clickable = not player.get_turn()
+                sq.update()
+
+    def log(self, line: str):
+        """Shows a line in the console of events, below the previous ones."""
+        self.console_lines.append(line)
+        self.console.setText("\n".join(self.console_lines))
+
     def run_game(self):
         """Controls a game of battleship."""
         self.runthread = RunGameThread()
         self.runthread.start()
 
+    def closeEvent(self, event):
+        """Standard PyQt function triggered when the window is closed."""
+        for player in self.players:
+            player.cancel_move()
+        for event_name, handler in self.console_handlers:
+            events.unsubscribe(event_name, handler)
+        super().closeEvent(event)
+
     def init_board(self):
         """Adds squares both to boards of player1 and player2."""
         for x in range(0, self.board_size):
@@ -230,21 +380,83 @@ class MainWindow(QMainWindow):
         sq = board.itemAtPosition(y, x).widget()
         sq.reset()
 
-    def set_board(self, player: "Player", random_board: bool = True):
-        """Places all boats on the board and gives them to a player."""
+    def set_board(
+        self, player: "Player", random_board: bool = True, max_attempts: int = 100
+    ):
+        """
+        Places all boats on the board and gives them to a player.
+
+        Boats are placed randomly one after the other, which can end in a dead end
+        where a boat fits nowhere although the fleet fits on the board. The whole
+        fleet is then placed again, up to max_attempts times, after which a layout
+        found by battleship_layouts.find_layout is used.
+
+        Raises:
+            ValueError: if boats cannot fit on the board, checked before placing
+                boats randomly.
+        """
+        if random_board and not battleship_layouts.is_feasible(
+            self.board_size, self.boats_dict
+        ):
+            raise ValueError(f"Boats {self.boats_dict} do not fit on the board")
+        if not random_board:  # TODO: implement manual boat positioning
+            return
+
+        rng = self.board_rngs[player]
+        board = player.get_board()
+        for _ in range(max_attempts):
+            if self.place_fleet_randomly(player, rng):
+                return
+            for boat in player.boats:  # Dead end, start again from an empty board
+                for sq in boat.squares:
+                    sq.has_boat = False
+                    sq.boat = None
+            player.boats = []
+
+        boat_ids = battleship_layouts.find_layout(self.board_size, self.boats_dict)
+        boat_ids = np.rot90(boat_ids, rng.integers(0, 4))  # Random symmetry
+        if rng.integers(0, 2):
+            boat_ids = boat_ids.T
+        for boat_id in range(int(boat_ids.max()) + 1):
+            squares = [
+                board.itemAtPosition(int(row), int(col)).widget()
+                for row, col in np.argwhere(boat_ids == boat_id)
+            ]
+            self.give_boat(player, Boat(squares, len(squares)))
+
+    def place_fleet_randomly(self, player: "Player", rng: np.random.Generator) -> bool:
+        """
+        Places all boats randomly on the board of a player, one after the other.
+
+        Returns:
+            Whether all boats were placed, False if some boat fit nowhere.
+        """
+        free = battleship_engine.CellIndex(self.board_size)  # Where boats can start
         for boat_size, n_boats in self.boats_dict.items():
             for _ in range(n_boats):
-                if random_board:
-                    boat = self.place_boat_randomly(player.get_board(), boat_size)
-                    player.add_boat(boat)
-                    for sq in boat.squares:
-                        sq.has_boat = True
-                        sq.boat = boat
-                else:  # TODO: implement manual boat positioning
-                    pass
+                boat = self.place_boat_randomly(
+                    player.get_board(), boat_size, rng=rng, free=free
+                )
+                if boat is None:
+                    return False
+                self.give_boat(player, boat)
+        return True
+
+    @staticmethod
+    def give_boat(player: "Player", boat: "Boat"):
+        """Gives a boat to a player, marking its squares."""
+        player.add_boat(boat)
+        for sq in boat.squares:
+            sq.has_boat = True
+            sq.boat = boat
 
     def place_boat_randomly(
-        self, board: QGridLayout, boat_size: int, smart=True
+        self,
+        board: QGridLayout,
+        boat_size: int,
+        smart=True,
+        rng: np.random.Generator = None,
+        free: battleship_engine.CellIndex = None,
     ) -> "Boat":
         """
         Places boat randomly by brute force.
@@ -253,20 +465,34 @@ class MainWindow(QMainWindow):
             board: PyQt grid on which boats are placed.
             boat_size: number of squares taken by boat.
             smart: if True, boats are not placed adjacent to each other.
+            rng: random generator used to place the boat. If None, a generator seeded
+                from OS entropy.
+            free: tiles where a boat can start, updated with the boat placed. If
+                None, boats can start anywhere.
 
         Returns:
             boat: Boat class instance, containing the squares to which to be placed.
+                None if the boat fits nowhere, once every free square was tried as
+                its top-left square.
         """
 
+        if rng is None:
+            rng = np.random.default_rng()
         toggle_or = {"H": "V", "V": "H"}
+        tried = set()  # Top-left squares where the boat fits in no orientation
 
         squares = None
         while not squares:
-            x = random.randint(0, self.board_size)
-            y = random.randint(0, self.board_size)
-            top_left = (x, y)
+            n_starts = len(free) if free is not None else self.board_size**2
+            if len(tried) >= n_starts:
+                return None
+            if free is not None:
+                row, col = free.sample(rng)
+                top_left = (col, row)
+            else:
+                top_left = tuple(int(v) for v in rng.integers(0, self.board_size, 2))
             ors = ["V", "H"]
-            orientation = random.choice(ors)
+            orientation = ors[rng.integers(0, len(ors))]
 
             squares = self.get_squares(board, boat_size, top_left, orientation)
             if smart and squares is not None and self.has_adjacent_boat(board, squares):
@@ -279,7 +505,18 @@ class MainWindow(QMainWindow):
                 )
             if smart and squares is not None and self.has_adjacent_boat(board, squares):
                 squares = None
+            if not squares:
+                tried.add(top_left)
 
+        if free is not None:  # Tiles taken, or next to a boat if smart
+            for sq in squares:
+                free.remove((sq.y, sq.x))
+                if smart:
+                    for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+                        if battleship_ai.is_on_board(
+                            (sq.y + dy, sq.x + dx), self.board_size
+                        ):
+                            free.remove((sq.y + dy, sq.x + dx))
         return Boat(squares, boat_size)
 
     @staticmethod
@@ -377,8 +614,11 @@ class Boat:
 class Player:
     """A player playing the game Battleship."""
 
-    def __init__(self, name, nature, AI_mode="fool", to_play=False):
-        """Instantiates a player."""
+    def __init__(self, name, nature, AI_mode="fool", to_play=False, rng=None):
+        """
+        Instantiates a player. rng is the random generator used by its AI, given by
+        MainWindow if None.
+        """
         self.name = name
         self.my_turn = to_play
         self.nature = nature
@@ -386,6 +626,15 @@ class Player:
         self.boats = []
         self.title_label = None
         self.AI_mode = AI_mode
+        self.rng = rng
+        self.shots_left = 0  # Shots left in the current turn, in salvo mode
+        self.clusters = battleship_ai.HitClusters()  # Hit tiles of enemy boats
+        self.stats = None  # Streaming stats of the AI, see battleship_stats
+        self.search = None  # Anytime search of the current move of the AI
+        self.unexplored = None  # Unexplored tiles of the enemy board, set by MainWindow
+        self.knowledge = None  # Hash of what the AI knows of the enemy board, idem
+        self.pondered = None  # Search started during the other player's turn, by hash
+        self.fleet = None  # Enemy boats not sunk, see battleship_ai.FleetTracker, idem
 
     def add_other_player(self, other_player):
         """Adds other player to player's 'knowledge'."""
@@ -393,23 +642,153 @@ class Player:
 
     def AI_move(self):
         """A game turn played by an AI."""
-        if is_game_over():
+        if not self.get_turn() or is_game_over():
             return None
 
-        enemy_array = battleship_ai.board_to_array(
+        start = time.perf_counter()
+        enemy_array = battleship_qt.board_to_array(
             self.other_player.get_board(), board_size
         )
+        if salvo is not None:
+            self.AI_salvo(enemy_array, start)
+            return None
+
+        if self.AI_mode == "learned":  # A single forward pass, no search needed
+            target = battleship_policy.learned_AI(
+                enemy_array, board_size, self.fleet.sizes()
+            )
+            self.fire_at(target, time.perf_counter() - start)
+            return None
+
+        if self.AI_mode == "parity":  # Vectorized hunt, no search needed
+            target = battleship_ai.parity_AI(
+                enemy_array, board_size, self.fleet, self.rng, self.clusters
+            )
+            self.fire_at(target, time.perf_counter() - start)
+            return None
+
+        # Anytime search, stopped at the move budget with its best target so far. A
+        # search pondered on the same board goes on where it stopped, if not done yet
+        if self.pondered is not None and self.pondered[0] == self.knowledge.value:
+            self.search = self.pondered[1]
+        else:
+            self.search = self.new_search(enemy_array)
+        self.pondered = None
+        deadline = start + move_budget if move_budget is not None else None
+        target = self.search.choose(deadline)
+        self.fire_at(target, time.perf_counter() - start)
+
+    def new_search(self, enemy_array: np.array) -> battleship_ai.AnytimeAI:
+        """Returns the anytime search of the next move of the AI."""
+        return battleship_ai.AnytimeAI(
+            self.AI_mode,
+            enemy_array,
+            board_size,
+            self.fleet.max_size(),
+            self.rng,
+            self.clusters,
+            self.unexplored,
+        )
+
+    def ponder(self, time_slice: float = 0.01) -> bool:
+        """
+        Searches the next move of the AI during the other player's turn, for up to
+        time_slice seconds per call. What the AI knows of the enemy board does not
+        change until its turn, so AI_move picks the search up where it stopped. The
+        search is keyed by the hash of that knowledge, and only reused if it matches.
+
+        Returns:
+            Whether there is still work to do, False once the search is over.
+        """
+        if salvo is not None or self.AI_mode not in battleship_ai.AnytimeAI.AI_MODES:
+            return False
+        if self.pondered is None or self.pondered[0] != self.knowledge.value:
+            enemy_array = battleship_qt.board_to_array(
+                self.other_player.get_board(), board_size
+            )
+            self.pondered = (self.knowledge.value, self.new_search(enemy_array))
+        search = self.pondered[1]
+        deadline = time.perf_counter() + time_slice
+        while time.perf_counter() < deadline:
+            if not search.step():
+                return False
+        return True
+
+    def fire_at(self, target: Tuple[int], decision_time: float):
+        """
+        Fires at a tile of the enemy board, chosen by the AI in decision_time. Shots
+        not taken, e.g. once the turn is over, are neither observed nor recorded.
+        """
+        sq = self.other_player.get_board().itemAtPosition(*target).widget()
+        was_hit = sq.is_hit
+        sq.click()
+        if was_hit or not sq.is_hit:
+            return
+        self.observe_shot(sq)
+        if self.stats is not None:
+            self.stats.record_shot(target, sq.has_boat, decision_time)
+
+    def cancel_move(self):
+        """Cancels the search of the current move, which plays its best target."""
+        if self.search is not None:
+            self.search.cancel()
+
+    def observe_shot(self, sq: Square):
+        """
+        Keeps the hit clusters, hash of the knowledge and enemy boats not sunk of the
+        AI up to date after firing at a square. Unexplored tiles are kept up to date
+        by Square.hit, for humans too.
+        """
+        if sq.is_hit:
+            state = battleship_engine.HIT if sq.has_boat else battleship_engine.WATER
+            self.knowledge.set((sq.y, sq.x), state)
+        if not (sq.is_hit and sq.has_boat):
+            return
+        if sq.boat.is_sunk:
+            self.clusters.remove_sunk([(s.y, s.x) for s in sq.boat.squares])
+            for s in sq.boat.squares:
+                self.knowledge.set((s.y, s.x), battleship_engine.SUNK)
+            self.fleet.sink(sq.boat.size)
+        else:
+            self.clusters.add_hit((sq.y, sq.x))
+
+    def AI_salvo(self, enemy_array, start: float):
+        """
+        All shots of a salvo turn, chosen at once by an AI. start is the
+        time.perf_counter() value when the AI started to decide.
+        """
+        if not self.get_turn():
+            return
+
+        k = self.shots_left
         if self.AI_mode == "fool":
-            target = battleship_ai.fool_AI(enemy_array, board_size)
+            targets = battleship_ai.fool_salvo_AI(enemy_array, board_size, k, self.rng)
         elif self.AI_mode == "standard":
-            target = battleship_ai.standard_AI(enemy_array, board_size)
+            targets = battleship_ai.standard_salvo_AI(
+                enemy_array, board_size, k, self.rng
+            )
         elif self.AI_mode == "hard":
-            target = battleship_ai.hard_AI(
-                enemy_array, board_size, self.max_boat_size()
+            targets = battleship_ai.hard_salvo_AI(
+                enemy_array, board_size, k, self.fleet.max_size(), self.rng
+            )
+        elif self.AI_mode == "learned":
+            targets = battleship_policy.learned_salvo_AI(
+                enemy_array, board_size, k, self.fleet.sizes()
+            )
+        elif self.AI_mode == "parity":
+            targets = battleship_ai.parity_salvo_AI(
+                enemy_array, board_size, k, self.fleet, self.rng
             )
+        decision_time = (time.perf_counter() - start) / max(len(targets), 1)
 
-        sq = self.other_player.get_board().itemAtPosition(*target).widget()
-        sq.click()
+        for target in targets:
+            self.fire_at(target, decision_time)
+
+    def salvo_size(self):
+        """Returns the number of shots the player fires per turn in salvo mode."""
+        if salvo == "ships":
+            return sum(not boat.is_sunk for boat in self.boats)
+        return salvo
 
     def set_turn(self, to_play: bool):
         """Gives the turn to the player."""
@@ -448,17 +827,6 @@ class Player:
         """Determines whether a player has lost the game."""
         return all([boat.is_sunk for boat in self.boats])
 
-    def max_boat_size(self):
-        """Return the max boat size of a player's non-sunk boats."""
-        boats = [[boat_size] * n_boats for boat_size, n_boats in boats_dict.items()]
-        boats_flat = [item for sublist in boats for item in sublist]
-        for boat in self.boats:
-            if boat.is_sunk:
-                boats_flat.remove(boat.size)
-
-        if len(boats_flat) > 0:
-            return max(boats_flat)
-
 
 def reverse_turns():
     """Reverses the turns of the player to play."""
@@ -474,9 +842,21 @@ def reverse_turns():
         text = f"Board of {player.get_name()} - {player.get_nature()}"
         if player.get_turn():
             text = text + " - Your turn!"
+            player.shots_left = player.salvo_size()
+            events.turn_change(player.get_name())
         player.title_label.setText(text)
 
 
+def count_salvo_shot():
+    """Counts a shot in salvo mode, reversing turns after the last shot of a turn."""
+    for player in players:
+        if player.get_turn():
+            player.shots_left -= 1
+            if player.shots_left <= 0:
+                reverse_turns()
+            return
+
+
 def get_all_board_squares(board: QGridLayout) -> List[Square]:
     """
     Return all squares of a board.
@@ -520,17 +900,33 @@ class RunGameThread(QThread):
         """Governs the game of battleship."""
         while not is_game_over():
             for player in players:
-                if player.get_nature() == "AI":
-                    time.sleep(delay_AI)
-                    player.AI_move()
+                if player.get_nature() != "AI":
+                    continue
+                if ponder and not player.get_turn():
+                    # Ponder in slices, so that the turn change is noticed at once
+                    if not player.ponder():
+                        time.sleep(delay_AI)
+                    continue
+                time.sleep(delay_AI)
+                player.AI_move()
+
+        for player in players:
+            if player.stats is not None:
+                player.stats.record_game_over(won=not player.has_lost())
+        events.game_over(next(p.get_name() for p in players if not p.has_lost()))
 
 
 if __name__ == "__main__":
     boats_dict = {2: 1, 3: 2, 4: 1, 5: 1}  # Keys are boat size and values # of boats
     board_size = 10
     delay_AI = 0.1  # Delay in seconds before AI move
+    seed = 1  # Seed of the game, None for a new game every time
+    salvo = None  # Shots per turn: None for classic rules, an int, or "ships"
+    move_budget = 0.5  # Max. seconds an AI may take to choose a move, None for no limit
+    ponder = True  # Whether AIs search their next move during the other player's turn
 
-    # Natures available are HUMAN and AI. AI can be fool, standard, hard
+    # Natures available are HUMAN and AI. AI can be fool, standard, hard, learned,
+    # parity
     player1 = Player(name="Ignacio", nature="human", to_play=True)
     player2 = Player(name="AI hard", nature="AI", AI_mode="hard", to_play=False)
     player1.add_other_player(player2)
@@ -538,6 +934,6 @@ if __name__ == "__main__":
     players = [player1, player2]
 
     app = QApplication([])
-    window = MainWindow(board_size, boats_dict, players)
+    window = MainWindow(board_size, boats_dict, players, seed)
     app.exec_()
     # app.quit() # TODO: explore how to best quit the app for parallel runs